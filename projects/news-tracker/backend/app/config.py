@@ -20,6 +20,86 @@ class DeepSeekConfig:
     model: str
 
 
+@dataclass
+class LlmConfig:
+    batch_tokens: int
+    batch_max_items: int
+    cache_max_mb: int
+    cache_ttl_hours: int
+    max_concurrency: int
+    requests_per_minute: int
+    tokens_per_minute: int
+    timeout: float
+    deadline: float
+    max_retries: int
+    single_call: bool
+    input_tokens: int
+
+
+@dataclass
+class HttpConfig:
+    timeout: float
+    max_connections: int
+    max_keepalive: int
+    max_per_host: int
+    max_concurrency: int
+    http2: bool
+
+
+@dataclass
+class CrawlerConfig:
+    parse_workers: int
+    parse_timeout: float
+    max_bytes: int
+    cache_max_mb: int
+    cache_ttl_hours: int
+
+
+@dataclass
+class PipelineConfig:
+    queue_size: int
+    fetch_workers: int
+    parse_workers: int
+    filter_workers: int
+    crawl_workers: int
+
+
+@dataclass
+class EnrichConfig:
+    batch_size: int
+    lease_seconds: int
+    max_attempts: int
+    retry_base_seconds: float
+    retry_max_seconds: float
+    poll_seconds: int
+
+
+@dataclass
+class PollingConfig:
+    min_minutes: float
+    max_minutes: float
+    core_minutes: float
+    default_minutes: float
+    target_entries: float
+
+
+@dataclass
+class AnalysisConfig:
+    chunk_tokens: int
+    chunk_max_articles: int
+    item_tokens: int
+    max_articles: int
+    concurrency: int
+    default_hours: int
+
+
+@dataclass
+class SchedulerConfig:
+    enabled: bool
+    lease_seconds: int
+    renew_seconds: int
+
+
 @dataclass
 class AppConfig:
     secret_key: str
@@ -28,6 +108,14 @@ class AppConfig:
     admin_password: Optional[str]
     database_url: str
     deepseek: DeepSeekConfig
+    llm: LlmConfig
+    http: HttpConfig
+    pipeline: PipelineConfig
+    crawler: CrawlerConfig
+    enrich: EnrichConfig
+    polling: PollingConfig
+    analysis: AnalysisConfig
+    scheduler: SchedulerConfig
 
 
 def _get_nested(data: Dict[str, Any], *keys: str) -> Any:
@@ -54,6 +142,20 @@ def _pick_latest_model(config: Dict[str, Any]) -> Optional[str]:
     return None
 
 
+def _env_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _first_set(*values: Any) -> Any:
+    """取第一个非 None 的值（与 `or` 不同，0 也算有效设置）。"""
+    for value in values:
+        if value is not None:
+            return value
+    return None
+
+
 def _load_toml(path: Path) -> Dict[str, Any]:
     if not path.exists():
         return {}
@@ -110,6 +212,98 @@ def load_config(config_path: Optional[Path] = None) -> AppConfig:
 
     deepseek = DeepSeekConfig(base_url=base_url, api_key=api_key, model=model)
 
+    llm_section = data.get("llm", {}) if isinstance(data, dict) else {}
+    llm = LlmConfig(
+        batch_tokens=int(os.getenv("LLM_BATCH_TOKENS") or llm_section.get("batch_tokens") or 6000),
+        batch_max_items=int(os.getenv("LLM_BATCH_MAX_ITEMS") or llm_section.get("batch_max_items") or 20),
+        cache_max_mb=int(_first_set(os.getenv("LLM_CACHE_MAX_MB"), llm_section.get("cache_max_mb"), 50)),
+        cache_ttl_hours=int(_first_set(os.getenv("LLM_CACHE_TTL_HOURS"), llm_section.get("cache_ttl_hours"), 168)),
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY") or llm_section.get("max_concurrency") or 8),
+        requests_per_minute=int(_first_set(os.getenv("LLM_RPM"), llm_section.get("requests_per_minute"), 120)),
+        tokens_per_minute=int(_first_set(os.getenv("LLM_TPM"), llm_section.get("tokens_per_minute"), 200000)),
+        timeout=float(os.getenv("LLM_TIMEOUT") or llm_section.get("timeout") or 60.0),
+        deadline=float(os.getenv("LLM_DEADLINE") or llm_section.get("deadline") or 120.0),
+        max_retries=int(_first_set(os.getenv("LLM_MAX_RETRIES"), llm_section.get("max_retries"), 4)),
+        input_tokens=int(_first_set(os.getenv("LLM_INPUT_TOKENS"), llm_section.get("input_tokens"), 800)),
+        single_call=_env_bool(_first_set(os.getenv("LLM_SINGLE_CALL"), llm_section.get("single_call"), True)),
+    )
+
+    http_section = data.get("http", {}) if isinstance(data, dict) else {}
+    http = HttpConfig(
+        timeout=float(os.getenv("HTTP_TIMEOUT") or http_section.get("timeout") or 15.0),
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS") or http_section.get("max_connections") or 50),
+        max_keepalive=int(os.getenv("HTTP_MAX_KEEPALIVE") or http_section.get("max_keepalive") or 20),
+        max_per_host=int(os.getenv("HTTP_MAX_PER_HOST") or http_section.get("max_per_host") or 4),
+        max_concurrency=int(os.getenv("HTTP_MAX_CONCURRENCY") or http_section.get("max_concurrency") or 16),
+        http2=_env_bool(_first_set(os.getenv("HTTP2"), http_section.get("http2"), False)),
+    )
+
+    pipeline_section = data.get("pipeline", {}) if isinstance(data, dict) else {}
+
+    def _workers(name: str, default: int) -> int:
+        return max(1, int(os.getenv(f"PIPELINE_{name.upper()}") or pipeline_section.get(name) or default))
+
+    pipeline = PipelineConfig(
+        queue_size=_workers("queue_size", 100),
+        fetch_workers=_workers("fetch_workers", 4),
+        parse_workers=_workers("parse_workers", 2),
+        filter_workers=_workers("filter_workers", 2),
+        crawl_workers=_workers("crawl_workers", 8),
+    )
+
+    crawler_section = data.get("crawler", {}) if isinstance(data, dict) else {}
+    crawler = CrawlerConfig(
+        parse_workers=int(_first_set(os.getenv("CRAWL_PARSE_WORKERS"), crawler_section.get("parse_workers"), 2)),
+        parse_timeout=float(os.getenv("CRAWL_PARSE_TIMEOUT") or crawler_section.get("parse_timeout") or 10.0),
+        max_bytes=int(os.getenv("CRAWL_MAX_BYTES") or crawler_section.get("max_bytes") or 2 * 1024 * 1024),
+        cache_max_mb=int(_first_set(os.getenv("CRAWL_CACHE_MAX_MB"), crawler_section.get("cache_max_mb"), 200)),
+        cache_ttl_hours=int(
+            _first_set(os.getenv("CRAWL_CACHE_TTL_HOURS"), crawler_section.get("cache_ttl_hours"), 72)
+        ),
+    )
+
+    enrich_section = data.get("enrich", {}) if isinstance(data, dict) else {}
+    enrich = EnrichConfig(
+        batch_size=int(os.getenv("ENRICH_BATCH_SIZE") or enrich_section.get("batch_size") or 16),
+        lease_seconds=int(os.getenv("ENRICH_LEASE_SECONDS") or enrich_section.get("lease_seconds") or 300),
+        max_attempts=int(os.getenv("ENRICH_MAX_ATTEMPTS") or enrich_section.get("max_attempts") or 5),
+        retry_base_seconds=float(
+            _first_set(os.getenv("ENRICH_RETRY_BASE_SECONDS"), enrich_section.get("retry_base_seconds"), 30.0)
+        ),
+        retry_max_seconds=float(
+            os.getenv("ENRICH_RETRY_MAX_SECONDS") or enrich_section.get("retry_max_seconds") or 1800.0
+        ),
+        poll_seconds=int(os.getenv("ENRICH_POLL_SECONDS") or enrich_section.get("poll_seconds") or 30),
+    )
+
+    polling_section = data.get("polling", {}) if isinstance(data, dict) else {}
+    polling = PollingConfig(
+        min_minutes=float(os.getenv("POLL_MIN_MINUTES") or polling_section.get("min_minutes") or 5),
+        max_minutes=float(os.getenv("POLL_MAX_MINUTES") or polling_section.get("max_minutes") or 180),
+        core_minutes=float(os.getenv("POLL_CORE_MINUTES") or polling_section.get("core_minutes") or 15),
+        default_minutes=float(os.getenv("POLL_DEFAULT_MINUTES") or polling_section.get("default_minutes") or 60),
+        target_entries=float(os.getenv("POLL_TARGET_ENTRIES") or polling_section.get("target_entries") or 3),
+    )
+
+    analysis_section = data.get("analysis", {}) if isinstance(data, dict) else {}
+    analysis = AnalysisConfig(
+        chunk_tokens=int(os.getenv("ANALYSIS_CHUNK_TOKENS") or analysis_section.get("chunk_tokens") or 3000),
+        chunk_max_articles=int(
+            os.getenv("ANALYSIS_CHUNK_MAX_ARTICLES") or analysis_section.get("chunk_max_articles") or 30
+        ),
+        item_tokens=int(os.getenv("ANALYSIS_ITEM_TOKENS") or analysis_section.get("item_tokens") or 150),
+        max_articles=int(os.getenv("ANALYSIS_MAX_ARTICLES") or analysis_section.get("max_articles") or 500),
+        concurrency=int(os.getenv("ANALYSIS_CONCURRENCY") or analysis_section.get("concurrency") or 4),
+        default_hours=int(os.getenv("ANALYSIS_DEFAULT_HOURS") or analysis_section.get("default_hours") or 24),
+    )
+
+    scheduler_section = data.get("scheduler", {}) if isinstance(data, dict) else {}
+    scheduler = SchedulerConfig(
+        enabled=_env_bool(_first_set(os.getenv("SCHEDULER_ENABLED"), scheduler_section.get("enabled"), True)),
+        lease_seconds=int(os.getenv("SCHEDULER_LEASE_SECONDS") or scheduler_section.get("lease_seconds") or 30),
+        renew_seconds=int(os.getenv("SCHEDULER_RENEW_SECONDS") or scheduler_section.get("renew_seconds") or 10),
+    )
+
     return AppConfig(
         secret_key=secret_key,
         access_token_expire_minutes=access_token_expire_minutes,
@@ -117,6 +311,14 @@ def load_config(config_path: Optional[Path] = None) -> AppConfig:
         admin_password=admin_password,
         database_url=database_url,
         deepseek=deepseek,
+        llm=llm,
+        http=http,
+        pipeline=pipeline,
+        crawler=crawler,
+        enrich=enrich,
+        polling=polling,
+        analysis=analysis,
+        scheduler=scheduler,
     )
 
 
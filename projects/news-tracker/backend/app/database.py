@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
+from sqlalchemy import event
 from sqlmodel import SQLModel, create_engine, Session
 
 from .config import settings
@@ -14,16 +15,111 @@ def _ensure_sqlite_path(url: str) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
 
 
+SQLITE_BUSY_TIMEOUT_MS = 15000
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    # API 进程与抓取 worker 共用同一个库文件：WAL 下读不阻塞写，写冲突时等待而不是立即报 locked
+    cursor = dbapi_connection.cursor()
+    # 只对还没有建表的新库生效（必须在切换 WAL 之前）；旧库由 ensure_incremental_vacuum 转换
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
 def get_engine():
     _ensure_sqlite_path(settings.database_url)
-    return create_engine(settings.database_url, connect_args={"check_same_thread": False})
+    engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _sqlite_pragmas)
+    return engine
 
 
 engine = get_engine()
 
 
+def _ensure_unique_article_url(conn) -> None:
+    """旧库中 article.url 只有普通索引：去掉重复 URL 后改为唯一索引。"""
+    indexes = conn.exec_driver_sql("PRAGMA index_list('article')").fetchall()
+    for row in indexes:
+        if row[1] == "ix_article_url" and row[2]:
+            return
+    # 保留每个 URL 最早的一条
+    dup_ids = "SELECT id FROM article WHERE id NOT IN (SELECT MIN(id) FROM article GROUP BY url)"
+    conn.exec_driver_sql(f"DELETE FROM articleenriched WHERE article_id IN ({dup_ids})")
+    conn.exec_driver_sql(f"DELETE FROM articletopic WHERE article_id IN ({dup_ids})")
+    conn.exec_driver_sql(f"DELETE FROM article WHERE id IN ({dup_ids})")
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_article_url")
+    conn.exec_driver_sql("CREATE UNIQUE INDEX ix_article_url ON article (url)")
+
+
+def _sql_literal(value) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _add_missing_columns(conn) -> None:
+    """create_all 不会修改已有表：给旧库补上模型中新增的列（及其索引），旧行取列的默认值。"""
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info('{table.name}')").fetchall()}
+        if not existing:
+            continue
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(conn.dialect)}"
+            if column.default is not None and column.default.is_scalar:
+                ddl += f" NOT NULL DEFAULT {_sql_literal(column.default.arg)}"
+            conn.exec_driver_sql(ddl)
+            for index in table.indexes:
+                if column.name in index.columns:
+                    index.create(conn, checkfirst=True)
+
+
+def ensure_incremental_vacuum() -> bool:
+    """
+    把旧库转换为 auto_vacuum=INCREMENTAL（需要一次完整 VACUUM），返回是否做了转换。
+
+    VACUUM 期间独占整个库，不放在每个进程都会执行的 init_db 里：API 与 worker 同时启动时
+    会各跑一遍，后一个等满 busy_timeout 后启动失败。由持有调度租约的进程在清理任务中调用。
+    """
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        mode = conn.exec_driver_sql("PRAGMA auto_vacuum").scalar()
+        if mode == 2:
+            return False
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+    return True
+
+
+def _migrate() -> None:
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        _add_missing_columns(conn)
+        _ensure_unique_article_url(conn)
+
+
+def optimize_storage(vacuum: bool = False) -> None:
+    """大批量删除后归还空闲页并刷新统计信息，让文件大小和查询计划保持正常。"""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if vacuum:
+            # pysqlite 的 execute 只单步执行一次（只释放一页），executescript 才会跑完整个 pragma
+            conn.connection.dbapi_connection.executescript("PRAGMA incremental_vacuum;")
+        conn.exec_driver_sql("ANALYZE")
+
+
 def init_db() -> None:
     SQLModel.metadata.create_all(engine)
+    _migrate()
 
 
 def get_session():
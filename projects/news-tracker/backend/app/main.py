@@ -6,10 +6,16 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlmodel import Session, select
 
 from .auth import ensure_admin_seed
+from .config import settings
 from .database import init_db, engine
 from .models import Topic, Source
 from .routers import auth, admin, topics, sources, articles, analysis, health
-from .services.scheduler import scheduler, schedule_topics
+from .services.scheduler import start_scheduler, stop_scheduler
+from .services.crawler import html_pool
+from .services.llm import llm_client
+from .services.transport import sync_transport
+from .tasks.analysis import fail_interrupted_jobs
+from .tasks.fetch import warm_indexes
 
 logging.basicConfig(level=logging.INFO)
 
@@ -154,12 +160,17 @@ def seed_initial_data() -> None:
 def on_startup() -> None:
     init_db()
     seed_initial_data()
-    schedule_topics()
-    if not scheduler.running:
-        scheduler.start()
+    warm_indexes()
+    # 只处理租约已过期的任务，其它 API 进程里仍在运行的分析任务不受影响
+    fail_interrupted_jobs()
+    # SCHEDULER_ENABLED=false：API-only 模式，抓取与补全由 `python -m app.worker` 运行
+    if settings.scheduler.enabled:
+        start_scheduler()
 
 
 @app.on_event("shutdown")
 def on_shutdown() -> None:
-    if scheduler.running:
-        scheduler.shutdown()
+    stop_scheduler()
+    sync_transport.close()
+    llm_client.close()
+    html_pool.shutdown()
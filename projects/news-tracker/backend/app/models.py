@@ -33,10 +33,22 @@ class Source(SQLModel, table=True):
     topic_id: Optional[int] = Field(default=None, foreign_key="topic.id")
 
 
+class FeedState(SQLModel, table=True):
+    source_id: int = Field(foreign_key="source.id", primary_key=True)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    checked_at: Optional[datetime] = None
+    changed_at: Optional[datetime] = None
+    # 自适应轮询：观测到的新条目速率（条/小时，指数滑动平均）与据此得出的抓取间隔
+    rate_per_hour: Optional[float] = None
+    poll_seconds: Optional[int] = None
+
+
 class Article(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     source_id: int = Field(foreign_key="source.id")
-    url: str = Field(index=True)
+    url: str = Field(index=True, unique=True)
     title_orig: str
     summary_orig: Optional[str] = None
     lang_orig: str = Field(default="en")
@@ -52,6 +64,11 @@ class ArticleEnriched(SQLModel, table=True):
     relevance_label: str = Field(default="unknown")
     dedupe_key: str = Field(index=True)
     is_primary_lang: bool = Field(default=True)
+    # pending: 仍在补全队列中（正文/分类/翻译未完成）；failed: 重试耗尽进入死信
+    enrich_status: str = Field(default="done", index=True)
+    # 送入 LLM 的正文经本地摘要压缩：使用的 token 预算与实际估算 token 数
+    input_budget: Optional[int] = None
+    input_tokens: Optional[int] = None
 
 
 class ArticleTopic(SQLModel, table=True):
@@ -59,6 +76,49 @@ class ArticleTopic(SQLModel, table=True):
     topic_id: int = Field(foreign_key="topic.id", primary_key=True)
 
 
+class EnrichJob(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    article_id: int = Field(foreign_key="article.id", index=True)
+    kind: str  # 当前步骤：classify | crawl | translate
+    remaining: str = Field(default="")  # 之后的步骤，逗号分隔
+    status: str = Field(default="pending", index=True)  # pending | leased | done | dead
+    attempts: int = Field(default=0)
+    available_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    lease_owner: Optional[str] = None
+    lease_until: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class CrawlCache(SQLModel, table=True):
+    url: str = Field(primary_key=True)
+    content: str = Field(default="")
+    etag: Optional[str] = None
+    size: int = Field(default=0)
+    fetched_at: datetime = Field(default_factory=datetime.utcnow)
+    last_access: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+class LlmCache(SQLModel, table=True):
+    key: str = Field(primary_key=True)  # sha256(model, messages, 参数)
+    model: str
+    response: str
+    prompt_tokens: int = Field(default=0)
+    completion_tokens: int = Field(default=0)
+    size: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_access: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+class LeaderLease(SQLModel, table=True):
+    name: str = Field(primary_key=True)  # 租约名，例如 scheduler
+    owner: Optional[str] = None  # 持有者：主机名-进程号-随机后缀
+    lease_until: datetime = Field(default_factory=datetime.utcnow)
+    acquired_at: Optional[datetime] = None
+    renewed_at: Optional[datetime] = None
+
+
 class ManualRequest(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
@@ -73,6 +133,27 @@ class ManualResponse(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class AnalysisJob(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: Optional[int] = Field(default=None, foreign_key="user.id")
+    topic_id: Optional[int] = Field(default=None, foreign_key="topic.id")
+    article_ids_json: Optional[str] = None  # 请求中指定的文章 ID（JSON 数组）
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    status: str = Field(default="pending", index=True)  # pending | running | done | failed
+    article_count: int = Field(default=0)
+    total_chunks: int = Field(default=0)
+    done_chunks: int = Field(default=0)
+    model: Optional[str] = None
+    result_text: Optional[str] = None
+    error: Optional[str] = None
+    # 运行任务的进程及其租约：进程在运行期间定期续约，租约过期说明进程已退出
+    owner: Optional[str] = None
+    lease_until: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+
 class FetchRun(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     topic_id: Optional[int] = Field(default=None, foreign_key="topic.id")
@@ -81,3 +162,13 @@ class FetchRun(SQLModel, table=True):
     started_at: datetime = Field(default_factory=datetime.utcnow)
     finished_at: Optional[datetime] = None
     error: Optional[str] = None
+    entries: int = Field(default=0)  # 本轮通过过滤的新条目（未入库过的 URL）
+    added: int = Field(default=0)
+    # 抓取任务（FetchJobManager）的汇总行：scope 为 all / topic:<id> / source:<id>，
+    # 各源的明细行通过 parent_id 指向它
+    scope: Optional[str] = Field(default=None, index=True)
+    trigger: Optional[str] = None  # manual | scheduled
+    parent_id: Optional[int] = Field(default=None, foreign_key="fetchrun.id", index=True)
+    sources_total: int = Field(default=0)
+    sources_done: int = Field(default=0)
+    skipped: int = Field(default=0)
@@ -1,15 +1,21 @@
 from __future__ import annotations
 
-import asyncio
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select
 
 from ..auth import get_password_hash
 from ..database import get_session
 from ..deps import require_admin
-from ..models import User
-from ..schemas import UserCreateRequest
-from ..services.scheduler import trigger_all_fetch, schedule_topics
+from ..models import Source, Topic, User
+from ..schemas import FetchJobDetail, FetchRunRead, UserCreateRequest
+from ..services.crawl_cache import crawl_cache
+from ..services.enrich_queue import enrich_queue
+from ..services.leader import scheduler_leader
+from ..services.llm_cache import llm_cache
+from ..services.scheduler import jobs_status
+from ..tasks.fetch_jobs import fetch_jobs, make_scope
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -33,8 +39,79 @@ def create_user(
     return {"ok": True, "id": user.id}
 
 
-@router.post("/fetch")
-async def manual_fetch():
-    asyncio.create_task(trigger_all_fetch())
-    schedule_topics()
+@router.post("/fetch", status_code=202)
+async def manual_fetch(
+    topic_id: Optional[int] = None,
+    source_id: Optional[int] = None,
+    session: Session = Depends(get_session),
+):
+    """
+    触发一轮抓取（默认全部，可限定主题或源）；同范围已有任务进行中时返回该任务。
+    本进程不运行调度器时排队（queued），由调度进程领取。
+    """
+    if topic_id is not None and not session.get(Topic, topic_id):
+        raise HTTPException(status_code=404, detail="主题不存在")
+    if source_id is not None and not session.get(Source, source_id):
+        raise HTTPException(status_code=404, detail="源不存在")
+    scope = make_scope(topic_id, source_id)
+    run_id, coalesced, queued = await fetch_jobs.submit(scope, "manual")
+    return {"ok": True, "id": run_id, "scope": scope, "coalesced": coalesced, "queued": queued}
+
+
+@router.get("/fetch", response_model=list[FetchRunRead])
+def list_fetch_runs(
+    limit: int = 20,
+    status: Optional[str] = None,
+    session: Session = Depends(get_session),
+):
+    runs = fetch_jobs.recent(session, limit=max(1, min(limit, 100)), status=status)
+    return [FetchRunRead.model_validate(run, from_attributes=True) for run in runs]
+
+
+@router.get("/fetch/{run_id}", response_model=FetchJobDetail)
+def get_fetch_run(run_id: int, session: Session = Depends(get_session)):
+    found = fetch_jobs.get(session, run_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="抓取任务不存在")
+    run, children = found
+    detail = FetchJobDetail.model_validate(run, from_attributes=True)
+    detail.sources = [FetchRunRead.model_validate(child, from_attributes=True) for child in children]
+    return detail
+
+
+@router.post("/fetch/{run_id}/cancel")
+def cancel_fetch_run(run_id: int):
+    if not fetch_jobs.cancel(run_id):
+        raise HTTPException(status_code=409, detail="抓取任务不存在或已结束")
     return {"ok": True}
+
+
+@router.get("/jobs")
+def scheduled_jobs():
+    return jobs_status()
+
+
+@router.get("/leader")
+def scheduler_leader_status():
+    """调度租约的当前持有者；is_leader 表示处理本请求的进程是否在运行调度器。"""
+    return {"owner": scheduler_leader.owner, "is_leader": scheduler_leader.is_leader, "lease": scheduler_leader.holder()}
+
+
+@router.get("/crawl-cache")
+def crawl_cache_stats():
+    return crawl_cache.stats()
+
+
+@router.get("/llm-cache")
+def llm_cache_stats():
+    return llm_cache.stats()
+
+
+@router.get("/enrich-queue")
+def enrich_queue_stats():
+    return enrich_queue.stats()
+
+
+@router.post("/enrich-queue/requeue-dead")
+def requeue_dead_enrich_jobs():
+    return {"ok": True, "requeued": enrich_queue.requeue_dead()}
@@ -1,47 +1,187 @@
 from __future__ import annotations
 
+import asyncio
 import json
-from fastapi import APIRouter, Depends
-from sqlmodel import Session
+import logging
+import time
 
-from ..database import get_session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
+
+from ..database import engine, get_session
 from ..deps import get_current_user
-from ..models import ManualRequest, ManualResponse, User
-from ..schemas import ManualAnalysisRequest, ManualAnalysisResponse
+from ..models import AnalysisJob, ManualRequest, ManualResponse, Topic, User
+from ..schemas import (
+    AnalysisJobCreate,
+    AnalysisJobRead,
+    AnalysisJobResult,
+    ManualAnalysisRequest,
+    ManualAnalysisResponse,
+)
 from ..services.llm import llm_client
+from ..tasks.analysis import analysis_runner, default_window, fail_interrupted_jobs, lease_deadline
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
 
 
-@router.post("/manual", response_model=ManualAnalysisResponse)
-def manual_analysis(
-    data: ManualAnalysisRequest,
-    session: Session = Depends(get_session),
-):
+def _current_user(session: Session) -> User:
     # Mock user for no-auth mode
     user = session.exec(select(User)).first()
     if not user:
         # Should not happen as we seed admin
-        from ..models import User as UserModel
-        user = UserModel(username="system", password_hash="system", role="admin")
+        user = User(username="system", password_hash="system", role="admin")
         session.add(user)
         session.commit()
         session.refresh(user)
-    titles = [title.strip() for title in data.titles if title.strip()]
+    return user
+
+
+def _create_request(session: Session, titles: list[str]) -> ManualRequest:
+    user = _current_user(session)
     request = ManualRequest(user_id=user.id, titles_json=json.dumps(titles, ensure_ascii=False))
     session.add(request)
     session.commit()
     session.refresh(request)
+    return request
 
-    response_text = llm_client.analyze_titles(titles)
-    response = ManualResponse(request_id=request.id, model=llm_client.model, response_text=response_text)
+
+def _save_response(session: Session, request_id: int, response_text: str) -> ManualAnalysisResponse:
+    response = ManualResponse(request_id=request_id, model=llm_client.model, response_text=response_text)
     session.add(response)
     session.commit()
     session.refresh(response)
-
     return ManualAnalysisResponse(
-        request_id=request.id,
+        request_id=request_id,
         model=response.model,
         response_text=response.response_text,
         created_at=response.created_at,
     )
+
+
+@router.post("/manual", response_model=ManualAnalysisResponse)
+def manual_analysis(
+    data: ManualAnalysisRequest,
+    session: Session = Depends(get_session),
+):
+    titles = [title.strip() for title in data.titles if title.strip()]
+    request = _create_request(session, titles)
+    response_text = llm_client.analyze_titles(titles)
+    return _save_response(session, request.id, response_text)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _create_request_sync(titles: list[str]) -> int:
+    with Session(engine) as session:
+        return _create_request(session, titles).id
+
+
+def _save_response_sync(request_id: int, response_text: str) -> ManualAnalysisResponse:
+    with Session(engine) as session:
+        return _save_response(session, request_id, response_text)
+
+
+@router.post("/manual/stream")
+async def manual_analysis_stream(data: ManualAnalysisRequest, http_request: Request):
+    """
+    流式版手动分析（Server-Sent Events）：先发 start（含 request_id），随后逐段发 delta，
+    生成结束后写入 ManualResponse 并发 done（与 /manual 的响应体相同）；出错时发 error。
+    客户端断开时停止读取并关闭上游请求，不保存不完整的结果。
+    """
+    titles = [title.strip() for title in data.titles if title.strip()]
+    request_id = await asyncio.to_thread(_create_request_sync, titles)
+
+    async def events():
+        started = time.monotonic()
+        first_token = None
+        parts: list[str] = []
+        yield _sse("start", {"request_id": request_id, "model": llm_client.model})
+        stream = llm_client.astream_analyze_titles(titles)
+        try:
+            async for delta in stream:
+                if await http_request.is_disconnected():
+                    logger.info("手动分析 %s: 客户端已断开，取消上游请求", request_id)
+                    return
+                if first_token is None:
+                    first_token = time.monotonic() - started
+                parts.append(delta)
+                yield _sse("delta", {"text": delta})
+        except asyncio.CancelledError:
+            logger.info("手动分析 %s: 客户端已断开，取消上游请求", request_id)
+            raise
+        except Exception as exc:
+            logger.warning("手动分析 %s 失败: %s", request_id, exc)
+            yield _sse("error", {"request_id": request_id, "detail": str(exc)})
+            return
+        finally:
+            await stream.aclose()
+        response = await asyncio.to_thread(_save_response_sync, request_id, "".join(parts).strip())
+        logger.info(
+            "手动分析 %s 完成: 首包 %.2fs, 总耗时 %.2fs",
+            request_id,
+            first_token or 0.0,
+            time.monotonic() - started,
+        )
+        yield _sse("done", response.model_dump(mode="json"))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/jobs", response_model=AnalysisJobRead, status_code=202)
+async def create_analysis_job(data: AnalysisJobCreate, session: Session = Depends(get_session)):
+    """按文章 ID 或主题 + 时间窗口提交 map-reduce 分析任务，立即返回任务状态。"""
+    if not data.article_ids and data.topic_id is None:
+        raise HTTPException(status_code=400, detail="需要提供 article_ids 或 topic_id")
+    job = AnalysisJob(user_id=_current_user(session).id, owner=analysis_runner.owner, lease_until=lease_deadline())
+    if data.article_ids:
+        job.article_ids_json = json.dumps(sorted(set(data.article_ids)))
+    else:
+        if not session.get(Topic, data.topic_id):
+            raise HTTPException(status_code=404, detail="主题不存在")
+        job.topic_id = data.topic_id
+        job.since, job.until = default_window(data.since, data.until)
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    analysis_runner.start(job.id)
+    return AnalysisJobRead.model_validate(job, from_attributes=True)
+
+
+def _get_job(session: Session, job_id: int) -> AnalysisJob:
+    job = session.get(AnalysisJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="分析任务不存在")
+    if job.status in ("pending", "running") and fail_interrupted_jobs(job_id):
+        # 运行它的进程已退出
+        session.refresh(job)
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=AnalysisJobRead)
+def get_analysis_job(job_id: int, session: Session = Depends(get_session)):
+    return AnalysisJobRead.model_validate(_get_job(session, job_id), from_attributes=True)
+
+
+@router.get("/jobs/{job_id}/result", response_model=AnalysisJobResult)
+def get_analysis_result(job_id: int, session: Session = Depends(get_session)):
+    job = _get_job(session, job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=409, detail=f"分析任务失败: {job.error}")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"分析任务尚未完成（{job.done_chunks}/{job.total_chunks}）")
+    return AnalysisJobResult(
+        id=job.id,
+        model=job.model,
+        article_count=job.article_count,
+        result_text=job.result_text or "",
+        finished_at=job.finished_at,
+    )
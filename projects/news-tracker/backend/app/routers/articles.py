@@ -14,6 +14,49 @@ from ..schemas import ArticleRead
 router = APIRouter(prefix="/articles", tags=["articles"])
 
 
+def _topic_ids(session: Session, article_ids: list[int]) -> dict[int, list[int]]:
+    """一篇文章可以属于多个主题：按文章汇总主题 ID。"""
+    topics: dict[int, list[int]] = {}
+    if not article_ids:
+        return topics
+    rows = session.exec(
+        select(ArticleTopic.article_id, ArticleTopic.topic_id)
+        .where(ArticleTopic.article_id.in_(article_ids))
+        .order_by(ArticleTopic.topic_id)
+    ).all()
+    for article_id, topic_id in rows:
+        topics.setdefault(article_id, []).append(topic_id)
+    return topics
+
+
+def _article_read(
+    article: Article,
+    enriched: ArticleEnriched,
+    source: Source,
+    topic_ids: list[int],
+    topic_id: Optional[int] = None,
+) -> ArticleRead:
+    return ArticleRead(
+        id=article.id,
+        source_id=article.source_id,
+        url=article.url,
+        title_orig=article.title_orig,
+        summary_orig=article.summary_orig,
+        lang_orig=article.lang_orig,
+        published_at=article.published_at,
+        fetched_at=article.fetched_at,
+        title_zh=enriched.title_zh,
+        summary_zh=enriched.summary_zh,
+        finance_score=enriched.finance_score,
+        relevance_label=enriched.relevance_label,
+        is_primary_lang=enriched.is_primary_lang,
+        enrich_status=enriched.enrich_status,
+        topic_id=topic_id if topic_id in topic_ids else (topic_ids[0] if topic_ids else None),
+        topic_ids=topic_ids,
+        source_name=source.name,
+    )
+
+
 @router.get("", response_model=list[ArticleRead])
 def list_articles(
     topic_id: Optional[int] = None,
@@ -24,41 +67,29 @@ def list_articles(
 ):
     cutoff = datetime.utcnow() - timedelta(days=days)
 
+    # 每篇文章一行：主题过滤用子查询，不把 ArticleTopic 连进来（多主题时会重复并占用 limit）
     statement = (
-        select(Article, ArticleEnriched, Source, ArticleTopic)
+        select(Article, ArticleEnriched, Source)
         .join(ArticleEnriched, ArticleEnriched.article_id == Article.id)
         .join(Source, Source.id == Article.source_id)
-        .join(ArticleTopic, ArticleTopic.article_id == Article.id, isouter=True)
         .where(Article.published_at >= cutoff)
+        # LLM 复核判定无关的文章保留在库里（避免重复抓取），但不展示
+        .where(ArticleEnriched.relevance_label != "irrelevant")
     )
     if topic_id:
-        statement = statement.where(ArticleTopic.topic_id == topic_id)
+        statement = statement.where(
+            Article.id.in_(select(ArticleTopic.article_id).where(ArticleTopic.topic_id == topic_id))
+        )
     if query:
         statement = statement.where(Article.title_orig.contains(query))
     statement = statement.order_by(Article.published_at.desc()).limit(limit)
 
-    results = []
-    for article, enriched, source, rel in session.exec(statement).all():
-        results.append(
-            ArticleRead(
-                id=article.id,
-                source_id=article.source_id,
-                url=article.url,
-                title_orig=article.title_orig,
-                summary_orig=article.summary_orig,
-                lang_orig=article.lang_orig,
-                published_at=article.published_at,
-                fetched_at=article.fetched_at,
-                title_zh=enriched.title_zh,
-                summary_zh=enriched.summary_zh,
-                finance_score=enriched.finance_score,
-                relevance_label=enriched.relevance_label,
-                is_primary_lang=enriched.is_primary_lang,
-                topic_id=rel.topic_id if rel else None,
-                source_name=source.name,
-            )
-        )
-    return results
+    rows = session.exec(statement).all()
+    topics = _topic_ids(session, [article.id for article, _, _ in rows])
+    return [
+        _article_read(article, enriched, source, topics.get(article.id, []), topic_id)
+        for article, enriched, source in rows
+    ]
 
 
 @router.get("/{article_id}", response_model=ArticleRead)
@@ -67,30 +98,13 @@ def get_article(
     session: Session = Depends(get_session),
 ):
     statement = (
-        select(Article, ArticleEnriched, Source, ArticleTopic)
+        select(Article, ArticleEnriched, Source)
         .join(ArticleEnriched, ArticleEnriched.article_id == Article.id)
         .join(Source, Source.id == Article.source_id)
-        .join(ArticleTopic, ArticleTopic.article_id == Article.id, isouter=True)
         .where(Article.id == article_id)
     )
     row = session.exec(statement).first()
     if not row:
         raise HTTPException(status_code=404, detail="文章不存在")
-    article, enriched, source, rel = row
-    return ArticleRead(
-        id=article.id,
-        source_id=article.source_id,
-        url=article.url,
-        title_orig=article.title_orig,
-        summary_orig=article.summary_orig,
-        lang_orig=article.lang_orig,
-        published_at=article.published_at,
-        fetched_at=article.fetched_at,
-        title_zh=enriched.title_zh,
-        summary_zh=enriched.summary_zh,
-        finance_score=enriched.finance_score,
-        relevance_label=enriched.relevance_label,
-        is_primary_lang=enriched.is_primary_lang,
-        topic_id=rel.topic_id if rel else None,
-        source_name=source.name,
-    )
+    article, enriched, source = row
+    return _article_read(article, enriched, source, _topic_ids(session, [article.id]).get(article.id, []))
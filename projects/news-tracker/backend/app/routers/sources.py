@@ -7,6 +7,7 @@ from ..database import get_session
 from ..deps import require_admin, get_current_user
 from ..models import Source, User
 from ..schemas import SourceCreate, SourceRead, SourceUpdate
+from ..services.scheduler import reconcile_jobs
 
 router = APIRouter(prefix="/sources", tags=["sources"])
 
@@ -26,6 +27,7 @@ def create_source(
     session.add(source)
     session.commit()
     session.refresh(source)
+    reconcile_jobs()
     return source
 
 
@@ -44,4 +46,5 @@ def update_source(
     session.add(source)
     session.commit()
     session.refresh(source)
+    reconcile_jobs()
     return source
@@ -8,7 +8,7 @@ from ..deps import require_admin, get_current_user
 from ..models import User
 from ..models import Topic
 from ..schemas import TopicCreate, TopicRead, TopicUpdate
-from ..services.scheduler import schedule_topics
+from ..services.scheduler import reconcile_jobs
 
 router = APIRouter(prefix="/topics", tags=["topics"])
 
@@ -28,7 +28,7 @@ def create_topic(
     session.add(topic)
     session.commit()
     session.refresh(topic)
-    schedule_topics()
+    reconcile_jobs()
     return topic
 
 
@@ -47,5 +47,5 @@ def update_topic(
     session.add(topic)
     session.commit()
     session.refresh(topic)
-    schedule_topics()
+    reconcile_jobs()
     return topic
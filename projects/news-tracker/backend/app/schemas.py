@@ -88,7 +88,9 @@ class ArticleRead(BaseModel):
     finance_score: float
     relevance_label: str
     is_primary_lang: bool
-    topic_id: Optional[int] = None
+    enrich_status: str = "done"
+    topic_id: Optional[int] = None  # 兼容旧前端：按主题筛选时为该主题，否则为第一个主题
+    topic_ids: list[int] = Field(default_factory=list)
     source_name: Optional[str] = None
 
 
@@ -101,3 +103,53 @@ class ManualAnalysisResponse(BaseModel):
     model: str
     response_text: str
     created_at: datetime
+
+
+class AnalysisJobCreate(BaseModel):
+    article_ids: list[int] = Field(default_factory=list)
+    topic_id: Optional[int] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+
+class AnalysisJobRead(BaseModel):
+    id: int
+    status: str
+    topic_id: Optional[int] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    article_count: int
+    total_chunks: int
+    done_chunks: int
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+class AnalysisJobResult(BaseModel):
+    id: int
+    model: Optional[str] = None
+    article_count: int
+    result_text: str
+    finished_at: Optional[datetime] = None
+
+
+class FetchRunRead(BaseModel):
+    id: int
+    scope: Optional[str] = None
+    trigger: Optional[str] = None
+    topic_id: Optional[int] = None
+    source_id: Optional[int] = None
+    status: str
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    sources_total: int
+    sources_done: int
+    entries: int
+    added: int
+    skipped: int
+
+
+class FetchJobDetail(FetchRunRead):
+    sources: list[FetchRunRead] = Field(default_factory=list)
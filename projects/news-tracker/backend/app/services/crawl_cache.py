@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from sqlalchemy import func
+from sqlmodel import Session, delete, select
+
+from ..config import settings
+from ..database import engine
+from ..models import CrawlCache
+
+logger = logging.getLogger(__name__)
+
+# 只影响来源统计、不影响页面内容的查询参数
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "cmpid", "ref", "src", "ocid", "guccounter"}
+EVICT_BATCH = 200
+
+
+def canonical_url(url: str) -> str:
+    """去掉锚点和跟踪参数、统一大小写与参数顺序，让同一篇文章的不同链接命中同一条缓存。"""
+    parts = urlsplit(url.strip())
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ]
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), "")
+    )
+
+
+@dataclass
+class CachedPage:
+    content: str
+    etag: Optional[str]
+    fresh: bool
+
+
+class CrawlContentCache:
+    """
+    正文抽取结果的持久缓存（SQLite 表 crawlcache）。
+
+    按规范化 URL 存储抽取后的正文、抓取时间、ETag 和大小；过期条目仍保留
+    ETag 供条件请求复用，总大小超过上限时按 last_access 做 LRU 淘汰。
+    上限为 0 时关闭缓存。
+    """
+
+    def __init__(self, max_bytes: int, ttl: timedelta):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        if not self.enabled:
+            return None
+        key = canonical_url(url)
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            row = session.get(CrawlCache, key)
+            if row is None:
+                self._count("misses")
+                return None
+            fresh = now - row.fetched_at < self.ttl
+            if fresh:
+                row.last_access = now
+                session.add(row)
+                session.commit()
+                self._count("hits")
+            else:
+                self._count("misses")
+            return CachedPage(content=row.content, etag=row.etag, fresh=fresh)
+
+    def touch(self, url: str) -> None:
+        """条件请求返回 304：内容未变，刷新抓取时间。"""
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            row = session.get(CrawlCache, canonical_url(url))
+            if row is None:
+                return
+            row.fetched_at = now
+            row.last_access = now
+            session.add(row)
+            session.commit()
+        self._count("revalidated")
+
+    def put(self, url: str, content: str, etag: Optional[str]) -> None:
+        if not self.enabled:
+            return
+        now = datetime.utcnow()
+        size = len(content.encode("utf-8"))
+        with Session(engine) as session:
+            row = session.get(CrawlCache, canonical_url(url)) or CrawlCache(url=canonical_url(url))
+            row.content = content
+            row.etag = etag
+            row.size = size
+            row.fetched_at = now
+            row.last_access = now
+            session.add(row)
+            session.commit()
+            self._evict(session)
+
+    def _evict(self, session: Session) -> None:
+        total = session.exec(select(func.coalesce(func.sum(CrawlCache.size), 0))).one()
+        while total > self.max_bytes:
+            victims = session.exec(
+                select(CrawlCache.url, CrawlCache.size).order_by(CrawlCache.last_access).limit(EVICT_BATCH)
+            ).all()
+            if not victims:
+                break
+            freed = 0
+            urls = []
+            for url, size in victims:
+                urls.append(url)
+                freed += size
+                if total - freed <= self.max_bytes:
+                    break
+            session.exec(delete(CrawlCache).where(CrawlCache.url.in_(urls)))
+            session.commit()
+            total -= freed
+            self._count("evictions", len(urls))
+
+    def purge_expired(self) -> int:
+        """删除早于 TTL 两倍的条目（过期但可能还能用 ETag 复验的条目保留一个 TTL）。"""
+        cutoff = datetime.utcnow() - self.ttl * 2
+        with Session(engine) as session:
+            result = session.exec(delete(CrawlCache).where(CrawlCache.fetched_at < cutoff))
+            session.commit()
+            return result.rowcount or 0
+
+    def stats(self) -> dict:
+        with Session(engine) as session:
+            entries, total = session.exec(
+                select(func.count(), func.coalesce(func.sum(CrawlCache.size), 0)).select_from(CrawlCache)
+            ).one()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "ttl_hours": self.ttl.total_seconds() / 3600,
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+crawl_cache = CrawlContentCache(
+    max_bytes=settings.crawler.cache_max_mb * 1024 * 1024,
+    ttl=timedelta(hours=settings.crawler.cache_ttl_hours),
+)
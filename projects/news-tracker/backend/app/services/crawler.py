@@ -1,75 +1,251 @@
-import httpx
-from bs4 import BeautifulSoup
+import asyncio
 import logging
+import multiprocessing
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+from ..config import settings
+from .crawl_cache import crawl_cache
+from .extract import extract_main_text, serve_parser
+from .transport import get_async_transport, sync_transport
 
 logger = logging.getLogger(__name__)
 
-# Common headers to mimic a browser
+# Common headers to mimic a browser (User-Agent is set on the shared client)
 HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
     "Accept-Language": "en-US,en;q=0.9,zh-CN;q=0.8,zh;q=0.7",
 }
 
-def clean_text(text: str) -> str:
-    """Helper to clean whitespace."""
-    if not text:
-        return ""
-    # Replace multiple newlines with single
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
-    return "\n\n".join(lines)
+# 新的解析进程启动并报告就绪的最长等待时间（不计入单篇解析超时）；
+# 子进程只导入 extract.py（bs4 / lxml），不加载应用配置和数据库
+WORKER_START_TIMEOUT = 15.0
+
+
+class _ParserProcess:
+    def __init__(self, ctx) -> None:
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=serve_parser, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        try:
+            ready = self.conn.poll(WORKER_START_TIMEOUT) and self.conn.recv()
+        except EOFError:
+            ready = False
+        if not ready:
+            self.kill()
+            raise RuntimeError("HTML 解析进程启动失败")
+
+    def run(self, data: bytes, encoding: Optional[str], timeout: float) -> str:
+        self.conn.send((data, encoding))
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"HTML 解析超过 {timeout} 秒")
+        ok, value = self.conn.recv()
+        if not ok:
+            raise value
+        return value
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(1)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class HtmlParserPool:
+    """
+    在独立进程中解析 HTML，避免 BeautifulSoup 的 CPU 开销占用 GIL。
+
+    最多 workers 个常驻解析进程，每个进程同时只处理一篇文档；
+    超时从文档交给某个进程时开始计算，不包括排队和进程启动的时间。
+    超时说明该进程卡在病态页面上，只 kill 这一个进程，下一篇文档到来时再补一个新进程，
+    其它进程里进行中的解析不受影响。
+    workers 为 0 时退化为在当前线程解析。
+    """
+
+    def __init__(self, workers: int, timeout: float, max_bytes: int):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self._ctx = multiprocessing.get_context("spawn")
+        self._slots = threading.BoundedSemaphore(max(workers, 1))
+        self._lock = threading.Lock()
+        self._idle: list[_ParserProcess] = []
+        self._busy: set[_ParserProcess] = set()
+        self._closed = False
+
+    def _checkout(self) -> _ParserProcess:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("HTML 解析进程池已关闭")
+            worker = self._idle.pop() if self._idle else None
+        if worker is None or not worker.process.is_alive():
+            if worker is not None:
+                worker.kill()
+            # spawn：子进程不继承父进程的线程、事件循环和连接池
+            worker = _ParserProcess(self._ctx)
+        with self._lock:
+            self._busy.add(worker)
+        return worker
+
+    def _checkin(self, worker: _ParserProcess, healthy: bool) -> None:
+        with self._lock:
+            self._busy.discard(worker)
+            if healthy and not self._closed:
+                self._idle.append(worker)
+                return
+        worker.kill()
+
+    def _truncate(self, data: bytes) -> bytes:
+        return data[: self.max_bytes] if len(data) > self.max_bytes else data
+
+    def _run(self, data: bytes, encoding: Optional[str]) -> str:
+        with self._slots:
+            worker = self._checkout()
+            healthy = False
+            try:
+                text = worker.run(data, encoding, self.timeout)
+                healthy = True
+                return text
+            except TimeoutError:
+                logger.warning("HTML 解析超时，已结束卡住的解析进程 (pid=%s)", worker.process.pid)
+                raise
+            except (EOFError, OSError):
+                logger.warning("HTML 解析进程 (pid=%s) 意外退出", worker.process.pid)
+                raise
+            except Exception:
+                # 解析函数自身抛出的异常，进程仍然可用
+                healthy = True
+                raise
+            finally:
+                self._checkin(worker, healthy)
+
+    def extract(self, data: bytes, encoding: Optional[str] = None) -> str:
+        data = self._truncate(data)
+        if self.workers <= 0:
+            return extract_main_text(data, encoding)
+        return self._run(data, encoding)
+
+    async def aextract(self, data: bytes, encoding: Optional[str] = None) -> str:
+        data = self._truncate(data)
+        if self.workers <= 0:
+            return await asyncio.to_thread(extract_main_text, data, encoding)
+        return await asyncio.to_thread(self._run, data, encoding)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            busy = list(self._busy)
+        for worker in idle:
+            worker.stop()
+        # 进行中的解析不再等待，调用方会收到 EOFError
+        for worker in busy:
+            if worker.process.is_alive():
+                worker.process.kill()
+
+
+html_pool = HtmlParserPool(
+    workers=settings.crawler.parse_workers,
+    timeout=settings.crawler.parse_timeout,
+    max_bytes=settings.crawler.max_bytes,
+)
+
+
+def _encoding_of(resp: httpx.Response) -> Optional[str]:
+    # 只信任响应头声明的编码；没有声明时交给解析器从 <meta charset> 探测
+    return resp.charset_encoding
+
+
+@dataclass
+class Download:
+    data: bytes = b""
+    encoding: Optional[str] = None
+    etag: Optional[str] = None
+    not_modified: bool = False
+
+
+def _request_headers(etag: Optional[str]) -> dict[str, str]:
+    if not etag:
+        return HEADERS
+    return {**HEADERS, "If-None-Match": etag}
+
+
+def download_capped(url: str, max_bytes: int, etag: Optional[str] = None) -> Download:
+    """流式下载，最多读取 max_bytes 字节后直接断开，超大页面不会整页缓冲。"""
+    buf = bytearray()
+    with sync_transport.stream(url, headers=_request_headers(etag)) as resp:
+        if resp.status_code == 304:
+            return Download(etag=etag, not_modified=True)
+        resp.raise_for_status()
+        for chunk in resp.iter_bytes():
+            buf.extend(chunk)
+            if len(buf) >= max_bytes:
+                break
+        return Download(bytes(buf[:max_bytes]), _encoding_of(resp), resp.headers.get("ETag"))
+
+
+async def download_capped_async(url: str, max_bytes: int, etag: Optional[str] = None) -> Download:
+    buf = bytearray()
+    async with get_async_transport().stream(url, headers=_request_headers(etag)) as resp:
+        if resp.status_code == 304:
+            return Download(etag=etag, not_modified=True)
+        resp.raise_for_status()
+        async for chunk in resp.aiter_bytes():
+            buf.extend(chunk)
+            if len(buf) >= max_bytes:
+                break
+        return Download(bytes(buf[:max_bytes]), _encoding_of(resp), resp.headers.get("ETag"))
+
 
 def fetch_article_content(url: str) -> str:
     """
-    Fetches the HTML content of a URL and extracts the main article text using BeautifulSoup.
+    Returns the extracted article text, served from the crawl cache when fresh.
+    On a miss it streams the HTML (capped at CRAWL_MAX_BYTES, revalidating stale entries with
+    If-None-Match) through the shared pooled client and extracts the main article text in the
+    HTML parser process pool.
     Returns the cleaned text content or empty string if failed.
     """
     try:
-        # verify=False to bypass SSL errors (WRONG_VERSION_NUMBER) caused by proxies or legacy servers
-        with httpx.Client(timeout=15.0, follow_redirects=True, verify=False) as client:
-            resp = client.get(url, headers=HEADERS)
-            resp.raise_for_status()
-            html = resp.text
-            
-        soup = BeautifulSoup(html, "html.parser")
-        
-        # Remove unwanted elements
-        for tag in soup(["script", "style", "nav", "footer", "header", "aside", "iframe", "noscript"]):
-            tag.decompose()
-            
-        # Strategy 1: Look for semantic <article> tag
-        article = soup.find("article")
-        if article:
-            text = article.get_text(separator="\n")
-            return clean_text(text)
-            
-        # Strategy 2: Look for common class names for content
-        # This is a heuristic and may need tuning for specific sites
-        potential_classes = [
-            "article-body", "story-body", "content-body", "article-content", 
-            "post-content", "entry-content", "main-content"
-        ]
-        
-        for cls in potential_classes:
-            div = soup.find("div", class_=cls)
-            if div:
-                text = div.get_text(separator="\n")
-                return clean_text(text)
-                
-        # Strategy 3: Fallback - find all <p> tags and join them if they look like paragraphs
-        paragraphs = soup.find_all("p")
-        valid_paras = []
-        for p in paragraphs:
-            txt = p.get_text().strip()
-            # Filter out short snippets like "Advertisement" or "Read more"
-            if len(txt) > 50: 
-                valid_paras.append(txt)
-                
-        if len(valid_paras) > 3: # If we found enough paragraphs, assume it's the article
-            return clean_text("\n\n".join(valid_paras))
-            
+        cached = crawl_cache.get(url)
+        if cached and cached.fresh:
+            return cached.content
+        page = download_capped(url, html_pool.max_bytes, etag=cached.etag if cached else None)
+        if page.not_modified and cached:
+            crawl_cache.touch(url)
+            return cached.content
+        text = html_pool.extract(page.data, page.encoding)
+        crawl_cache.put(url, text, page.etag)
+        return text
+    except Exception as e:
+        logger.warning(f"Error fetching content for {url}: {e}")
         return ""
 
+
+async def fetch_article_content_async(url: str) -> str:
+    """Async variant of fetch_article_content; parsing runs in the HTML parser process pool."""
+    try:
+        cached = await asyncio.to_thread(crawl_cache.get, url)
+        if cached and cached.fresh:
+            return cached.content
+        page = await download_capped_async(url, html_pool.max_bytes, etag=cached.etag if cached else None)
+        if page.not_modified and cached:
+            await asyncio.to_thread(crawl_cache.touch, url)
+            return cached.content
+        text = await html_pool.aextract(page.data, page.encoding)
+        await asyncio.to_thread(crawl_cache.put, url, text, page.etag)
+        return text
     except Exception as e:
         logger.warning(f"Error fetching content for {url}: {e}")
         return ""
@@ -2,6 +2,10 @@ from __future__ import annotations
 
 import hashlib
 import re
+import struct
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 from difflib import SequenceMatcher
@@ -30,3 +34,178 @@ def similarity(a: str, b: str) -> float:
     if not a or not b:
         return 0.0
     return SequenceMatcher(None, a, b).ratio()
+
+
+def shingles(normalized: str, size: int = 2) -> set[str]:
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i : i + size] for i in range(len(normalized) - size + 1)}
+
+
+GRAM_CACHE_SIZE = 200_000
+
+
+@dataclass
+class _IndexedTitle:
+    article_id: int
+    normalized: str
+    dedupe_key: str
+    bucket: str
+    published_at: Optional[datetime]
+    bands: list[tuple[int, int]]
+
+
+class DedupeIndex:
+    """
+    近似重复标题索引：中文标题按字符 bigram 做 MinHash，再用 LSH 分桶，
+    并按日期桶隔离。查询只对同一日期桶内少量候选运行 SequenceMatcher，
+    与全表扫描相比耗时不随窗口内文章数量增长。
+    """
+
+    def __init__(self, num_perm: int = 48, bands: int = 16, seed: int = 7):
+        if num_perm % bands:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        self.rows = num_perm // bands
+        self.bands = bands
+        self._hash_format = f"<{num_perm}I"
+        self._salt = seed.to_bytes(8, "little")
+        self._gram_cache: dict[str, tuple[int, ...]] = {}
+        self._lock = threading.Lock()
+        self._items: dict[int, _IndexedTitle] = {}
+        # bucket -> (band 序号, band 哈希) -> article_id 集合
+        self._buckets: dict[str, dict[tuple[int, int], set[int]]] = defaultdict(lambda: defaultdict(set))
+        # bucket -> 归一化标题 -> article_id 集合（短标题 MinHash 不稳定，精确匹配兜底）
+        self._exact: dict[str, dict[str, set[int]]] = defaultdict(lambda: defaultdict(set))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _gram_hashes(self, gram: str) -> tuple[int, ...]:
+        # 一次 shake_128 得到 num_perm 个独立哈希值；中文 bigram 重复率高，结果缓存复用
+        cached = self._gram_cache.get(gram)
+        if cached is None:
+            if len(self._gram_cache) >= GRAM_CACHE_SIZE:
+                self._gram_cache.clear()
+            digest = hashlib.shake_128(self._salt + gram.encode("utf-8")).digest(
+                struct.calcsize(self._hash_format)
+            )
+            cached = struct.unpack(self._hash_format, digest)
+            self._gram_cache[gram] = cached
+        return cached
+
+    def _band_keys(self, normalized: str) -> list[tuple[int, int]]:
+        grams = shingles(normalized)
+        if not grams:
+            return []
+        signature = list(map(min, zip(*(self._gram_hashes(gram) for gram in grams))))
+        return [
+            (band, hash(tuple(signature[band * self.rows : (band + 1) * self.rows])))
+            for band in range(self.bands)
+        ]
+
+    def add(self, article_id: int, title_zh: str, published_at: Optional[datetime], dedupe_key: str) -> None:
+        normalized = normalize_text(title_zh)
+        if not normalized:
+            # 归一化后为空的标题（纯符号等）与任何标题的相似度都是 0，不入索引
+            self.remove(article_id)
+            return
+        item = _IndexedTitle(
+            article_id=article_id,
+            normalized=normalized,
+            dedupe_key=dedupe_key,
+            bucket=date_bucket(published_at),
+            published_at=published_at,
+            bands=self._band_keys(normalized),
+        )
+        with self._lock:
+            self._remove_locked(article_id)
+            self._items[article_id] = item
+            for band_key in item.bands:
+                self._buckets[item.bucket][band_key].add(article_id)
+            self._exact[item.bucket][normalized].add(article_id)
+
+    def _remove_locked(self, article_id: int) -> None:
+        item = self._items.pop(article_id, None)
+        if item is None:
+            return
+        lsh = self._buckets.get(item.bucket, {})
+        for band_key in item.bands:
+            ids = lsh.get(band_key)
+            if ids:
+                ids.discard(article_id)
+                if not ids:
+                    del lsh[band_key]
+        exact = self._exact.get(item.bucket, {})
+        ids = exact.get(item.normalized)
+        if ids:
+            ids.discard(article_id)
+            if not ids:
+                del exact[item.normalized]
+
+    def remove(self, article_id: int) -> None:
+        with self._lock:
+            self._remove_locked(article_id)
+
+    def prune(self, cutoff: datetime) -> int:
+        """丢弃早于 cutoff 所在日期的整个日期桶。"""
+        keep_from = date_bucket(cutoff)
+        with self._lock:
+            stale = [bucket for bucket in set(self._buckets) | set(self._exact) if bucket < keep_from]
+            removed = 0
+            for bucket in stale:
+                ids = {aid for aid, item in self._items.items() if item.bucket == bucket}
+                for aid in ids:
+                    del self._items[aid]
+                removed += len(ids)
+                self._buckets.pop(bucket, None)
+                self._exact.pop(bucket, None)
+            return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._buckets.clear()
+            self._exact.clear()
+
+    def _candidates_locked(self, normalized: str, bucket: str, band_keys: list[tuple[int, int]]) -> set[int]:
+        found = set(self._exact.get(bucket, {}).get(normalized, ()))
+        lsh = self._buckets.get(bucket)
+        if lsh:
+            for band_key in band_keys:
+                found.update(lsh.get(band_key, ()))
+        return found
+
+    def candidates(self, title_zh: str, published_at: Optional[datetime]) -> list[int]:
+        normalized = normalize_text(title_zh)
+        band_keys = self._band_keys(normalized)
+        with self._lock:
+            found = self._candidates_locked(normalized, date_bucket(published_at), band_keys)
+        return sorted(found)
+
+    def find_similar(
+        self,
+        title_zh: str,
+        published_at: Optional[datetime],
+        threshold: float,
+        not_before: Optional[datetime] = None,
+    ) -> Optional[tuple[int, str, float]]:
+        """返回 (article_id, dedupe_key, 相似度)，候选用 SequenceMatcher 确认。"""
+        normalized = normalize_text(title_zh)
+        if not normalized:
+            return None
+        band_keys = self._band_keys(normalized)
+        # 在锁内取出候选条目，SequenceMatcher 在锁外运行，不阻塞并发的 add / prune
+        with self._lock:
+            found = self._candidates_locked(normalized, date_bucket(published_at), band_keys)
+            items = [self._items[aid] for aid in sorted(found) if aid in self._items]
+        best: Optional[tuple[int, str, float]] = None
+        for item in items:
+            if not_before and item.published_at and item.published_at < not_before:
+                continue
+            score = similarity(item.normalized, normalized)
+            if score >= threshold and (best is None or score > best[2]):
+                best = (item.article_id, item.dedupe_key, score)
+        return best
+
+
+dedupe_index = DedupeIndex()
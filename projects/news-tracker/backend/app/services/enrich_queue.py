@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import logging
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, case, func, or_, update
+from sqlmodel import Session, delete, select
+
+from ..config import settings
+from ..database import engine
+from ..models import ArticleEnriched, EnrichJob
+
+logger = logging.getLogger(__name__)
+
+DONE_RETENTION = timedelta(days=1)
+ERROR_MAX_CHARS = 500
+
+
+@dataclass
+class LeasedJob:
+    id: int
+    article_id: int
+    kind: str
+    remaining: list[str]
+    attempts: int
+
+    @property
+    def steps(self) -> list[str]:
+        return [self.kind, *self.remaining]
+
+
+def _split_steps(raw: Optional[str]) -> list[str]:
+    return [step for step in (raw or "").split(",") if step]
+
+
+class EnrichQueue:
+    """
+    文章补全任务队列（SQLite 表 enrichjob）。
+
+    每篇文章一条任务，kind 是当前步骤，remaining 是之后的步骤；worker 租用
+    （lease）一批任务后逐步执行，每完成一步就写回进度，崩溃后从未完成的步骤继续。
+    失败按指数退避重试，超过 max_attempts 进入死信（dead），文章标记为 failed。
+    租约过期未完成的任务视为失败一次，会被其它 worker 重新租用。
+    """
+
+    def __init__(
+        self,
+        lease_seconds: int,
+        max_attempts: int,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+    ):
+        self.lease_duration = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+
+    def backoff(self, attempts: int) -> timedelta:
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** max(0, attempts - 1))
+        return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+    def _mark_failed(self, session: Session, article_ids: list[int]) -> None:
+        if article_ids:
+            session.exec(
+                update(ArticleEnriched)
+                .where(ArticleEnriched.article_id.in_(article_ids))
+                .values(enrich_status="failed")
+            )
+
+    def reap_expired(self) -> int:
+        """租约过期且已用尽重试次数的任务直接进入死信。"""
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            rows = session.exec(
+                update(EnrichJob)
+                .where(
+                    EnrichJob.status == "leased",
+                    EnrichJob.lease_until < now,
+                    EnrichJob.attempts + 1 >= self.max_attempts,
+                )
+                .values(status="dead", last_error="租约超时", lease_owner=None, updated_at=now)
+                .returning(EnrichJob.article_id)
+            ).all()
+            article_ids = [row[0] for row in rows]
+            self._mark_failed(session, article_ids)
+            session.commit()
+        if article_ids:
+            logger.warning("%s 个补全任务租约超时次数过多，已进入死信", len(article_ids))
+        return len(article_ids)
+
+    def lease(self, owner: str, limit: int) -> list[LeasedJob]:
+        """原子地租用最多 limit 个到期任务（单条 UPDATE ... RETURNING，多个 worker 不会拿到同一条）。"""
+        now = datetime.utcnow()
+        ready = or_(
+            and_(EnrichJob.status == "pending", EnrichJob.available_at <= now),
+            and_(EnrichJob.status == "leased", EnrichJob.lease_until < now),
+        )
+        ids = select(EnrichJob.id).where(ready).order_by(EnrichJob.available_at).limit(limit).scalar_subquery()
+        statement = (
+            update(EnrichJob)
+            .where(EnrichJob.id.in_(ids), ready)
+            .values(
+                # 抢回过期租约记一次失败
+                attempts=case((EnrichJob.status == "leased", EnrichJob.attempts + 1), else_=EnrichJob.attempts),
+                status="leased",
+                lease_owner=owner,
+                lease_until=now + self.lease_duration,
+                updated_at=now,
+            )
+            .returning(EnrichJob.id, EnrichJob.article_id, EnrichJob.kind, EnrichJob.remaining, EnrichJob.attempts)
+        )
+        with Session(engine) as session:
+            rows = session.exec(statement).all()
+            session.commit()
+        return [
+            LeasedJob(id=job_id, article_id=article_id, kind=kind, remaining=_split_steps(remaining), attempts=attempts)
+            for job_id, article_id, kind, remaining, attempts in rows
+        ]
+
+    def _owned(self, job: LeasedJob, owner: str):
+        return update(EnrichJob).where(
+            EnrichJob.id == job.id, EnrichJob.status == "leased", EnrichJob.lease_owner == owner
+        )
+
+    def advance(self, job: LeasedJob, owner: str, remaining: list[str]) -> bool:
+        """记录当前步骤已完成，下一步从 remaining[0] 开始；租约已丢失时返回 False。"""
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            result = session.exec(
+                self._owned(job, owner).values(
+                    kind=remaining[0],
+                    remaining=",".join(remaining[1:]),
+                    attempts=0,
+                    last_error=None,
+                    lease_until=now + self.lease_duration,
+                    updated_at=now,
+                )
+            )
+            session.commit()
+        if result.rowcount:
+            job.kind, job.remaining, job.attempts = remaining[0], remaining[1:], 0
+        return bool(result.rowcount)
+
+    def complete(self, job: LeasedJob, owner: str) -> bool:
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            result = session.exec(
+                self._owned(job, owner).values(status="done", lease_owner=None, lease_until=None, updated_at=now)
+            )
+            if result.rowcount:
+                session.exec(
+                    update(ArticleEnriched)
+                    .where(ArticleEnriched.article_id == job.article_id)
+                    .values(enrich_status="done")
+                )
+            session.commit()
+        return bool(result.rowcount)
+
+    def retry(self, job: LeasedJob, owner: str, error: str) -> bool:
+        """当前步骤失败：退避后重试，或进入死信；返回是否已进入死信。"""
+        now = datetime.utcnow()
+        attempts = job.attempts + 1
+        dead = attempts >= self.max_attempts
+        values = {
+            "attempts": attempts,
+            "last_error": error[:ERROR_MAX_CHARS],
+            "lease_owner": None,
+            "lease_until": None,
+            "updated_at": now,
+        }
+        if dead:
+            values["status"] = "dead"
+        else:
+            values["status"] = "pending"
+            values["available_at"] = now + self.backoff(attempts)
+        with Session(engine) as session:
+            result = session.exec(self._owned(job, owner).values(**values))
+            if dead and result.rowcount:
+                self._mark_failed(session, [job.article_id])
+            session.commit()
+        if dead:
+            logger.warning("补全任务 %s (%s) 重试 %s 次仍失败，进入死信: %s", job.id, job.kind, attempts, error)
+        return dead
+
+    def requeue_dead(self) -> int:
+        """把死信任务放回队列（例如 LLM 服务恢复后），从失败的步骤继续。"""
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            rows = session.exec(
+                update(EnrichJob)
+                .where(EnrichJob.status == "dead")
+                .values(status="pending", attempts=0, available_at=now, updated_at=now)
+                .returning(EnrichJob.article_id)
+            ).all()
+            article_ids = [row[0] for row in rows]
+            if article_ids:
+                session.exec(
+                    update(ArticleEnriched)
+                    .where(ArticleEnriched.article_id.in_(article_ids))
+                    .values(enrich_status="pending")
+                )
+            session.commit()
+        return len(article_ids)
+
+    def purge_finished(self) -> int:
+        cutoff = datetime.utcnow() - DONE_RETENTION
+        with Session(engine) as session:
+            result = session.exec(delete(EnrichJob).where(EnrichJob.status == "done", EnrichJob.updated_at < cutoff))
+            session.commit()
+            return result.rowcount or 0
+
+    def stats(self) -> dict:
+        with Session(engine) as session:
+            rows = session.exec(
+                select(EnrichJob.status, EnrichJob.kind, func.count()).group_by(EnrichJob.status, EnrichJob.kind)
+            ).all()
+            oldest = session.exec(
+                select(func.min(EnrichJob.created_at)).where(EnrichJob.status.in_(["pending", "leased"]))
+            ).one()
+        by_status: dict[str, int] = {}
+        by_kind: dict[str, int] = {}
+        for status, kind, count in rows:
+            by_status[status] = by_status.get(status, 0) + count
+            if status in ("pending", "leased"):
+                by_kind[kind] = by_kind.get(kind, 0) + count
+        return {
+            "by_status": by_status,
+            "backlog_by_kind": by_kind,
+            "oldest_pending_seconds": round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else 0.0,
+            "max_attempts": self.max_attempts,
+        }
+
+
+enrich_queue = EnrichQueue(
+    lease_seconds=settings.enrich.lease_seconds,
+    max_attempts=settings.enrich.max_attempts,
+    retry_base_seconds=settings.enrich.retry_base_seconds,
+    retry_max_seconds=settings.enrich.retry_max_seconds,
+)
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import logging
+from typing import Optional, Union
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:  # pragma: no cover - lxml 缺失时只用 html.parser
+    etree = None
+    lxml_html = None
+
+# 本模块会在解析子进程中导入，保持只依赖 bs4 / lxml，不要引入应用配置或网络相关模块
+
+logger = logging.getLogger(__name__)
+
+PRUNE_TAGS = ("script", "style", "nav", "footer", "header", "aside", "iframe", "noscript")
+
+# Common class names for content
+# This is a heuristic and may need tuning for specific sites
+CONTENT_CLASSES = (
+    "article-body", "story-body", "content-body", "article-content",
+    "post-content", "entry-content", "main-content",
+)
+
+# Filter out short snippets like "Advertisement" or "Read more"
+MIN_PARAGRAPH_CHARS = 50
+MIN_PARAGRAPHS = 3
+
+
+def clean_text(text: str) -> str:
+    """Helper to clean whitespace."""
+    if not text:
+        return ""
+    # Replace multiple newlines with single
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    return "\n\n".join(lines)
+
+
+def _join_paragraphs(texts) -> str:
+    valid_paras = [txt for txt in (t.strip() for t in texts) if len(txt) > MIN_PARAGRAPH_CHARS]
+    if len(valid_paras) > MIN_PARAGRAPHS:  # If we found enough paragraphs, assume it's the article
+        return clean_text("\n\n".join(valid_paras))
+    return ""
+
+
+def extract_main_text_bs4(html: Union[str, bytes], encoding: Optional[str] = None) -> str:
+    """
+    Extracts the main article text from an HTML document using BeautifulSoup.
+    Accepts raw bytes (charset is taken from `encoding` or sniffed from the document).
+    Returns the cleaned text content or empty string if nothing article-like was found.
+    """
+    soup = BeautifulSoup(html, "html.parser", from_encoding=encoding if isinstance(html, bytes) else None)
+
+    # Remove unwanted elements
+    for tag in soup(list(PRUNE_TAGS)):
+        tag.decompose()
+
+    # Strategy 1: Look for semantic <article> tag
+    article = soup.find("article")
+    if article:
+        text = article.get_text(separator="\n")
+        return clean_text(text)
+
+    # Strategy 2: Look for common class names for content
+    for cls in CONTENT_CLASSES:
+        div = soup.find("div", class_=cls)
+        if div:
+            text = div.get_text(separator="\n")
+            return clean_text(text)
+
+    # Strategy 3: Fallback - find all <p> tags and join them if they look like paragraphs
+    return _join_paragraphs(p.get_text() for p in soup.find_all("p"))
+
+
+def _lxml_text(node) -> str:
+    return "\n".join(node.itertext())
+
+
+def extract_main_text_lxml(data: bytes, encoding: Optional[str] = None) -> str:
+    """
+    Same strategies as extract_main_text_bs4, but parsed by libxml2 straight from bytes
+    (no decode / re-encode round trip). Comments and processing instructions are dropped
+    by the parser; noise tags (PRUNE_TAGS) are still built and then stripped in one C pass.
+    """
+    parser = lxml_html.HTMLParser(encoding=encoding, remove_comments=True, remove_pis=True)
+    root = lxml_html.document_fromstring(data, parser=parser)
+    # 噪声标签在建树之后剔除，不是解析时跳过：libxml2 没有按标签跳过子树的选项，
+    # 用 Python 的 parser target 过滤事件实测比建树后 strip_elements 慢 3 倍以上
+    etree.strip_elements(root, *PRUNE_TAGS, with_tail=False)
+
+    article = next(root.iter("article"), None)
+    if article is not None:
+        return clean_text(_lxml_text(article))
+
+    for cls in CONTENT_CLASSES:
+        found = root.xpath(
+            "//div[contains(concat(' ', normalize-space(@class), ' '), $cls)]", cls=f" {cls} "
+        )
+        if found:
+            return clean_text(_lxml_text(found[0]))
+
+    return _join_paragraphs(p.text_content() for p in root.iter("p"))
+
+
+def extract_main_text(html: Union[str, bytes], encoding: Optional[str] = None) -> str:
+    """Uses the lxml fast path for raw bytes and falls back to html.parser when lxml is unavailable or fails."""
+    if lxml_html is not None and isinstance(html, bytes) and html.strip():
+        try:
+            return extract_main_text_lxml(html, encoding)
+        except (etree.ParserError, ValueError, LookupError) as exc:
+            logger.debug("lxml 解析失败，回退到 html.parser: %s", exc)
+    return extract_main_text_bs4(html, encoding)
+
+
+def serve_parser(conn) -> None:
+    """解析子进程：就绪后逐篇接收 (data, encoding)，回送 (是否成功, 正文或异常)。"""
+    conn.send(True)
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        try:
+            reply = (True, extract_main_text(*request))
+        except Exception as exc:
+            reply = (False, exc)
+        try:
+            conn.send(reply)
+        except Exception:
+            # 异常对象无法序列化时只回传描述
+            conn.send((False, RuntimeError(repr(reply[1]))))
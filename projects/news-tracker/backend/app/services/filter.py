@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from typing import Iterable, Optional
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Iterable, Mapping, Optional
 
 FINANCE_KEYWORDS = {
     "美联储": 0.3,
@@ -33,23 +36,124 @@ NEGATIVE_KEYWORDS = {
 }
 
 
+TOPIC_KEYWORD_WEIGHT = 0.3
+
+# 命中的模式所属的表：finance / negative 带权重，topic 带主题 ID
+_FINANCE, _NEGATIVE, _TOPIC = 0, 1, 2
+
+
+@dataclass
+class KeywordMatch:
+    finance: float = 0.0
+    negative: float = 0.0
+    # 主题 ID -> 命中的关键词个数
+    topic_hits: dict[int, int] = field(default_factory=dict)
+
+    def score(self, topic_ids: Iterable[int] = ()) -> float:
+        """规则分数：金融关键词加分，所属主题的每个命中关键词加 0.3，负面关键词减分，截断到 [0, 1]。"""
+        score = self.finance + TOPIC_KEYWORD_WEIGHT * sum(self.topic_hits.get(tid, 0) for tid in topic_ids)
+        return max(0.0, min(1.0, score - self.negative))
+
+
+class KeywordMatcher:
+    """
+    金融 / 负面权重表与全部主题关键词编译成一个 Aho-Corasick 自动机（不区分大小写），
+    对标题 + 摘要只扫描一遍，同时得到金融分、负面分和命中的主题。
+
+    每个关键词按“是否出现”计一次，与原来逐个 in 判断的语义一致。
+    """
+
+    def __init__(self, topic_keywords: Optional[Mapping[int, Iterable[str]]] = None):
+        self.topic_keywords = {tid: [kw for kw in kws if kw] for tid, kws in (topic_keywords or {}).items()}
+        payloads: dict[str, list[tuple[int, object]]] = {}
+        for keyword, weight in FINANCE_KEYWORDS.items():
+            payloads.setdefault(keyword.lower(), []).append((_FINANCE, weight))
+        for keyword, weight in NEGATIVE_KEYWORDS.items():
+            payloads.setdefault(keyword.lower(), []).append((_NEGATIVE, weight))
+        for topic_id, keywords in self.topic_keywords.items():
+            for keyword in keywords:
+                payloads.setdefault(keyword.lower(), []).append((_TOPIC, topic_id))
+        self.patterns = list(payloads)
+        self.payloads = [payloads[p] for p in self.patterns]
+        self._build()
+
+    def _build(self) -> None:
+        goto: list[dict[str, int]] = [{}]
+        outputs: list[list[int]] = [[]]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    outputs.append([])
+                state = nxt
+            outputs[state].append(index)
+
+        # BFS 计算失败指针，并把失败转移预先展开成完整的转移表（DFA），扫描时每个字符只查一次 dict
+        fail = [0] * len(goto)
+        delta = [dict(edges) for edges in goto]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                outputs[nxt] = outputs[nxt] + outputs[fail[nxt]]
+                queue.append(nxt)
+        self._delta = delta
+        self._outputs = outputs
+
+    def find(self, text: str) -> set[int]:
+        """返回文本中出现的模式下标。"""
+        delta, outputs = self._delta, self._outputs
+        found: set[int] = set()
+        state = 0
+        for ch in text.lower():
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+    def scan(self, title: str, summary: Optional[str] = None) -> KeywordMatch:
+        match = KeywordMatch()
+        for index in self.find(f"{title} {summary or ''}"):
+            for kind, value in self.payloads[index]:
+                if kind == _FINANCE:
+                    match.finance += value
+                elif kind == _NEGATIVE:
+                    match.negative += value
+                else:
+                    match.topic_hits[value] = match.topic_hits.get(value, 0) + 1
+        return match
+
+    def has_keywords(self, topic_id: int) -> bool:
+        return bool(self.topic_keywords.get(topic_id))
+
+
+_matchers: dict[tuple, KeywordMatcher] = {}
+_matchers_lock = threading.Lock()
+MATCHER_CACHE_SIZE = 8
+
+
+def matcher_for(topic_keywords: Mapping[int, Iterable[str]]) -> KeywordMatcher:
+    """按主题关键词缓存编译好的自动机，主题或关键词变化时才重建。"""
+    key = tuple(sorted((tid, tuple(kws)) for tid, kws in topic_keywords.items()))
+    with _matchers_lock:
+        matcher = _matchers.get(key)
+        if matcher is None:
+            if len(_matchers) >= MATCHER_CACHE_SIZE:
+                _matchers.pop(next(iter(_matchers)))
+            matcher = _matchers[key] = KeywordMatcher(dict(key))
+        return matcher
+
+
 def rule_score(title: str, summary: Optional[str], extra_keywords: Optional[Iterable[str]] = None) -> float:
-    text = f"{title} {summary or ''}"
-    text_lower = text.lower()
-    score = 0.0
-    for keyword, weight in FINANCE_KEYWORDS.items():
-        if keyword in text or keyword.lower() in text_lower:
-            score += weight
-    if extra_keywords:
-        for kw in extra_keywords:
-            if kw and (kw in text or kw.lower() in text_lower):
-                score += 0.3
-
-    for keyword, weight in NEGATIVE_KEYWORDS.items():
-        if keyword in text or keyword.lower() in text_lower:
-            score -= weight
-
-    return max(0.0, min(1.0, score))
+    """单条打分的兼容入口；extra_keywords 视作一个临时主题的关键词。"""
+    keywords = tuple(kw for kw in extra_keywords or () if kw)
+    return matcher_for({0: keywords}).scan(title, summary).score([0])
 
 
 def should_use_llm(score: float) -> bool:
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from ..config import settings
+from ..database import engine
+from ..models import LeaderLease
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[], Awaitable[None]]
+
+
+class LeaderElection:
+    """
+    基于租约的选主（SQLite 表 leaderlease，每个 name 一行）。
+
+    同一数据库上的多个进程（uvicorn --workers、独立 worker）竞争同一行：
+    租约过期或本来就归自己时才能写入 owner，条件更新保证同一时刻只有一个持有者。
+    持有者每 renew_seconds 续约一次；进程崩溃后租约在 lease_seconds 内过期，
+    由下一个来续约的进程接管。正常退出时主动释放，其它进程下一轮即可接管。
+    续约失败（数据库繁忙等）时在本地记录的租约到期前仍视为持有，到期后主动让出。
+    on_elected 成功返回后才算成为主节点；它抛出异常时先调用 on_lost 撤销已做的部分，
+    再释放租约，下一轮重新竞选（本进程或其它进程）时再试。
+    """
+
+    def __init__(self, name: str, lease_seconds: int, renew_seconds: int):
+        self.name = name
+        self.lease_duration = timedelta(seconds=lease_seconds)
+        self.renew_seconds = max(1, min(renew_seconds, lease_seconds // 2 or 1))
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.is_leader = False
+        self._lease_until: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._on_elected: Optional[Callback] = None
+        self._on_renewed: Optional[Callback] = None
+        self._on_lost: Optional[Callback] = None
+
+    def try_acquire(self) -> bool:
+        """取得或续约租约；返回本进程现在是否持有。"""
+        now = datetime.utcnow()
+        until = now + self.lease_duration
+        with Session(engine) as session:
+            result = session.exec(
+                update(LeaderLease)
+                .where(
+                    LeaderLease.name == self.name,
+                    or_(LeaderLease.owner == self.owner, LeaderLease.lease_until < now),
+                )
+                .values(
+                    owner=self.owner,
+                    lease_until=until,
+                    renewed_at=now,
+                    acquired_at=LeaderLease.acquired_at if self.is_leader else now,
+                )
+            )
+            session.commit()
+            if result.rowcount:
+                self._lease_until = until
+                return True
+            if session.get(LeaderLease, self.name) is not None:
+                return False
+            session.add(LeaderLease(name=self.name, owner=self.owner, lease_until=until, acquired_at=now, renewed_at=now))
+            try:
+                session.commit()
+            except IntegrityError:
+                # 另一个进程同时插入了这一行
+                return False
+        self._lease_until = until
+        return True
+
+    def release(self) -> None:
+        if not self.is_leader:
+            return
+        self.is_leader = False
+        self._release_lease()
+
+    def _release_lease(self) -> None:
+        self._lease_until = None
+        try:
+            with Session(engine) as session:
+                session.exec(
+                    update(LeaderLease)
+                    .where(LeaderLease.name == self.name, LeaderLease.owner == self.owner)
+                    .values(owner=None, lease_until=datetime.utcnow())
+                )
+                session.commit()
+            logger.info("已释放 %s 租约: %s", self.name, self.owner)
+        except Exception as exc:
+            logger.warning("释放 %s 租约失败（将自然过期）: %s", self.name, exc)
+
+    def holder(self) -> Optional[dict]:
+        with Session(engine) as session:
+            lease = session.get(LeaderLease, self.name)
+            if lease is None:
+                return None
+            return {
+                "name": lease.name,
+                "owner": lease.owner,
+                "lease_until": lease.lease_until,
+                "acquired_at": lease.acquired_at,
+                "renewed_at": lease.renewed_at,
+                "expired": lease.lease_until < datetime.utcnow(),
+                "is_self": lease.owner == self.owner,
+            }
+
+    async def _step(self) -> None:
+        try:
+            held = await asyncio.to_thread(self.try_acquire)
+        except Exception as exc:
+            logger.warning("%s 租约续约失败: %s", self.name, exc)
+            held = self.is_leader and self._lease_until is not None and datetime.utcnow() < self._lease_until
+        if held and not self.is_leader:
+            logger.info("取得 %s 租约，本进程成为主节点: %s", self.name, self.owner)
+            if self._on_elected:
+                try:
+                    await self._on_elected()
+                except Exception:
+                    logger.exception("%s 主节点初始化失败，让出租约: %s", self.name, self.owner)
+                    await self._abdicate()
+                    return
+            self.is_leader = True
+        elif held:
+            if self._on_renewed:
+                await self._on_renewed()
+        elif self.is_leader:
+            self.is_leader = False
+            logger.warning("失去 %s 租约，本进程停止主节点工作: %s", self.name, self.owner)
+            if self._on_lost:
+                await self._on_lost()
+
+    async def _abdicate(self) -> None:
+        try:
+            if self._on_lost:
+                await self._on_lost()
+        finally:
+            await asyncio.to_thread(self._release_lease)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self._step()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("%s 选主回调出错", self.name)
+            await asyncio.sleep(self.renew_seconds)
+
+    def start(
+        self,
+        on_elected: Optional[Callback] = None,
+        on_renewed: Optional[Callback] = None,
+        on_lost: Optional[Callback] = None,
+    ) -> None:
+        """在当前事件循环里启动竞选 / 续约循环（需在运行中的事件循环内调用）。"""
+        if self._task is not None:
+            return
+        self._on_elected = on_elected
+        self._on_renewed = on_renewed
+        self._on_lost = on_lost
+        self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.release()
+
+
+scheduler_leader = LeaderElection(
+    "scheduler",
+    lease_seconds=settings.scheduler.lease_seconds,
+    renew_seconds=settings.scheduler.renew_seconds,
+)
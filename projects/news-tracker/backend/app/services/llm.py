@@ -1,22 +1,291 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-from typing import Any, Dict, Optional
+import random
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
 from urllib.parse import urljoin
 
 import httpx
 
 from ..config import settings
+from .llm_cache import Completion, cache_key, llm_cache
+from .ratelimit import TokenBucket
+from .summarize import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
+TRANSLATE_INPUT_CHARS = 10000
+# 单条输出的估算 token 上限：200 字中文摘要约 300 token
+TRANSLATE_OUTPUT_TOKENS = 320
+CLASSIFY_OUTPUT_TOKENS = 40
+ENRICH_OUTPUT_TOKENS = 420
+ENRICH_LABELS = {"relevant", "irrelevant"}
+BATCH_MAX_OUTPUT_TOKENS = 8000
+# 429 / 5xx 与连接类错误可以重试，其余 4xx 直接失败
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 30.0
+
+Request = Tuple[list[dict[str, str]], float, int]
+
+
+def split_batches(costs: Sequence[int], budget: int, max_items: int) -> list[list[int]]:
+    """按估算 token 预算和条目上限把下标切分成若干批；单条超预算时独占一批。"""
+    batches: list[list[int]] = []
+    current: list[int] = []
+    used = 0
+    for index, cost in enumerate(costs):
+        if current and (used + cost > budget or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], 0
+        current.append(index)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _retry_after(resp: Optional[httpx.Response]) -> Optional[float]:
+    """解析 Retry-After（秒数或 HTTP 日期）。"""
+    value = resp.headers.get("Retry-After") if resp is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+# --- 提示词 --------------------------------------------------------------
+
+
+def _translate_request(text: str) -> Request:
+    prompt = (
+        "请阅读以下新闻（可能包含正文），为其生成一段**简体中文摘要**。"
+        "要求：\n"
+        "1. 涵盖核心事实和数据。\n"
+        "2. 长度控制在 200 字以内。\n"
+        "3. 如果输入很短，直接翻译。\n"
+        "仅输出中文摘要内容，不要额外说明。\n\n"
+        f"{text[:TRANSLATE_INPUT_CHARS]}" # Truncate to avoid context window issues
+    )
+    messages = [
+        {"role": "system", "content": "你是新闻摘要助手。"},
+        {"role": "user", "content": prompt},
+    ]
+    return messages, 0.1, 600
+
+
+def _classify_request(title: str, summary: Optional[str]) -> Request:
+    prompt = (
+        "请判断这条新闻与金融市场的相关性，输出 JSON："
+        "{\"finance_score\": 0-1, \"relevance_label\": \"relevant|irrelevant\", \"reason\": \"...\"}."
+        "仅输出 JSON。\n\n"
+        f"标题: {title}\n摘要: {summary or ''}"
+    )
+    messages = [
+        {"role": "system", "content": "你是金融新闻分类助手。"},
+        {"role": "user", "content": prompt},
+    ]
+    return messages, 0.0, 300
+
+
+def _parse_classify(content: str) -> Dict[str, Any]:
+    try:
+        data = json.loads(_extract_json(content))
+        return {
+            "finance_score": float(data.get("finance_score", 0.5)),
+            "relevance_label": str(data.get("relevance_label", "unknown")),
+        }
+    except Exception as exc:  # pragma: no cover - LLM 输出异常
+        logger.warning("LLM 分类解析失败: %s", exc)
+        return {"finance_score": 0.5, "relevance_label": "unknown"}
+
+
+def _analyze_request(titles: list[str]) -> Request:
+    joined = "\n".join([f"- {title}" for title in titles])
+    prompt = (
+        "请分析以下新闻标题对经济和金融市场的意义，按标题逐条输出简短要点。"
+        "使用简体中文。\n\n"
+        f"{joined}"
+    )
+    messages = [
+        {"role": "system", "content": "你是金融分析助手。"},
+        {"role": "user", "content": prompt},
+    ]
+    return messages, 0.3, 800
+
+
+ANALYSIS_CHUNK_OUTPUT_TOKENS = 700
+ANALYSIS_REDUCE_OUTPUT_TOKENS = 1200
+
+
+def _analyze_chunk_request(items: list[str]) -> Request:
+    joined = "\n".join(f"- {item}" for item in items)
+    prompt = (
+        "以下是一组已整理的新闻（日期、标题与摘要）。请归纳其中的主要事件和共同主题，"
+        "分析对经济和金融市场（利率、汇率、大宗商品、股市）的影响，输出要点列表。"
+        "使用简体中文。\n\n"
+        f"{joined}"
+    )
+    messages = [
+        {"role": "system", "content": "你是金融分析助手。"},
+        {"role": "user", "content": prompt},
+    ]
+    return messages, 0.3, ANALYSIS_CHUNK_OUTPUT_TOKENS
+
+
+def _reduce_request(partials: list[str]) -> Request:
+    joined = "\n\n".join(f"【第 {n} 部分】\n{text}" for n, text in enumerate(partials, 1))
+    prompt = (
+        "以下是对同一批新闻分块得到的分析要点。请合并为一份完整的分析："
+        "去掉重复内容，按主题归纳主要事件、市场影响和需要关注的风险。使用简体中文。\n\n"
+        f"{joined}"
+    )
+    messages = [
+        {"role": "system", "content": "你是金融分析助手。"},
+        {"role": "user", "content": prompt},
+    ]
+    return messages, 0.3, ANALYSIS_REDUCE_OUTPUT_TOKENS
+
+
+ENRICH_FIELDS = (
+    "\"finance_score\": 0-1 的数字, \"relevance_label\": \"relevant|irrelevant\", "
+    "\"title_zh\": \"标题的简体中文翻译\", "
+    "\"summary_zh\": \"简体中文摘要，涵盖核心事实和数据，200 字以内；没有内容时为空字符串\""
+)
+
+
+def _enrich_request(title: str, summary: Optional[str]) -> Request:
+    prompt = (
+        "请阅读以下新闻（可能包含正文），判断它与金融市场的相关性，并给出中文标题和摘要。"
+        f"输出 JSON：{{{ENRICH_FIELDS}}}。仅输出 JSON。\n\n"
+        f"标题: {title}\n内容: {(summary or '')[:TRANSLATE_INPUT_CHARS]}"
+    )
+    messages = [
+        {"role": "system", "content": "你是金融新闻分类与摘要助手。"},
+        {"role": "user", "content": prompt},
+    ]
+    return messages, 0.0, ENRICH_OUTPUT_TOKENS + 200
+
+
+def _validate_enrichment(data: Any, has_summary: bool) -> Optional[Dict[str, Any]]:
+    """校验单条补全结果的字段与取值；不合格时返回 None，由调用方走逐项请求。"""
+    if not isinstance(data, dict):
+        return None
+    try:
+        score = float(data["finance_score"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    label = data.get("relevance_label")
+    title_zh = data.get("title_zh")
+    summary_zh = data.get("summary_zh")
+    if not 0.0 <= score <= 1.0 or label not in ENRICH_LABELS:
+        return None
+    if not isinstance(title_zh, str) or not title_zh.strip():
+        return None
+    if summary_zh is not None and not isinstance(summary_zh, str):
+        return None
+    if has_summary and not (summary_zh or "").strip():
+        return None
+    return {
+        "finance_score": score,
+        "relevance_label": label,
+        "title_zh": title_zh.strip(),
+        "summary_zh": summary_zh.strip() if has_summary else None,
+    }
+
+
+def _parse_enrichment(content: str, has_summary: bool) -> Optional[Dict[str, Any]]:
+    try:
+        data = json.loads(_extract_json(content))
+    except ValueError:
+        return None
+    return _validate_enrichment(data, has_summary)
+
+
+ENRICH_BATCH_INSTRUCTION = (
+    "下面是一组新闻（可能包含正文），请逐条判断与金融市场的相关性，并给出中文标题和摘要。"
+    f"仅输出 JSON 数组，每个元素形如 {{\"id\": 输入的 id, {ENRICH_FIELDS}}}，不要额外说明。"
+)
+TRANSLATE_BATCH_INSTRUCTION = (
+    "下面是一组新闻标题或新闻内容（可能包含正文），请逐条处理：\n"
+    "1. 较短的输入（如标题）直接翻译为简体中文。\n"
+    "2. 较长的输入生成简体中文摘要，涵盖核心事实和数据，长度控制在 200 字以内。\n"
+    "仅输出 JSON 数组，每个元素形如 {\"id\": 输入的 id, \"zh\": \"中文结果\"}，不要额外说明。"
+)
+CLASSIFY_BATCH_INSTRUCTION = (
+    "请逐条判断下面的新闻与金融市场的相关性。"
+    "仅输出 JSON 数组，每个元素形如 "
+    "{\"id\": 输入的 id, \"finance_score\": 0-1, \"relevance_label\": \"relevant|irrelevant\"}，"
+    "不要额外说明。"
+)
+
+
+def _batch_request(system: str, instruction: str, items: list[dict], max_tokens: int) -> Request:
+    prompt = f"{instruction}\n\n输入：\n{json.dumps(items, ensure_ascii=False)}"
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": prompt},
+    ]
+    return messages, 0.0, min(BATCH_MAX_OUTPUT_TOKENS, max_tokens)
+
+
+def _parse_batch(content: str) -> dict[int, dict]:
+    """批量结果 id -> 结果对象；解析失败时返回空 dict（调用方逐条重试）。"""
+    try:
+        data = json.loads(_extract_json_array(content))
+    except ValueError as exc:
+        logger.warning("LLM 批量结果解析失败，改为逐条请求: %s", exc)
+        return {}
+    results: dict[int, dict] = {}
+    for entry in data if isinstance(data, list) else []:
+        if isinstance(entry, dict) and isinstance(entry.get("id"), int):
+            results[entry["id"]] = entry
+    return results
+
 
 class LLMClient:
+    """
+    DeepSeek chat 客户端，同步（chat）与异步（achat）两套入口共用：
+
+    - 响应缓存与进行中请求合并（llm_cache）；
+    - 每分钟请求数 / token 数两个令牌桶（LLM_RPM / LLM_TPM）；
+    - 全局并发上限（LLM_MAX_CONCURRENCY），连接池复用 httpx 客户端；
+    - 429 / 5xx / 连接错误按带抖动的指数退避重试，遵守 Retry-After，
+      所有重试都在单次调用的期限（deadline）之内完成。
+    """
+
     def __init__(self):
         self.base_url = settings.deepseek.base_url
         self.api_key = settings.deepseek.api_key
         self.model = settings.deepseek.model
+        cfg = settings.llm
+        self.requests_bucket = TokenBucket(cfg.requests_per_minute)
+        self.tokens_bucket = TokenBucket(cfg.tokens_per_minute)
+        self._thread_sem = threading.BoundedSemaphore(cfg.max_concurrency)
+        self._client: Optional[httpx.Client] = None
+        self._client_lock = threading.Lock()
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._async_sems: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
 
     @property
     def enabled(self) -> bool:
@@ -29,9 +298,39 @@ class LLMClient:
             return f"{self.base_url}/chat/completions"
         return urljoin(self.base_url.rstrip("/") + "/", "v1/chat/completions")
 
-    def chat(self, messages: list[dict[str, str]], temperature: float = 0.2, max_tokens: int = 800) -> str:
-        if not self.enabled:
-            raise RuntimeError("DeepSeek API 未配置")
+    # --- 连接与限流 -----------------------------------------------------
+
+    def _limits(self) -> httpx.Limits:
+        size = settings.llm.max_concurrency
+        return httpx.Limits(max_connections=size, max_keepalive_connections=size)
+
+    def _http(self) -> httpx.Client:
+        with self._client_lock:
+            if self._client is None:
+                self._client = httpx.Client(timeout=settings.llm.timeout, limits=self._limits())
+            return self._client
+
+    def _ahttp(self) -> tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(timeout=settings.llm.timeout, limits=self._limits())
+            self._async_clients[loop] = client
+            self._async_sems[loop] = asyncio.Semaphore(settings.llm.max_concurrency)
+        return client, self._async_sems[loop]
+
+    def close(self) -> None:
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self) -> None:
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def _prepare(self, messages: list[dict[str, str]], temperature: float, max_tokens: int) -> tuple[dict, dict, int]:
         payload = {
             "model": self.model,
             "messages": messages,
@@ -39,87 +338,383 @@ class LLMClient:
             "max_tokens": max_tokens,
         }
         headers = {"Authorization": f"Bearer {self.api_key}"}
-        endpoint = self._endpoint()
-        with httpx.Client(timeout=30) as client:
-            resp = client.post(endpoint, json=payload, headers=headers)
-            resp.raise_for_status()
-            data = resp.json()
-        try:
-            return data["choices"][0]["message"]["content"]
-        except (KeyError, IndexError) as exc:
-            raise RuntimeError(f"DeepSeek 响应解析失败: {data}") from exc
+        cost = sum(estimate_tokens(m.get("content", "")) for m in messages) + max_tokens
+        return payload, headers, cost
+
+    def _next_delay(
+        self,
+        attempt: int,
+        deadline_at: float,
+        resp: Optional[httpx.Response] = None,
+        exc: Optional[Exception] = None,
+    ) -> float:
+        """决定下一次重试前的等待时间；不可重试或超出期限时抛出异常。"""
+        reason = f"HTTP {resp.status_code}" if resp is not None else f"{type(exc).__name__}: {exc}"
+        if attempt >= settings.llm.max_retries:
+            raise RuntimeError(f"DeepSeek 请求失败（已重试 {attempt} 次）: {reason}") from exc
+        delay = _retry_after(resp)
+        if delay is None:
+            delay = random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2**attempt))
+        if time.monotonic() + delay >= deadline_at:
+            raise TimeoutError(f"DeepSeek 请求超出期限: {reason}")
+        logger.info("DeepSeek 请求失败（%s），%.1fs 后第 %s 次重试", reason, delay, attempt + 1)
+        return delay
+
+    @staticmethod
+    def _remaining(deadline_at: float) -> float:
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("DeepSeek 请求超出期限（限流等待）")
+        return min(settings.llm.timeout, remaining)
+
+    def _complete(
+        self, messages: list[dict[str, str]], temperature: float, max_tokens: int, deadline: Optional[float] = None
+    ) -> Completion:
+        payload, headers, cost = self._prepare(messages, temperature, max_tokens)
+        deadline_at = time.monotonic() + (deadline or settings.llm.deadline)
+        attempt = 0
+        while True:
+            self.requests_bucket.acquire(1)
+            self.tokens_bucket.acquire(cost)
+            timeout = self._remaining(deadline_at)
+            try:
+                with self._thread_sem:
+                    resp = self._http().post(self._endpoint(), json=payload, headers=headers, timeout=timeout)
+            except httpx.TransportError as exc:
+                delay = self._next_delay(attempt, deadline_at, exc=exc)
+            else:
+                if resp.status_code not in RETRY_STATUS:
+                    resp.raise_for_status()
+                    return _parse_completion(resp.json())
+                delay = self._next_delay(attempt, deadline_at, resp=resp)
+            time.sleep(delay)
+            attempt += 1
+
+    async def _acomplete(
+        self, messages: list[dict[str, str]], temperature: float, max_tokens: int, deadline: Optional[float] = None
+    ) -> Completion:
+        payload, headers, cost = self._prepare(messages, temperature, max_tokens)
+        deadline_at = time.monotonic() + (deadline or settings.llm.deadline)
+        client, sem = self._ahttp()
+        attempt = 0
+        while True:
+            await self.requests_bucket.acquire_async(1)
+            await self.tokens_bucket.acquire_async(cost)
+            async with sem:
+                timeout = self._remaining(deadline_at)
+                try:
+                    resp = await client.post(self._endpoint(), json=payload, headers=headers, timeout=timeout)
+                except httpx.TransportError as exc:
+                    resp, error = None, exc
+                else:
+                    error = None
+            if resp is not None and resp.status_code not in RETRY_STATUS:
+                resp.raise_for_status()
+                return _parse_completion(resp.json())
+            await asyncio.sleep(self._next_delay(attempt, deadline_at, resp=resp, exc=error))
+            attempt += 1
+
+    # --- chat -----------------------------------------------------------
+
+    def chat(
+        self,
+        messages: list[dict[str, str]],
+        temperature: float = 0.2,
+        max_tokens: int = 800,
+        use_cache: bool = True,
+        deadline: Optional[float] = None,
+    ) -> str:
+        if not self.enabled:
+            raise RuntimeError("DeepSeek API 未配置")
+
+        def call() -> Completion:
+            return self._complete(messages, temperature, max_tokens, deadline)
+
+        if not use_cache:
+            return call().content
+        key = cache_key(self.model, messages, temperature=temperature, max_tokens=max_tokens)
+        return llm_cache.get_or_call(key, self.model, call).content
+
+    async def achat(
+        self,
+        messages: list[dict[str, str]],
+        temperature: float = 0.2,
+        max_tokens: int = 800,
+        use_cache: bool = True,
+        deadline: Optional[float] = None,
+    ) -> str:
+        if not self.enabled:
+            raise RuntimeError("DeepSeek API 未配置")
+
+        def call():
+            return self._acomplete(messages, temperature, max_tokens, deadline)
+
+        if not use_cache:
+            return (await call()).content
+        key = cache_key(self.model, messages, temperature=temperature, max_tokens=max_tokens)
+        return (await llm_cache.aget_or_call(key, self.model, call)).content
+
+    async def astream_chat(
+        self,
+        messages: list[dict[str, str]],
+        temperature: float = 0.2,
+        max_tokens: int = 800,
+        use_cache: bool = True,
+    ) -> AsyncIterator[str]:
+        """
+        流式对话（stream=true），逐段产出增量文本。
+
+        限流、并发和重试规则与 achat 相同，但只在收到第一段增量之前重试；
+        期限（LLM_DEADLINE）只约束首包，之后每次读取受 LLM_TIMEOUT 约束。
+        完整结果写入与 chat() 相同的缓存键，命中缓存时一次性产出。
+        调用方提前停止迭代（客户端断开）时上游连接随之关闭。
+        """
+        if not self.enabled:
+            raise RuntimeError("DeepSeek API 未配置")
+        key = cache_key(self.model, messages, temperature=temperature, max_tokens=max_tokens)
+        if use_cache:
+            cached = await asyncio.to_thread(llm_cache.lookup, key)
+            if cached is not None:
+                yield cached.content
+                return
+        payload, headers, cost = self._prepare(messages, temperature, max_tokens)
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+        deadline_at = time.monotonic() + settings.llm.deadline
+        client, sem = self._ahttp()
+        parts: list[str] = []
+        usage: dict = {}
+        attempt = 0
+        while True:
+            await self.requests_bucket.acquire_async(1)
+            await self.tokens_bucket.acquire_async(cost)
+            resp = error = None
+            async with sem:
+                timeout = self._remaining(deadline_at)
+                try:
+                    async with client.stream(
+                        "POST", self._endpoint(), json=payload, headers=headers, timeout=timeout
+                    ) as resp:
+                        if resp.status_code not in RETRY_STATUS:
+                            resp.raise_for_status()
+                            async for delta, chunk_usage in _iter_stream(resp):
+                                usage = chunk_usage or usage
+                                if delta:
+                                    parts.append(delta)
+                                    yield delta
+                            break
+                except httpx.TransportError as exc:
+                    if parts:
+                        raise
+                    resp, error = None, exc
+            await asyncio.sleep(self._next_delay(attempt, deadline_at, resp=resp, exc=error))
+            attempt += 1
+        if use_cache:
+            completion = Completion(
+                content="".join(parts),
+                prompt_tokens=int(usage.get("prompt_tokens") or 0),
+                completion_tokens=int(usage.get("completion_tokens") or 0),
+            )
+            await asyncio.to_thread(llm_cache.store, key, self.model, completion)
+
+    # --- 业务方法 -------------------------------------------------------
 
     def translate_to_zh(self, text: str) -> str:
         if not text:
             return text
         if not self.enabled:
             return text
-        prompt = (
-            "请阅读以下新闻（可能包含正文），为其生成一段**简体中文摘要**。"
-            "要求：\n"
-            "1. 涵盖核心事实和数据。\n"
-            "2. 长度控制在 200 字以内。\n"
-            "3. 如果输入很短，直接翻译。\n"
-            "仅输出中文摘要内容，不要额外说明。\n\n"
-            f"{text[:10000]}" # Truncate to avoid context window issues
-        )
-        content = self.chat(
-            [
-                {"role": "system", "content": "你是新闻摘要助手。"},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.1,
-            max_tokens=600,
-        )
-        return content.strip()
+        return self.chat(*_translate_request(text)).strip()
+
+    async def atranslate_to_zh(self, text: str) -> str:
+        if not text or not self.enabled:
+            return text
+        return (await self.achat(*_translate_request(text))).strip()
 
     def classify_finance(self, title: str, summary: Optional[str]) -> Dict[str, Any]:
         if not self.enabled:
             return {"finance_score": 0.5, "relevance_label": "unknown"}
-        prompt = (
-            "请判断这条新闻与金融市场的相关性，输出 JSON："
-            "{\"finance_score\": 0-1, \"relevance_label\": \"relevant|irrelevant\", \"reason\": \"...\"}."
-            "仅输出 JSON。\n\n"
-            f"标题: {title}\n摘要: {summary or ''}"
-        )
-        content = self.chat(
-            [
-                {"role": "system", "content": "你是金融新闻分类助手。"},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.0,
-            max_tokens=300,
-        )
-        try:
-            data = json.loads(_extract_json(content))
-            return {
-                "finance_score": float(data.get("finance_score", 0.5)),
-                "relevance_label": str(data.get("relevance_label", "unknown")),
-            }
-        except Exception as exc:  # pragma: no cover - LLM 输出异常
-            logger.warning("LLM 分类解析失败: %s", exc)
+        return _parse_classify(self.chat(*_classify_request(title, summary)))
+
+    async def aclassify_finance(self, title: str, summary: Optional[str]) -> Dict[str, Any]:
+        if not self.enabled:
             return {"finance_score": 0.5, "relevance_label": "unknown"}
+        return _parse_classify(await self.achat(*_classify_request(title, summary)))
+
+    async def atranslate_batch(self, texts: Sequence[Optional[str]]) -> list[Optional[str]]:
+        """
+        批量版 translate_to_zh：标题与摘要可以混在一起，按 token 预算切批，
+        每批一次请求、返回 JSON 数组；缺失或解析失败的条目逐条重试。
+        各批并发发出，由全局并发上限和令牌桶约束。
+        """
+        results: list[Optional[str]] = list(texts)
+        if not self.enabled:
+            return results
+        pending = [i for i, text in enumerate(texts) if text]
+        costs = [
+            estimate_tokens(texts[i][:TRANSLATE_INPUT_CHARS])
+            + min(TRANSLATE_OUTPUT_TOKENS, estimate_tokens(texts[i]) * 2 + 10)
+            for i in pending
+        ]
+
+        async def run(batch: list[int]) -> None:
+            indexes = [pending[i] for i in batch]
+            items = [{"id": n, "text": texts[i][:TRANSLATE_INPUT_CHARS]} for n, i in enumerate(indexes)]
+            request = _batch_request(
+                "你是新闻翻译与摘要助手。", TRANSLATE_BATCH_INSTRUCTION, items, sum(costs[i] for i in batch)
+            )
+            parsed = _parse_batch(await self.achat(*request))
+            for n, index in enumerate(indexes):
+                value = parsed.get(n, {}).get("zh")
+                if isinstance(value, str) and value.strip():
+                    results[index] = value.strip()
+                else:
+                    results[index] = await self.atranslate_to_zh(texts[index])
+
+        batches = split_batches(costs, settings.llm.batch_tokens, settings.llm.batch_max_items)
+        await asyncio.gather(*(run(batch) for batch in batches))
+        return results
+
+    async def aclassify_batch(self, items: Sequence[Tuple[str, Optional[str]]]) -> list[Dict[str, Any]]:
+        """批量版 classify_finance，输入为 (标题, 摘要) 列表，结果顺序与输入一致。"""
+        results: list[Dict[str, Any]] = [{"finance_score": 0.5, "relevance_label": "unknown"} for _ in items]
+        if not self.enabled:
+            return results
+        texts = [f"{title}\n{summary or ''}"[:2000] for title, summary in items]
+        costs = [estimate_tokens(text) + CLASSIFY_OUTPUT_TOKENS for text in texts]
+
+        async def run(batch: list[int]) -> None:
+            payload = [{"id": n, "text": texts[i]} for n, i in enumerate(batch)]
+            request = _batch_request(
+                "你是金融新闻分类助手。", CLASSIFY_BATCH_INSTRUCTION, payload, CLASSIFY_OUTPUT_TOKENS * len(batch) + 50
+            )
+            parsed = _parse_batch(await self.achat(*request))
+            for n, index in enumerate(batch):
+                entry = parsed.get(n)
+                try:
+                    results[index] = {
+                        "finance_score": float(entry["finance_score"]),
+                        "relevance_label": str(entry.get("relevance_label", "unknown")),
+                    }
+                except (TypeError, KeyError, ValueError):
+                    title, summary = items[index]
+                    results[index] = await self.aclassify_finance(title, summary)
+
+        batches = split_batches(costs, settings.llm.batch_tokens, settings.llm.batch_max_items)
+        await asyncio.gather(*(run(batch) for batch in batches))
+        return results
+
+    def _unenriched(self, title: str, summary: Optional[str]) -> Dict[str, Any]:
+        return {"finance_score": 0.5, "relevance_label": "unknown", "title_zh": title, "summary_zh": summary}
+
+    def enrich_article(self, title: str, summary: Optional[str]) -> Dict[str, Any]:
+        """
+        一次请求得到 finance_score、relevance_label、title_zh、summary_zh，
+        正文只发送一次；结果不符合约定时回退到分类 + 逐条翻译。
+        """
+        if not self.enabled:
+            return self._unenriched(title, summary)
+        result = _parse_enrichment(self.chat(*_enrich_request(title, summary)), bool(summary))
+        if result is not None:
+            return result
+        logger.warning("LLM 补全结果不合格，改为逐项请求: %s", title[:50])
+        return {
+            **self.classify_finance(title, summary),
+            "title_zh": self.translate_to_zh(title),
+            "summary_zh": self.translate_to_zh(summary) if summary else None,
+        }
+
+    async def aenrich_article(self, title: str, summary: Optional[str]) -> Dict[str, Any]:
+        if not self.enabled:
+            return self._unenriched(title, summary)
+        result = _parse_enrichment(await self.achat(*_enrich_request(title, summary)), bool(summary))
+        if result is not None:
+            return result
+        logger.warning("LLM 补全结果不合格，改为逐项请求: %s", title[:50])
+        classified, title_zh, summary_zh = await asyncio.gather(
+            self.aclassify_finance(title, summary),
+            self.atranslate_to_zh(title),
+            self.atranslate_to_zh(summary) if summary else asyncio.sleep(0),
+        )
+        return {**classified, "title_zh": title_zh, "summary_zh": summary_zh}
+
+    async def aenrich_batch(self, articles: Sequence[Tuple[str, Optional[str]]]) -> list[Dict[str, Any]]:
+        """批量版 enrich_article，输入为 (标题, 正文/摘要) 列表；不合格的条目单独走 aenrich_article。"""
+        if not self.enabled:
+            return [self._unenriched(title, summary) for title, summary in articles]
+        results: list[Optional[Dict[str, Any]]] = [None] * len(articles)
+        texts = [(title, (summary or "")[:TRANSLATE_INPUT_CHARS]) for title, summary in articles]
+        costs = [estimate_tokens(title) + estimate_tokens(body) + ENRICH_OUTPUT_TOKENS for title, body in texts]
+
+        async def run(batch: list[int]) -> None:
+            payload = [{"id": n, "title": texts[i][0], "content": texts[i][1]} for n, i in enumerate(batch)]
+            request = _batch_request(
+                "你是金融新闻分类与摘要助手。", ENRICH_BATCH_INSTRUCTION, payload, sum(costs[i] for i in batch)
+            )
+            parsed = _parse_batch(await self.achat(*request))
+            for n, index in enumerate(batch):
+                title, summary = articles[index]
+                result = _validate_enrichment(parsed.get(n), bool(summary))
+                results[index] = result if result is not None else await self.aenrich_article(title, summary)
+
+        batches = split_batches(costs, settings.llm.batch_tokens, settings.llm.batch_max_items)
+        await asyncio.gather(*(run(batch) for batch in batches))
+        return results
 
     def analyze_titles(self, titles: list[str]) -> str:
         if not titles:
             return "未提供标题。"
         if not self.enabled:
             return "DeepSeek API 未配置，无法分析。"
-        joined = "\n".join([f"- {title}" for title in titles])
-        prompt = (
-            "请分析以下新闻标题对经济和金融市场的意义，按标题逐条输出简短要点。"
-            "使用简体中文。\n\n"
-            f"{joined}"
-        )
-        content = self.chat(
-            [
-                {"role": "system", "content": "你是金融分析助手。"},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.3,
-            max_tokens=800,
-        )
-        return content.strip()
+        return self.chat(*_analyze_request(titles)).strip()
+
+    async def aanalyze_chunk(self, items: list[str]) -> str:
+        """map 步骤：分析一个分块；结果按内容哈希缓存，文章集合重叠时相同分块不再请求。"""
+        return (await self.achat(*_analyze_chunk_request(items))).strip()
+
+    async def areduce_analyses(self, partials: list[str]) -> str:
+        """reduce 步骤：合并若干分块的分析结果。"""
+        return (await self.achat(*_reduce_request(partials))).strip()
+
+    async def astream_analyze_titles(self, titles: list[str]) -> AsyncIterator[str]:
+        if not titles:
+            yield "未提供标题。"
+        elif not self.enabled:
+            yield "DeepSeek API 未配置，无法分析。"
+        else:
+            async for delta in self.astream_chat(*_analyze_request(titles)):
+                yield delta
+
+
+def _parse_completion(data: dict) -> Completion:
+    try:
+        content = data["choices"][0]["message"]["content"]
+    except (KeyError, IndexError) as exc:
+        raise RuntimeError(f"DeepSeek 响应解析失败: {data}") from exc
+    usage = data.get("usage") or {}
+    return Completion(
+        content=content,
+        prompt_tokens=int(usage.get("prompt_tokens") or 0),
+        completion_tokens=int(usage.get("completion_tokens") or 0),
+    )
+
+
+async def _iter_stream(resp: httpx.Response) -> AsyncIterator[tuple[str, Optional[dict]]]:
+    """解析 OpenAI 兼容的 SSE 流：每个事件一行 data: {...}，以 data: [DONE] 结束。"""
+    async for line in resp.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+        try:
+            chunk = json.loads(data)
+        except ValueError:
+            logger.warning("DeepSeek 流式响应无法解析: %s", data[:200])
+            continue
+        choices = chunk.get("choices") or []
+        delta = (choices[0].get("delta") or {}).get("content") if choices else None
+        yield delta or "", chunk.get("usage")
 
 
 def _extract_json(text: str) -> str:
@@ -130,4 +725,12 @@ def _extract_json(text: str) -> str:
     return text
 
 
+def _extract_json_array(text: str) -> str:
+    start = text.find("[")
+    end = text.rfind("]")
+    if start != -1 and end != -1 and end > start:
+        return text[start : end + 1]
+    return text
+
+
 llm_client = LLMClient()
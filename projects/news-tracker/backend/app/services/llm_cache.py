@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import func
+from sqlmodel import Session, delete, select
+
+from ..config import settings
+from ..database import engine
+from ..models import LlmCache
+
+logger = logging.getLogger(__name__)
+
+EVICT_BATCH = 200
+
+
+def cache_key(model: str, messages: list[dict[str, str]], **params: Any) -> str:
+    """模型、完整消息（提示词模板 + 输入）与生成参数共同决定缓存键。"""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params}, ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Completion:
+    content: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+class LlmResponseCache:
+    """
+    LLM 响应的持久缓存（SQLite 表 llmcache），按内容哈希寻址。
+
+    同一篇通稿被多个源转载时只调用一次上游；同一进程内相同请求正在进行时，
+    后来者等待第一个请求的结果（in-flight 合并），不会重复计费。
+    超过 TTL 的条目视为未命中，总大小超过上限时按 last_access 做 LRU 淘汰。
+    """
+
+    def __init__(self, max_bytes: int, ttl: timedelta):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._inflight: dict[str, Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.tokens_saved = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def get(self, key: str) -> Optional[Completion]:
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            row = session.get(LlmCache, key)
+            if row is None or now - row.created_at >= self.ttl:
+                return None
+            row.last_access = now
+            session.add(row)
+            session.commit()
+            return Completion(row.response, row.prompt_tokens, row.completion_tokens)
+
+    def put(self, key: str, model: str, completion: Completion) -> None:
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            row = session.get(LlmCache, key) or LlmCache(key=key, model=model, response="")
+            row.response = completion.content
+            row.prompt_tokens = completion.prompt_tokens
+            row.completion_tokens = completion.completion_tokens
+            row.size = len(completion.content.encode("utf-8"))
+            row.created_at = now
+            row.last_access = now
+            session.add(row)
+            session.commit()
+            self._evict(session)
+
+    def _claim(self, key: str) -> tuple[Future, bool]:
+        """登记一个进行中的请求；已有同 key 请求时返回它的 Future（leader=False）。"""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            self.misses += 1
+            return future, True
+
+    def _settle(self, key: str, model: str, future: Future, completion: Optional[Completion], exc=None) -> None:
+        if exc is None:
+            # 先落库再移出进行中表，避免间隙里的新请求既没命中缓存也没合并
+            try:
+                self.put(key, model, completion)
+            except Exception as err:  # 缓存写入失败不影响本次结果
+                logger.warning("LLM 缓存写入失败: %s", err)
+        with self._lock:
+            self._inflight.pop(key, None)
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(completion)
+
+    def _hit(self, completion: Completion) -> Completion:
+        self._count("tokens_saved", completion.total_tokens)
+        return completion
+
+    def get_or_call(self, key: str, model: str, call: Callable[[], Completion]) -> Completion:
+        """命中缓存直接返回；否则同一 key 只让一个调用方请求上游，其余等待其结果。"""
+        if not self.enabled:
+            return call()
+        cached = self.get(key)
+        if cached is not None:
+            self._count("hits")
+            return self._hit(cached)
+        future, leader = self._claim(key)
+        if not leader:
+            return self._hit(future.result())
+        try:
+            completion = call()
+        except BaseException as exc:
+            self._settle(key, model, future, None, exc)
+            raise
+        self._settle(key, model, future, completion)
+        return completion
+
+    async def aget_or_call(self, key: str, model: str, call: Callable[[], Awaitable[Completion]]) -> Completion:
+        """异步版 get_or_call；与同步调用方共用进行中请求表，可以互相合并。"""
+        if not self.enabled:
+            return await call()
+        cached = await asyncio.to_thread(self.get, key)
+        if cached is not None:
+            self._count("hits")
+            return self._hit(cached)
+        future, leader = self._claim(key)
+        if not leader:
+            return self._hit(await asyncio.wrap_future(future))
+        try:
+            completion = await call()
+        except BaseException as exc:
+            self._settle(key, model, future, None, exc)
+            raise
+        await asyncio.to_thread(self._settle, key, model, future, completion)
+        return completion
+
+    def lookup(self, key: str) -> Optional[Completion]:
+        """只查缓存、不代为请求（流式调用自己请求上游）；命中计入统计。"""
+        if not self.enabled:
+            return None
+        cached = self.get(key)
+        if cached is not None:
+            self._count("hits")
+            self._hit(cached)
+        return cached
+
+    def store(self, key: str, model: str, completion: Completion) -> None:
+        """流式调用结束后写入完整结果，与 get_or_call 共用同一缓存键。"""
+        if not self.enabled:
+            return
+        self._count("misses")
+        try:
+            self.put(key, model, completion)
+        except Exception as err:
+            logger.warning("LLM 缓存写入失败: %s", err)
+
+    def _evict(self, session: Session) -> None:
+        total = session.exec(select(func.coalesce(func.sum(LlmCache.size), 0))).one()
+        while total > self.max_bytes:
+            victims = session.exec(
+                select(LlmCache.key, LlmCache.size).order_by(LlmCache.last_access).limit(EVICT_BATCH)
+            ).all()
+            if not victims:
+                break
+            freed = 0
+            keys = []
+            for key, size in victims:
+                keys.append(key)
+                freed += size
+                if total - freed <= self.max_bytes:
+                    break
+            session.exec(delete(LlmCache).where(LlmCache.key.in_(keys)))
+            session.commit()
+            total -= freed
+            self._count("evictions", len(keys))
+
+    def purge_expired(self) -> int:
+        cutoff = datetime.utcnow() - self.ttl
+        with Session(engine) as session:
+            result = session.exec(delete(LlmCache).where(LlmCache.created_at < cutoff))
+            session.commit()
+            return result.rowcount or 0
+
+    def stats(self) -> dict:
+        with Session(engine) as session:
+            entries, total = session.exec(
+                select(func.count(), func.coalesce(func.sum(LlmCache.size), 0)).select_from(LlmCache)
+            ).one()
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "enabled": self.enabled,
+                "entries": entries,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "ttl_hours": self.ttl.total_seconds() / 3600,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "tokens_saved": self.tokens_saved,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+            }
+
+
+llm_cache = LlmResponseCache(
+    max_bytes=settings.llm.cache_max_mb * 1024 * 1024,
+    ttl=timedelta(hours=settings.llm.cache_ttl_hours),
+)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlmodel import Session, select
+
+from ..config import PollingConfig, settings
+from ..models import FeedState, FetchRun, Source, Topic
+
+# 条目时间戳只看最近这段时间，更早的条目不反映当前更新频率
+TIMESTAMP_WINDOW = timedelta(hours=48)
+# 时间跨度太短（或多数条目没有发布时间、被填成抓取时刻）时不据此估计
+MIN_TIMESTAMP_SPAN = timedelta(minutes=15)
+MISSING_DATE_SLACK = timedelta(minutes=1)
+HISTORY_WINDOW = timedelta(hours=24)
+MIN_ELAPSED_HOURS = 1 / 60
+# 速率上升时快速跟上（突发后尽快加密轮询），下降时慢慢衰减（安静后逐步退避）
+ALPHA_UP = 0.6
+ALPHA_DOWN = 0.25
+# priority 高于 / 低于该值时间隔缩短 / 拉长：每差 5 级相差一倍，最多 2 倍
+PRIORITY_BASELINE = 5
+PRIORITY_STEP = 5
+MAX_PRIORITY_FACTOR = 2.0
+
+
+def serves_core(source: Source, topics: Iterable[Topic]) -> bool:
+    """源是否服务于某个核心主题（绑定了核心主题，或未绑定主题且存在启用的核心主题）。"""
+    return any(topic.is_core for topic in topics if not source.topic_id or topic.id == source.topic_id)
+
+
+def timestamp_rate(published: Iterable[datetime], now: datetime) -> Optional[float]:
+    """由源里条目的发布时间估计每小时新条目数；时间戳不足以估计时返回 None。"""
+    times = sorted(
+        {
+            ts.replace(second=0, microsecond=0)
+            for ts in published
+            if ts and now - TIMESTAMP_WINDOW <= ts < now - MISSING_DATE_SLACK
+        }
+    )
+    if len(times) < 2:
+        return None
+    span = times[-1] - times[0]
+    if span < MIN_TIMESTAMP_SPAN:
+        return None
+    # 最新条目到现在这段时间也算进分母：源停更后估计值随之下降
+    hours = (now - times[0]).total_seconds() / 3600
+    return (len(times) - 1) / hours
+
+
+def history_rate(session: Session, source_id: int, now: datetime) -> Optional[float]:
+    """由最近成功的 FetchRun 记录估计每小时新条目数（冷启动或重启后使用）。"""
+    runs = session.exec(
+        select(FetchRun)
+        .where(
+            FetchRun.source_id == source_id,
+            FetchRun.status == "success",
+            FetchRun.started_at >= now - HISTORY_WINDOW,
+        )
+        .order_by(FetchRun.started_at)
+    ).all()
+    if len(runs) < 2:
+        return None
+    hours = (now - runs[0].started_at).total_seconds() / 3600
+    # 第一轮之前积累的条目不在统计区间内
+    return sum(run.entries for run in runs[1:]) / max(hours, MIN_ELAPSED_HOURS)
+
+
+class PollPolicy:
+    """
+    按源自适应的抓取间隔。
+
+    每轮抓取后用两种观测更新 FeedState.rate_per_hour（不对称的指数滑动平均）：
+    本轮新条目数 / 距上次检查的小时数，以及源里条目发布时间的密度。
+    间隔 = 攒够 target_entries 条新条目的预期时间，按 Source.priority 缩放
+    （以 5 为基准，每高 5 级间隔减半），限制在 [min_minutes, max_minutes]。
+    还没有观测数据时沿用原来的固定间隔：服务核心主题的源 core_minutes，其余 default_minutes。
+    """
+
+    def __init__(self, cfg: PollingConfig):
+        self.cfg = cfg
+
+    def observe(
+        self,
+        state: FeedState,
+        new_entries: int,
+        published: Iterable[datetime],
+        now: datetime,
+        history: Optional[float] = None,
+    ) -> None:
+        samples = []
+        if state.checked_at is not None:
+            elapsed = max((now - state.checked_at).total_seconds() / 3600, MIN_ELAPSED_HOURS)
+            samples.append(new_entries / elapsed)
+        ts_rate = timestamp_rate(published, now)
+        if ts_rate is not None:
+            samples.append(ts_rate)
+        if not samples:
+            return
+        observed = sum(samples) / len(samples)
+        previous = state.rate_per_hour if state.rate_per_hour is not None else history
+        if previous is None:
+            state.rate_per_hour = observed
+            return
+        alpha = ALPHA_UP if observed > previous else ALPHA_DOWN
+        state.rate_per_hour = alpha * observed + (1 - alpha) * previous
+
+    def _bias(self, source: Source) -> float:
+        factor = 2 ** (((source.priority or 0) - PRIORITY_BASELINE) / PRIORITY_STEP)
+        return 1 / max(1 / MAX_PRIORITY_FACTOR, min(MAX_PRIORITY_FACTOR, factor))
+
+    def interval(self, state: Optional[FeedState], source: Source, core: bool) -> int:
+        """返回抓取间隔（秒）。"""
+        cfg = self.cfg
+        rate = state.rate_per_hour if state is not None else None
+        if rate is None:
+            minutes = cfg.core_minutes if core else cfg.default_minutes
+        elif rate <= 0:
+            minutes = cfg.max_minutes
+        else:
+            minutes = cfg.target_entries / rate * 60 * self._bias(source)
+        minutes = max(cfg.min_minutes, min(cfg.max_minutes, minutes))
+        return int(minutes * 60)
+
+
+poll_policy = PollPolicy(settings.polling)
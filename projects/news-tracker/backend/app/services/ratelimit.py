@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    按分钟配额补充的令牌桶，线程安全，同步与异步调用方共用同一份配额。
+
+    reserve() 立即扣减令牌（余额可以为负），返回调用方需要等待的秒数；
+    先到先得，后来的请求排在已预约的额度之后，突发流量会被平滑到配额速率。
+    per_minute <= 0 表示不限速。
+    """
+
+    def __init__(self, per_minute: float, burst: float | None = None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst if burst is not None else per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def reserve(self, amount: float = 1.0) -> float:
+        if self.unlimited:
+            return 0.0
+        # 单次请求超过桶容量时按容量计，避免永远等不到
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, amount: float = 1.0) -> None:
+        wait = self.reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, amount: float = 1.0) -> None:
+        wait = self.reserve(amount)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def available(self) -> float:
+        if self.unlimited:
+            return float("inf")
+        with self._lock:
+            elapsed = time.monotonic() - self._updated
+            return min(self.capacity, self._tokens + elapsed * self.rate)
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any
+from typing import Any, Optional
 import feedparser
 from dateutil import parser as dateparser
 
@@ -9,27 +12,66 @@ from dateutil import parser as dateparser
 import httpx
 import logging
 
+from .transport import get_async_transport, sync_transport
+
 logger = logging.getLogger(__name__)
 
-def parse_feed(url: str) -> list[dict[str, Any]]:
-    # Use httpx to fetch with User-Agent to avoid 403 Forbidden
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept": "application/rss+xml, application/xml, text/xml, */*"
-    }
-    
-    content = None
-    try:
-        # verify=False to bypass SSL errors (WRONG_VERSION_NUMBER) caused by proxies or legacy servers
-        with httpx.Client(timeout=15.0, follow_redirects=True, verify=False) as client:
-            resp = client.get(url, headers=headers)
-            resp.raise_for_status()
-            content = resp.content
-    except Exception as e:
-        logger.warning(f"Failed to fetch RSS via httpx: {url} Error: {e}")
-        # Fallback to feedparser's internal fetcher (unlikely to work if httpx failed due to 403)
-        pass
+FEED_HEADERS = {
+    "Accept": "application/rss+xml, application/xml, text/xml, */*",
+}
+
+
+@dataclass
+class FeedResult:
+    entries: list[dict[str, Any]] = field(default_factory=list)
+    not_modified: bool = False
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    content: Optional[bytes] = field(default=None, repr=False)
+
+
+def _conditional_headers(etag: Optional[str], last_modified: Optional[str]) -> dict[str, str]:
+    headers = dict(FEED_HEADERS)
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
 
+
+def _hash_body(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def _check_response(
+    url: str, resp: httpx.Response, etag: Optional[str], last_modified: Optional[str], content_hash: Optional[str]
+) -> FeedResult:
+    """处理条件请求的响应：304 或正文哈希未变时直接短路，不再解析。"""
+    if resp.status_code == 304:
+        logger.info(f"RSS 未更新 (304): {url}")
+        return FeedResult(
+            not_modified=True,
+            etag=resp.headers.get("ETag") or etag,
+            last_modified=resp.headers.get("Last-Modified") or last_modified,
+            content_hash=content_hash,
+        )
+    resp.raise_for_status()
+    body_hash = _hash_body(resp.content)
+    result = FeedResult(
+        etag=resp.headers.get("ETag") or None,
+        last_modified=resp.headers.get("Last-Modified") or None,
+        content_hash=body_hash,
+    )
+    if content_hash and body_hash == content_hash:
+        logger.info(f"RSS 正文未变化 (hash): {url}")
+        result.not_modified = True
+    else:
+        result.content = resp.content
+    return result
+
+
+def parse_feed_content(url: str, content: Optional[bytes]) -> list[dict[str, Any]]:
     # Parse content if available, else let feedparser try URL directly
     if content:
         feed = feedparser.parse(content)
@@ -50,7 +92,7 @@ def parse_feed(url: str) -> list[dict[str, Any]]:
                     published = published.astimezone(datetime.utcnow().tzinfo).replace(tzinfo=None)
             except (ValueError, TypeError):
                 published = None
-        
+
         # Fallback to current time if no date
         if not published:
             published = datetime.utcnow()
@@ -65,3 +107,59 @@ def parse_feed(url: str) -> list[dict[str, Any]]:
             }
         )
     return entries
+
+
+def fetch_feed(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    content_hash: Optional[str] = None,
+) -> FeedResult:
+    # Use the shared pooled client with a browser User-Agent to avoid 403 Forbidden
+    try:
+        resp = sync_transport.get(url, headers=_conditional_headers(etag, last_modified))
+        result = _check_response(url, resp, etag, last_modified, content_hash)
+    except Exception as e:
+        logger.warning(f"Failed to fetch RSS via httpx: {url} Error: {e}")
+        # Fallback to feedparser's internal fetcher (unlikely to work if httpx failed due to 403)
+        return FeedResult(entries=parse_feed_content(url, None))
+
+    if not result.not_modified:
+        result.entries = parse_feed_content(url, result.content)
+    return result
+
+
+async def download_feed_async(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    content_hash: Optional[str] = None,
+) -> FeedResult:
+    """只下载不解析；content 为 None 且未命中缓存时表示下载失败，解析阶段会回退到 feedparser 自带抓取。"""
+    try:
+        resp = await get_async_transport().get(url, headers=_conditional_headers(etag, last_modified))
+        return _check_response(url, resp, etag, last_modified, content_hash)
+    except Exception as e:
+        logger.warning(f"Failed to fetch RSS via httpx: {url} Error: {e}")
+        return FeedResult()
+
+
+async def fetch_feed_async(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    content_hash: Optional[str] = None,
+) -> FeedResult:
+    result = await download_feed_async(url, etag, last_modified, content_hash)
+    if not result.not_modified:
+        # feedparser 是纯 CPU 解析，放到线程里避免阻塞事件循环
+        result.entries = await asyncio.to_thread(parse_feed_content, url, result.content)
+    return result
+
+
+def parse_feed(url: str) -> list[dict[str, Any]]:
+    return fetch_feed(url).entries
+
+
+async def parse_feed_async(url: str) -> list[dict[str, Any]]:
+    return (await fetch_feed_async(url)).entries
@@ -2,61 +2,283 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+
+from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MISSED, JobExecutionEvent
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
 from sqlmodel import Session, select
 
-from ..database import engine
-from ..models import Topic
-from ..tasks.fetch import fetch_for_topic, cleanup_old_articles
+from ..database import engine, ensure_incremental_vacuum
+from ..models import FeedState, Source, Topic
+from ..config import settings
+from .crawl_cache import crawl_cache
+from .enrich_queue import enrich_queue
+from .leader import scheduler_leader
+from .llm_cache import llm_cache
+from .polling import poll_policy, serves_core
+from ..tasks.enrich import enrich_worker
+from ..tasks.fetch import cleanup_old_articles
+from ..tasks.fetch_jobs import fail_interrupted_fetch_runs, fetch_jobs, make_scope, purge_finished_runs
 
 logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler()
 
+# 启动时已过期的源依次错开，避免同时抓取
+OVERDUE_STAGGER_SECONDS = 10
+CLEANUP_SECONDS = 6 * 3600
+# 领取其它进程（API）提交的手动抓取
+FETCH_REQUEST_SECONDS = 5
 
-async def _run_fetch_topic(topic_id: int) -> None:
-    def _task():
-        with Session(engine) as session:
-            topic = session.exec(select(Topic).where(Topic.id == topic_id)).first()
-            if not topic or not topic.enabled:
-                return
-            fetch_for_topic(session, topic)
+# 任务 ID -> 最近一次运行的结果（进程内记录，重启后源任务回退到 FeedState.checked_at）
+_last_runs: dict[str, dict[str, Any]] = {}
 
-    await asyncio.to_thread(_task)
 
+def _on_job_event(event: JobExecutionEvent) -> None:
+    if event.code == EVENT_JOB_MISSED:
+        status = "missed"
+    else:
+        status = "error" if event.exception else "ok"
+    _last_runs[event.job_id] = {
+        "last_run_at": event.scheduled_run_time,
+        "last_finished_at": datetime.now(timezone.utc),
+        "last_status": status,
+        "last_error": str(event.exception) if event.exception else None,
+    }
 
-def schedule_topics() -> None:
-    scheduler.remove_all_jobs()
+
+scheduler.add_listener(_on_job_event, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED)
+
+
+def _source_job_id(source_id: int) -> str:
+    return f"source-{source_id}"
+
+
+def _poll_seconds(source_id: int) -> Optional[int]:
+    with Session(engine) as session:
+        state = session.get(FeedState, source_id)
+        return state.poll_seconds if state else None
+
+
+async def _run_fetch_source(source_id: int) -> None:
+    # 经抓取任务管理器运行：与手动触发的同范围 / 全量抓取合并，不会重复抓取
+    await fetch_jobs.run(make_scope(source_id=source_id), "scheduled")
+    # 按本轮观测重新计算的间隔调整下次抓取时间
+    seconds = await asyncio.to_thread(_poll_seconds, source_id)
+    job = scheduler.get_job(_source_job_id(source_id))
+    if seconds and job is not None and int(job.trigger.interval.total_seconds()) != seconds:
+        scheduler.reschedule_job(job.id, trigger="interval", seconds=seconds)
+        logger.info("源 %s 抓取间隔调整为 %.1f 分钟", source_id, seconds / 60)
+
+
+async def _run_fetch_requests() -> None:
+    await fetch_jobs.start_pending()
+
+
+async def _run_enrich() -> None:
+    await enrich_worker.drain()
+
+
+def _load_schedule() -> tuple[list[Topic], list[Source], dict[int, FeedState]]:
     with Session(engine) as session:
-        topics = session.exec(select(Topic).where(Topic.enabled == True)).all()  # noqa: E712
-        for topic in topics:
-            minutes = 15 if topic.is_core else 60
+        topics = list(session.exec(select(Topic).where(Topic.enabled == True)).all())  # noqa: E712
+        enabled = {topic.id for topic in topics}
+        sources = [
+            source
+            for source in session.exec(select(Source).where(Source.enabled == True)).all()  # noqa: E712
+            if enabled and (not source.topic_id or source.topic_id in enabled)
+        ]
+        states = {state.source_id: state for state in session.exec(select(FeedState)).all()}
+        session.expunge_all()
+    return topics, sources, states
+
+
+@dataclass
+class JobSpec:
+    id: str
+    func: Callable
+    seconds: int
+    args: tuple = ()
+    # 新建任务时距第一次运行的时间；None 表示一个完整间隔
+    first_delay: Optional[timedelta] = None
+
+    @property
+    def initial_delay(self) -> timedelta:
+        return self.first_delay if self.first_delay is not None else timedelta(seconds=self.seconds)
+
+
+def _desired_jobs() -> list[JobSpec]:
+    """
+    期望的任务集合：每个服务于启用主题的源一个抓取任务，间隔由 PollPolicy 按观测到的
+    更新频率得出（见 services/polling.py），另加清理与补全队列两个固定任务。
+    """
+    topics, sources, states = _load_schedule()
+    utcnow = datetime.utcnow()
+    specs = []
+    overdue = 0
+    for source in sources:
+        state = states.get(source.id)
+        seconds = (state.poll_seconds if state else None) or poll_policy.interval(
+            state, source, serves_core(source, topics)
+        )
+        first_delay = None
+        if state is not None and state.checked_at is not None:
+            # 从上次检查时间起算，重启后不会打乱已学到的节奏
+            first_delay = state.checked_at + timedelta(seconds=seconds) - utcnow
+            if first_delay <= timedelta(0):
+                first_delay = timedelta(seconds=overdue * OVERDUE_STAGGER_SECONDS)
+                overdue += 1
+        specs.append(JobSpec(_source_job_id(source.id), _run_fetch_source, seconds, (source.id,), first_delay))
+    specs.append(JobSpec("cleanup", _run_cleanup, CLEANUP_SECONDS))
+    specs.append(JobSpec("enrich", _run_enrich, settings.enrich.poll_seconds))
+    specs.append(JobSpec("fetch-requests", _run_fetch_requests, FETCH_REQUEST_SECONDS))
+    return specs
+
+
+def _apply_jobs(specs: list[JobSpec]) -> dict[str, list[str]]:
+    desired = {spec.id: spec for spec in specs}
+    now = datetime.now(timezone.utc)
+    changes: dict[str, list[str]] = {"added": [], "removed": [], "rescheduled": []}
+    for job in scheduler.get_jobs():
+        if job.id not in desired:
+            scheduler.remove_job(job.id)
+            _last_runs.pop(job.id, None)
+            changes["removed"].append(job.id)
+    for spec in desired.values():
+        job = scheduler.get_job(spec.id)
+        if job is None:
             scheduler.add_job(
-                _run_fetch_topic,
+                spec.func,
                 "interval",
-                minutes=minutes,
-                args=[topic.id],
-                id=f"topic-{topic.id}",
-                replace_existing=True,
+                seconds=spec.seconds,
+                args=list(spec.args),
+                id=spec.id,
+                next_run_time=now + spec.initial_delay,
             )
-            logger.info("已调度主题 %s (%s 分钟)", topic.name_zh, minutes)
+            changes["added"].append(spec.id)
+        elif int(job.trigger.interval.total_seconds()) != spec.seconds:
+            # 间隔变化：下次运行取原计划与按新间隔计算的较早者
+            next_run = job.next_run_time
+            if next_run is not None:
+                next_run = min(next_run, now + spec.initial_delay)
+            scheduler.modify_job(spec.id, trigger=IntervalTrigger(seconds=spec.seconds), next_run_time=next_run)
+            changes["rescheduled"].append(spec.id)
+    if any(changes.values()):
+        logger.info(
+            "调度任务已更新: 新增 %s, 删除 %s, 调整 %s",
+            changes["added"],
+            changes["removed"],
+            changes["rescheduled"],
+        )
+    return changes
+
 
-    scheduler.add_job(_run_cleanup, "interval", hours=6, id="cleanup", replace_existing=True)
+def reconcile_jobs() -> dict[str, list[str]]:
+    """
+    把调度器里的任务与期望集合对齐：只新增缺少的、删除多余的、调整间隔变化的任务，
+    其余任务保留原来的 next_run_time（频繁编辑主题 / 源不会把抓取一再推后）。
+    只有持有调度租约的进程才维护任务；其它进程里的修改由主节点续约时对齐。
+    """
+    if not scheduler_leader.is_leader:
+        return {"added": [], "removed": [], "rescheduled": []}
+    return _apply_jobs(_desired_jobs())
+
+
+def _source_states(source_ids: list[int]) -> dict[int, tuple[Source, Optional[FeedState]]]:
+    with Session(engine) as session:
+        sources = session.exec(select(Source).where(Source.id.in_(source_ids))).all()
+        states = {
+            state.source_id: state
+            for state in session.exec(select(FeedState).where(FeedState.source_id.in_(source_ids))).all()
+        }
+        session.expunge_all()
+    return {source.id: (source, states.get(source.id)) for source in sources}
+
+
+def jobs_status() -> list[dict[str, Any]]:
+    """每个调度任务的间隔、下次运行与最近一次运行情况。"""
+    jobs = scheduler.get_jobs()
+    source_ids = [job.args[0] for job in jobs if job.id.startswith("source-")]
+    sources = _source_states(source_ids) if source_ids else {}
+    result = []
+    for job in jobs:
+        item: dict[str, Any] = {
+            "id": job.id,
+            "interval_seconds": int(job.trigger.interval.total_seconds()),
+            "next_run_time": job.next_run_time,
+            "last_run_at": None,
+            "last_finished_at": None,
+            "last_status": None,
+            "last_error": None,
+        }
+        if job.id.startswith("source-"):
+            source, state = sources.get(job.args[0], (None, None))
+            item["source_id"] = job.args[0]
+            item["source_name"] = source.name if source else None
+            item["rate_per_hour"] = state.rate_per_hour if state else None
+            if state is not None and state.checked_at is not None:
+                item["last_finished_at"] = state.checked_at.replace(tzinfo=timezone.utc)
+        item.update(_last_runs.get(job.id, {}))
+        result.append(item)
+    far_future = datetime.max.replace(tzinfo=timezone.utc)
+    result.sort(key=lambda item: item["next_run_time"] or far_future)
+    return result
 
 
 async def _run_cleanup() -> None:
     def _task():
+        try:
+            if ensure_incremental_vacuum():
+                logger.info("数据库已转换为增量 VACUUM 模式")
+        except Exception as exc:
+            # 其它进程长时间占用数据库时下一轮清理再试，不影响本轮清理
+            logger.warning("转换增量 VACUUM 模式失败: %s", exc)
         with Session(engine) as session:
             cleanup_old_articles(session)
+        crawl_cache.purge_expired()
+        enrich_queue.purge_finished()
+        llm_cache.purge_expired()
+        purge_finished_runs()
 
     await asyncio.to_thread(_task)
 
 
 async def trigger_all_fetch() -> None:
-    def _task():
-        from ..tasks.fetch import fetch_all
+    await fetch_jobs.run(make_scope(), "manual")
 
-        with Session(engine) as session:
-            fetch_all(session)
 
-    await asyncio.to_thread(_task)
+async def _on_elected() -> None:
+    # 抓取只在调度进程里运行：上一个持有者（或上次运行的本进程）留下的 running 记录已经中断
+    await asyncio.to_thread(fail_interrupted_fetch_runs)
+    _apply_jobs(await asyncio.to_thread(_desired_jobs))
+    scheduler.resume()
+
+
+async def _on_renewed() -> None:
+    # 主题 / 源可能在其它进程里被修改，每次续约时对齐一次
+    _apply_jobs(await asyncio.to_thread(_desired_jobs))
+
+
+async def _on_lost() -> None:
+    scheduler.pause()
+    scheduler.remove_all_jobs()
+    _last_runs.clear()
+
+
+def start_scheduler() -> None:
+    """
+    启动调度器（暂停状态）并参与调度租约竞选：多个进程共用同一数据库时，
+    只有持有租约的进程恢复调度器、运行定时抓取与补全，其余进程只提供 API。
+    """
+    if not scheduler.running:
+        scheduler.start(paused=True)
+    scheduler_leader.start(_on_elected, _on_renewed, _on_lost)
+
+
+def stop_scheduler() -> None:
+    scheduler_leader.stop()
+    if scheduler.running:
+        scheduler.shutdown()
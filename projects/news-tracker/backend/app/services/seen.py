@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import threading
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """定长位数组 + 双重哈希的布隆过滤器，只会误报不会漏报。"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(capacity, 1000)
+        self.size = int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class SeenUrlIndex:
+    """
+    进程内的已入库 URL 索引。
+
+    布隆过滤器判定“肯定没见过”的 URL 直接视为新条目；可能命中的 URL
+    由调用方用一次批量 IN 查询确认。布隆过滤器不支持删除，因此清理过期
+    文章后需要用 rebuild 重新从数据库加载。
+    """
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.001):
+        self._error_rate = error_rate
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(capacity, error_rate)
+        self.warmed = False
+
+    def rebuild(self, urls: Iterable[str]) -> None:
+        urls = list(urls)
+        bloom = BloomFilter(max(len(urls) * 2, self._bloom.capacity), self._error_rate)
+        for url in urls:
+            bloom.add(url)
+        with self._lock:
+            self._bloom = bloom
+            self.warmed = True
+        logger.info("已载入 %s 条 URL 到去重索引", len(urls))
+
+    def add(self, url: str) -> None:
+        with self._lock:
+            if self._bloom.count >= self._bloom.capacity:
+                # 超出容量后误报率上升，但仍不会漏报；下次 rebuild 时扩容
+                logger.debug("URL 索引已超过容量 %s", self._bloom.capacity)
+            self._bloom.add(url)
+
+    def add_many(self, urls: Iterable[str]) -> None:
+        with self._lock:
+            for url in urls:
+                self._bloom.add(url)
+
+    def maybe_seen(self, urls: Iterable[str]) -> list[str]:
+        """返回可能已入库的 URL；未预热时全部视为可能命中。"""
+        with self._lock:
+            if not self.warmed:
+                return list(urls)
+            return [url for url in urls if url in self._bloom]
+
+
+seen_urls = SeenUrlIndex()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import Optional
+
+# 纯本地的抽取式摘要：不联网、不依赖第三方库，用于在调用 LLM 前压缩正文
+
+_CJK = re.compile(r"[\u3000-\u9fff\uff00-\uffef]")
+_CJK_RUN = re.compile(r"[\u4e00-\u9fff]+")
+_WORD = re.compile(r"[a-zA-Z][a-zA-Z'\-]+|\d+(?:\.\d+)?%?")
+# 中文句末标点直接断句；英文句号等需后接空白才断，避免切开 3.5 / U.S.
+_SENTENCE_END = re.compile(r"(?<=[。！？；])|(?<=[.!?;])\s+(?=[\"'“A-Z0-9(])")
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be been but by for from had has have he her his i in is it its
+    of on or our said says she that the their them they this to was we were which who
+    will with would you after before also about over more than not new into
+    """.split()
+)
+
+MIN_SENTENCE_CHARS = 12
+LEAD_BONUS = 0.5
+TITLE_BONUS = 1.0
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中日韩字符按 1 个，其余按 4 个字符 1 个。"""
+    if not text:
+        return 0
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk) // 4 + 1
+
+
+def split_sentences(text: str) -> list[str]:
+    sentences = []
+    for paragraph in text.splitlines():
+        for sentence in _SENTENCE_END.split(paragraph.strip()):
+            sentence = sentence.strip()
+            if sentence:
+                sentences.append(sentence)
+    return sentences
+
+
+def terms(text: str) -> list[str]:
+    """英文取小写词（去停用词），中文取相邻二字组。"""
+    words = [w.lower() for w in _WORD.findall(text)]
+    result = [w for w in words if w not in STOPWORDS]
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1:
+            result.append(run)
+        result.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return result
+
+
+def rank_sentences(sentences: list[str], title: Optional[str] = None) -> list[float]:
+    """
+    TF-IDF 句子打分：每句视作一篇文档，得分为句内词 TF-IDF 之和按句长归一，
+    再加上与标题重合的词和靠前位置（新闻多为倒金字塔结构）的加成。
+    """
+    sentence_terms = [terms(s) for s in sentences]
+    n = len(sentences)
+    df = Counter(term for ts in sentence_terms for term in set(ts))
+    title_terms = set(terms(title)) if title else set()
+    scores = []
+    for position, ts in enumerate(sentence_terms):
+        if not ts or len(sentences[position]) < MIN_SENTENCE_CHARS:
+            scores.append(0.0)
+            continue
+        tf = Counter(ts)
+        weight = sum(count * (math.log(n / df[term]) + 1.0) for term, count in tf.items())
+        score = weight / math.sqrt(len(ts))
+        if title_terms:
+            overlap = len(title_terms.intersection(tf)) / len(title_terms)
+            score *= 1.0 + TITLE_BONUS * overlap
+        score *= 1.0 + LEAD_BONUS / (1 + position)
+        scores.append(score)
+    return scores
+
+
+def extractive_summary(text: str, token_budget: int, title: Optional[str] = None) -> str:
+    """选出得分最高、总 token 数不超过预算的句子，按原文顺序拼接；原文不超预算时原样返回。"""
+    if not text or token_budget <= 0 or estimate_tokens(text) <= token_budget:
+        return text
+    sentences = split_sentences(text)
+    scores = rank_sentences(sentences, title)
+    chosen: list[int] = []
+    used = 0
+    for index in sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True):
+        if scores[index] <= 0:
+            break
+        cost = estimate_tokens(sentences[index])
+        if used + cost > token_budget:
+            continue
+        chosen.append(index)
+        used += cost
+    if not chosen:
+        # 首句都超预算：按字符截断
+        first = sentences[0] if sentences else text
+        return first[: max(1, token_budget * 2)]
+    return "\n".join(sentences[i] for i in sorted(chosen))
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Common headers to mimic a browser
+BROWSER_USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+
+def _http2_enabled() -> bool:
+    if not settings.http.http2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("HTTP2 已开启但未安装 h2，回退到 HTTP/1.1")
+        return False
+    return True
+
+
+def _client_kwargs() -> dict:
+    cfg = settings.http
+    return {
+        "timeout": cfg.timeout,
+        "follow_redirects": True,
+        # verify=False to bypass SSL errors (WRONG_VERSION_NUMBER) caused by proxies or legacy servers
+        "verify": False,
+        "http2": _http2_enabled(),
+        "limits": httpx.Limits(
+            max_connections=cfg.max_connections,
+            max_keepalive_connections=cfg.max_keepalive,
+        ),
+        "headers": {"User-Agent": BROWSER_USER_AGENT},
+    }
+
+
+def _host_of(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+class SyncTransport:
+    """线程共享的长连接客户端，按主机与全局并发限流。"""
+
+    def __init__(self) -> None:
+        self._client: Optional[httpx.Client] = None
+        self._lock = threading.Lock()
+        self._global = threading.BoundedSemaphore(settings.http.max_concurrency)
+        self._hosts: dict[str, threading.BoundedSemaphore] = {}
+
+    @property
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None or self._client.is_closed:
+                self._client = httpx.Client(**_client_kwargs())
+            return self._client
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = _host_of(url)
+        with self._lock:
+            slot = self._hosts.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(settings.http.max_per_host)
+                self._hosts[host] = slot
+            return slot
+
+    @contextmanager
+    def _limited(self, url: str) -> Iterator[None]:
+        with self._global, self._host_slot(url):
+            yield
+
+    def get(self, url: str, headers: Optional[dict[str, str]] = None) -> httpx.Response:
+        with self._limited(url):
+            return self.client.get(url, headers=headers)
+
+    @contextmanager
+    def stream(self, url: str, headers: Optional[dict[str, str]] = None) -> Iterator[httpx.Response]:
+        with self._limited(url):
+            with self.client.stream("GET", url, headers=headers) as resp:
+                yield resp
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+class AsyncTransport:
+    """绑定到单个事件循环的 AsyncClient，复用 keep-alive 连接。"""
+
+    def __init__(self) -> None:
+        self.client = httpx.AsyncClient(**_client_kwargs())
+        self._global = asyncio.Semaphore(settings.http.max_concurrency)
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = _host_of(url)
+        slot = self._hosts.get(host)
+        if slot is None:
+            slot = asyncio.Semaphore(settings.http.max_per_host)
+            self._hosts[host] = slot
+        return slot
+
+    async def get(self, url: str, headers: Optional[dict[str, str]] = None) -> httpx.Response:
+        async with self._global, self._host_slot(url):
+            return await self.client.get(url, headers=headers)
+
+    @asynccontextmanager
+    async def stream(
+        self, url: str, headers: Optional[dict[str, str]] = None
+    ) -> AsyncIterator[httpx.Response]:
+        async with self._global, self._host_slot(url):
+            async with self.client.stream("GET", url, headers=headers) as resp:
+                yield resp
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+sync_transport = SyncTransport()
+
+_async_transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncTransport]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_transport() -> AsyncTransport:
+    """返回当前事件循环专属的传输层（AsyncClient 不能跨事件循环使用）。"""
+    loop = asyncio.get_running_loop()
+    transport = _async_transports.get(loop)
+    if transport is None:
+        transport = AsyncTransport()
+        _async_transports[loop] = transport
+    return transport
+
+
+async def aclose_transport() -> None:
+    loop = asyncio.get_running_loop()
+    transport = _async_transports.pop(loop, None)
+    if transport is not None:
+        await transport.aclose()
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, SQLModel
+
+from ..models import Article, ArticleEnriched, ArticleTopic, EnrichJob
+from .dedupe import normalize_text, similarity
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingArticle:
+    source_id: int
+    url: str
+    title_orig: str
+    summary_orig: Optional[str]
+    lang_orig: str
+    published_at: Optional[datetime]
+    title_zh: str
+    summary_zh: Optional[str]
+    finance_score: float
+    relevance_label: str
+    dedupe_key: str
+    is_primary_lang: bool
+    topic_ids: list[int] = field(default_factory=list)
+    # 入库后交给后台补全队列的步骤（按顺序执行）
+    enrich_steps: list[str] = field(default_factory=list)
+    fetched_at: datetime = field(default_factory=datetime.utcnow)
+
+
+def dialect_insert(session: Session, model: type[SQLModel]):
+    """返回支持 ON CONFLICT 的 INSERT 构造器（SQLite / PostgreSQL）。"""
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite_insert(model)
+    if dialect == "postgresql":
+        return pg_insert(model)
+    raise RuntimeError(f"批量写入不支持的数据库: {dialect}")
+
+
+class ArticleBatchWriter:
+    """
+    收集一个源的待入库条目，在一个事务内批量写入。
+
+    Article 依赖 url 唯一约束做幂等（ON CONFLICT DO NOTHING），通过
+    RETURNING 拿到真正插入的 id，再批量写 ArticleEnriched、ArticleTopic
+    以及补全任务 EnrichJob，文章与任务在同一事务中提交。
+    """
+
+    def __init__(self) -> None:
+        self.pending: dict[str, PendingArticle] = {}
+        self._demote: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def add(self, item: PendingArticle) -> None:
+        existing = self.pending.get(item.url)
+        if existing:
+            existing.topic_ids = sorted(set(existing.topic_ids) | set(item.topic_ids))
+            return
+        self.pending[item.url] = item
+
+    def demote(self, article_id: int) -> None:
+        """已入库的同一事件文章不再作为主语言版本。"""
+        self._demote.add(article_id)
+
+    def find_similar(
+        self, title_zh: str, published_at: Optional[datetime], threshold: float
+    ) -> Optional[PendingArticle]:
+        """在尚未落库的同批条目中查找近似重复标题。"""
+        normalized = normalize_text(title_zh)
+        for item in self.pending.values():
+            if published_at and item.published_at and item.published_at.date() != published_at.date():
+                continue
+            if similarity(normalize_text(item.title_zh), normalized) >= threshold:
+                return item
+        return None
+
+    def flush(self, session: Session, extra: Iterable[SQLModel] = ()) -> dict[str, int]:
+        """写入全部待入库条目及 extra 对象并提交，返回新插入的 url -> id。"""
+        inserted: dict[str, int] = {}
+        items = list(self.pending.values())
+        if items:
+            statement = (
+                dialect_insert(session, Article)
+                .values(
+                    [
+                        {
+                            "source_id": item.source_id,
+                            "url": item.url,
+                            "title_orig": item.title_orig,
+                            "summary_orig": item.summary_orig,
+                            "lang_orig": item.lang_orig,
+                            "published_at": item.published_at,
+                            "fetched_at": item.fetched_at,
+                        }
+                        for item in items
+                    ]
+                )
+                .on_conflict_do_nothing(index_elements=["url"])
+                .returning(Article.id, Article.url)
+            )
+            inserted = {url: article_id for article_id, url in session.execute(statement).all()}
+
+            enriched_rows = []
+            topic_rows = []
+            job_rows = []
+            for item in items:
+                article_id = inserted.get(item.url)
+                if article_id is None:
+                    continue
+                enriched_rows.append(
+                    {
+                        "article_id": article_id,
+                        "title_zh": item.title_zh,
+                        "summary_zh": item.summary_zh,
+                        "finance_score": item.finance_score,
+                        "relevance_label": item.relevance_label,
+                        "dedupe_key": item.dedupe_key,
+                        "is_primary_lang": item.is_primary_lang,
+                        "enrich_status": "pending" if item.enrich_steps else "done",
+                    }
+                )
+                topic_rows.extend({"article_id": article_id, "topic_id": topic_id} for topic_id in item.topic_ids)
+                if item.enrich_steps:
+                    job_rows.append(
+                        {
+                            "article_id": article_id,
+                            "kind": item.enrich_steps[0],
+                            "remaining": ",".join(item.enrich_steps[1:]),
+                            "available_at": item.fetched_at,
+                            "created_at": item.fetched_at,
+                            "updated_at": item.fetched_at,
+                        }
+                    )
+            if enriched_rows:
+                session.execute(dialect_insert(session, ArticleEnriched).values(enriched_rows).on_conflict_do_nothing())
+            if topic_rows:
+                session.execute(dialect_insert(session, ArticleTopic).values(topic_rows).on_conflict_do_nothing())
+            if job_rows:
+                session.execute(dialect_insert(session, EnrichJob).values(job_rows))
+            skipped = len(items) - len(inserted)
+            if skipped:
+                logger.info("批量写入跳过 %s 条已存在的 URL", skipped)
+
+        if self._demote:
+            session.execute(
+                update(ArticleEnriched)
+                .where(ArticleEnriched.article_id.in_(self._demote))
+                .values(is_primary_lang=False)
+            )
+
+        for obj in extra:
+            session.add(obj)
+        session.commit()
+        self.pending.clear()
+        self._demote.clear()
+        return inserted
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from typing import Optional
+
+from sqlalchemy import func, or_, update
+from sqlmodel import Session, select
+
+from ..config import settings
+from ..database import engine
+from ..models import AnalysisJob, Article, ArticleEnriched, ArticleTopic
+from ..services.llm import llm_client, split_batches
+from ..services.summarize import estimate_tokens, extractive_summary
+from .enrich import FULL_TEXT_MARKER
+
+logger = logging.getLogger(__name__)
+
+ERROR_MAX_CHARS = 500
+EMPTY_RESULT = "所选范围内没有可分析的文章。"
+# 运行中的任务每 HEARTBEAT_SECONDS 续约一次，LEASE_SECONDS 内没有续约视为所在进程已退出
+LEASE_SECONDS = 90
+HEARTBEAT_SECONDS = 20
+INTERRUPTED_ERROR = "运行任务的进程已退出，任务中断，请重新提交"
+
+
+@dataclass
+class AnalysisItem:
+    article_id: int
+    day: date
+    text: str
+    tokens: int
+
+
+def _item(article: Article, enriched: ArticleEnriched) -> AnalysisItem:
+    """用已入库的中文标题与摘要（不再发送原文），摘要先在本地压缩到 ANALYSIS_ITEM_TOKENS。"""
+    published = article.published_at or article.fetched_at
+    title = enriched.title_zh or article.title_orig
+    summary = (enriched.summary_zh or "").replace(FULL_TEXT_MARKER, "").strip()
+    summary = extractive_summary(summary, settings.analysis.item_tokens, title).replace("\n", " ")
+    text = f"({published:%Y-%m-%d}) {title}：{summary}" if summary else f"({published:%Y-%m-%d}) {title}"
+    return AnalysisItem(article.id, published.date(), text, estimate_tokens(text))
+
+
+def _select_articles(session: Session, job: AnalysisJob) -> list[tuple[Article, ArticleEnriched]]:
+    statement = (
+        select(Article, ArticleEnriched)
+        .join(ArticleEnriched, ArticleEnriched.article_id == Article.id)
+        .where(ArticleEnriched.relevance_label != "irrelevant")
+    )
+    if job.article_ids_json:
+        statement = statement.where(Article.id.in_(json.loads(job.article_ids_json)))
+    else:
+        published = func.coalesce(Article.published_at, Article.fetched_at)
+        statement = (
+            statement.join(ArticleTopic, ArticleTopic.article_id == Article.id)
+            .where(ArticleTopic.topic_id == job.topic_id)
+            # 同一事件的多语言版本只取主版本
+            .where(ArticleEnriched.is_primary_lang == True)  # noqa: E712
+            .where(published >= job.since, published <= job.until)
+        )
+    statement = statement.order_by(Article.published_at.desc()).limit(settings.analysis.max_articles)
+    return session.exec(statement).all()
+
+
+def chunk_items(items: list[AnalysisItem]) -> list[list[AnalysisItem]]:
+    """
+    先按发布日期分组，再在每天内按 token 预算切块。
+
+    两次分析的文章集合有重叠时（例如时间窗口向后滑动），完整的那几天切出的分块
+    内容完全相同，直接命中 LLM 缓存，只有边界上的分块需要重新请求。
+    """
+    chunks: list[list[AnalysisItem]] = []
+    ordered = sorted(items, key=lambda item: (item.day, item.article_id))
+    for _, group in groupby(ordered, key=lambda item: item.day):
+        day_items = list(group)
+        for batch in split_batches(
+            [item.tokens for item in day_items],
+            settings.analysis.chunk_tokens,
+            settings.analysis.chunk_max_articles,
+        ):
+            chunks.append([day_items[i] for i in batch])
+    return chunks
+
+
+def lease_deadline() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)
+
+
+def _update(job_id: int, owner: str, **values) -> bool:
+    """只更新仍归 owner 所有、尚未结束的任务；任务已被判定中断时返回 False。"""
+    with Session(engine) as session:
+        result = session.exec(
+            update(AnalysisJob)
+            .where(
+                AnalysisJob.id == job_id,
+                AnalysisJob.owner == owner,
+                AnalysisJob.status.in_(["pending", "running"]),
+            )
+            .values(**values)
+        )
+        session.commit()
+        return bool(result.rowcount)
+
+
+def _prepare(job_id: int, owner: str) -> list[list[AnalysisItem]]:
+    with Session(engine) as session:
+        job = session.get(AnalysisJob, job_id)
+        items = [_item(article, enriched) for article, enriched in _select_articles(session, job)]
+    chunks = chunk_items(items)
+    _update(
+        job_id,
+        owner,
+        status="running",
+        article_count=len(items),
+        total_chunks=len(chunks),
+        done_chunks=0,
+        lease_until=lease_deadline(),
+    )
+    return chunks
+
+
+def _chunk_done(job_id: int, owner: str) -> None:
+    _update(job_id, owner, done_chunks=AnalysisJob.done_chunks + 1)
+
+
+class AnalysisRunner:
+    """
+    map-reduce 分析任务：文章按天、按 token 预算切块后并发分析（map，
+    并发受 ANALYSIS_CONCURRENCY 与 LLM 客户端全局并发共同限制），
+    再把各块结果合并（reduce），块数较多时逐层合并。
+    每次 LLM 调用都经过响应缓存，重复或重叠的分析只为新分块付费。
+
+    任务在提交它的进程里运行，记录 owner 并定期续约（lease_until）；
+    其它进程只把租约过期的任务判定为中断（fail_interrupted_jobs）。
+    """
+
+    def __init__(self) -> None:
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._tasks: set[asyncio.Task] = set()
+
+    def start(self, job_id: int) -> None:
+        task = asyncio.create_task(self.run(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _heartbeat(self, job_id: int) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            try:
+                await asyncio.to_thread(_update, job_id, self.owner, lease_until=lease_deadline())
+            except Exception as exc:
+                logger.warning("分析任务 %s 续约失败: %s", job_id, exc)
+
+    async def run(self, job_id: int) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            chunks = await asyncio.to_thread(_prepare, job_id, self.owner)
+            if not chunks:
+                result = EMPTY_RESULT
+            else:
+                sem = asyncio.Semaphore(settings.analysis.concurrency)
+                partials = await asyncio.gather(*(self._map(job_id, chunk, sem) for chunk in chunks))
+                result = await self._reduce(list(partials), sem)
+        except Exception as exc:
+            logger.exception("分析任务 %s 失败", job_id)
+            await asyncio.to_thread(
+                _update,
+                job_id,
+                self.owner,
+                status="failed",
+                error=str(exc)[:ERROR_MAX_CHARS],
+                finished_at=datetime.utcnow(),
+            )
+            return
+        finally:
+            heartbeat.cancel()
+        saved = await asyncio.to_thread(
+            _update,
+            job_id,
+            self.owner,
+            status="done",
+            model=llm_client.model,
+            result_text=result,
+            finished_at=datetime.utcnow(),
+        )
+        if saved:
+            logger.info("分析任务 %s 完成: %s 个分块", job_id, len(chunks))
+        else:
+            logger.warning("分析任务 %s 已被判定中断，丢弃本次结果", job_id)
+
+    async def _map(self, job_id: int, chunk: list[AnalysisItem], sem: asyncio.Semaphore) -> str:
+        async with sem:
+            result = await llm_client.aanalyze_chunk([item.text for item in chunk])
+        await asyncio.to_thread(_chunk_done, job_id, self.owner)
+        return result
+
+    async def _reduce(self, partials: list[str], sem: asyncio.Semaphore) -> str:
+        while len(partials) > 1:
+            groups = split_batches(
+                [estimate_tokens(text) for text in partials], settings.analysis.chunk_tokens, len(partials)
+            )
+            if len(groups) >= len(partials):
+                # 每块结果都超出预算时两两合并，保证逐层收敛
+                groups = [list(range(i, min(i + 2, len(partials)))) for i in range(0, len(partials), 2)]
+            partials = await asyncio.gather(*(self._merge([partials[i] for i in group], sem) for group in groups))
+        return partials[0]
+
+    async def _merge(self, partials: list[str], sem: asyncio.Semaphore) -> str:
+        if len(partials) == 1:
+            return partials[0]
+        async with sem:
+            return await llm_client.areduce_analyses(partials)
+
+
+def fail_interrupted_jobs(job_id: Optional[int] = None) -> int:
+    """
+    把租约已过期（所在进程已退出）的未完成任务标记为失败；仍在续约的任务不受影响，
+    无论它运行在哪个进程。重新提交时已完成的分块会命中缓存。
+    """
+    now = datetime.utcnow()
+    statement = update(AnalysisJob).where(
+        AnalysisJob.status.in_(["pending", "running"]),
+        or_(AnalysisJob.lease_until == None, AnalysisJob.lease_until < now),  # noqa: E711
+    )
+    if job_id is not None:
+        statement = statement.where(AnalysisJob.id == job_id)
+    with Session(engine) as session:
+        result = session.exec(statement.values(status="failed", error=INTERRUPTED_ERROR, finished_at=now))
+        session.commit()
+        return result.rowcount or 0
+
+
+def default_window(since: Optional[datetime], until: Optional[datetime]) -> tuple[datetime, datetime]:
+    until = until or datetime.utcnow()
+    return since or until - timedelta(hours=settings.analysis.default_hours), until
+
+
+analysis_runner = AnalysisRunner()
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Union
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from ..config import settings
+from ..database import engine
+from ..models import Article, ArticleEnriched, Source
+from ..services.crawler import fetch_article_content_async
+from ..services.dedupe import build_dedupe_key, dedupe_index
+from ..services.enrich_queue import LeasedJob, enrich_queue
+from ..services.llm import llm_client
+from ..services.summarize import estimate_tokens, extractive_summary
+from .fetch import _find_similar_enriched
+
+logger = logging.getLogger(__name__)
+
+FULL_TEXT_MARKER = "[Full Text Fetched]"
+
+
+@dataclass
+class EnrichContext:
+    article_id: int
+    url: str
+    lang: str
+    title: str
+    summary: Optional[str]
+    published_at: Optional[datetime]
+    # relevance_label 为 pending 表示规则分数处于边界，仍需 LLM 复核
+    needs_classify: bool = False
+
+
+def _load_contexts(article_ids: list[int]) -> dict[int, EnrichContext]:
+    with Session(engine) as session:
+        rows = session.exec(
+            select(Article, Source.lang, ArticleEnriched.relevance_label)
+            .join(Source, Source.id == Article.source_id, isouter=True)
+            .join(ArticleEnriched, ArticleEnriched.article_id == Article.id, isouter=True)
+            .where(Article.id.in_(article_ids))
+        ).all()
+        return {
+            article.id: EnrichContext(
+                article_id=article.id,
+                url=article.url,
+                lang=lang or article.lang_orig,
+                title=article.title_orig,
+                summary=article.summary_orig,
+                published_at=article.published_at,
+                needs_classify=label == "pending",
+            )
+            for article, lang, label in rows
+        }
+
+
+def _save(article_id: int, article_values: Optional[dict] = None, enriched_values: Optional[dict] = None) -> None:
+    with Session(engine) as session:
+        if article_values:
+            session.exec(update(Article).where(Article.id == article_id).values(**article_values))
+        if enriched_values:
+            session.exec(
+                update(ArticleEnriched).where(ArticleEnriched.article_id == article_id).values(**enriched_values)
+            )
+        session.commit()
+
+
+def _save_translation(
+    ctx: EnrichContext, title_zh: str, summary_zh: Optional[str], extra: Optional[dict] = None
+) -> None:
+    """写入译文并按中文标题去重；同一事件已有版本时本条不再作为主语言版本。"""
+    dedupe_index.remove(ctx.article_id)
+    dedupe_key = build_dedupe_key(title_zh, ctx.published_at)
+    with Session(engine) as session:
+        existing = _find_similar_enriched(session, title_zh, ctx.published_at)
+    if existing is not None and existing.article_id != ctx.article_id:
+        dedupe_key = existing.dedupe_key
+    else:
+        existing = None
+    _save(
+        ctx.article_id,
+        enriched_values={
+            "title_zh": title_zh,
+            "summary_zh": summary_zh,
+            "dedupe_key": dedupe_key,
+            "is_primary_lang": existing is None,
+            **(extra or {}),
+        },
+    )
+    dedupe_index.add(ctx.article_id, title_zh, ctx.published_at, dedupe_key)
+
+
+def _condense(ctx: EnrichContext) -> tuple[Optional[str], dict]:
+    """
+    送入 LLM 前在本地压缩摘要：RSS 摘要原样保留，抓到的正文用抽取式摘要
+    缩到 LLM_INPUT_TOKENS 预算内；返回压缩后的文本和要记录的预算/token 数。
+    """
+    budget = settings.llm.input_tokens
+    text = ctx.summary
+    if not text or budget <= 0:
+        return text, {"input_budget": None, "input_tokens": estimate_tokens(text or "")}
+    if FULL_TEXT_MARKER in text:
+        lead, body = text.split(FULL_TEXT_MARKER, 1)
+        lead = lead.strip()
+        body_budget = max(budget - estimate_tokens(lead), budget // 4)
+        condensed = extractive_summary(body.strip(), body_budget, ctx.title)
+        text = f"{lead}\n\n{condensed}" if lead else condensed
+    else:
+        text = extractive_summary(text, budget, ctx.title)
+    return text, {"input_budget": budget, "input_tokens": estimate_tokens(text)}
+
+
+# 步骤结果：True 表示后续步骤不必再执行，异常表示该条需要重试
+StepOutcome = Union[bool, BaseException]
+
+
+class EnrichmentWorker:
+    """
+    后台补全 worker：从 EnrichJob 队列租用一批任务，依次执行各步骤
+    （外文默认 crawl → enrich；LLM_SINGLE_CALL=false 时为 classify / crawl / translate）。
+
+    同一批里处于相同步骤的文章一起处理：分类和翻译合并成批量 LLM 请求
+    （LLMClient.aclassify_batch / atranslate_batch，并发与限速由 LLM 客户端统一控制），
+    抓正文按 crawl_workers 并发。
+    LLM 暂时不可用时任务按退避重试，不会阻塞新文章入库。
+    """
+
+    def __init__(self) -> None:
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._draining = False
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+        self._crawl_sem: Optional[asyncio.Semaphore] = None
+
+    async def drain(self, max_jobs: Optional[int] = None) -> int:
+        """处理到队列里没有到期任务为止（或达到 max_jobs），返回处理的任务数。"""
+        if self._draining or self._stopping:
+            return 0
+        self._draining = True
+        self._crawl_sem = asyncio.Semaphore(settings.pipeline.crawl_workers)
+        processed = 0
+        try:
+            await asyncio.to_thread(enrich_queue.reap_expired)
+            while (max_jobs is None or processed < max_jobs) and not self._stopping:
+                limit = settings.enrich.batch_size
+                if max_jobs is not None:
+                    limit = min(limit, max_jobs - processed)
+                jobs = await asyncio.to_thread(enrich_queue.lease, self.owner, limit)
+                if not jobs:
+                    break
+                await self._process_batch(jobs)
+                processed += len(jobs)
+        finally:
+            self._draining = False
+        if processed:
+            logger.info("补全队列本轮处理 %s 个任务", processed)
+        return processed
+
+    async def shutdown(self, timeout: float) -> None:
+        """不再租用新的批次，等待当前批次完成；超时未完成的任务在租约过期后重新被租用。"""
+        self._stopping = True
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self._draining and loop.time() < deadline:
+            await asyncio.sleep(0.2)
+
+    def kick(self) -> None:
+        """在当前事件循环里安排一次 drain（已在运行时忽略）。"""
+        if not self._draining:
+            self._task = asyncio.get_running_loop().create_task(self.drain())
+
+    async def _process_batch(self, jobs: list[LeasedJob]) -> None:
+        contexts = await asyncio.to_thread(_load_contexts, [job.article_id for job in jobs])
+        active: list[tuple[LeasedJob, EnrichContext]] = []
+        for job in jobs:
+            ctx = contexts.get(job.article_id)
+            if ctx is None:
+                # 文章已被清理
+                await asyncio.to_thread(enrich_queue.complete, job, self.owner)
+            else:
+                active.append((job, ctx))
+
+        while active:
+            groups: dict[str, list[tuple[LeasedJob, EnrichContext]]] = {}
+            for job, ctx in active:
+                groups.setdefault(job.kind, []).append((job, ctx))
+            outcomes = await asyncio.gather(
+                *(self._run_step(kind, [ctx for _, ctx in group]) for kind, group in groups.items())
+            )
+            active = []
+            for group, results in zip(groups.values(), outcomes):
+                for (job, ctx), outcome in zip(group, results):
+                    if isinstance(outcome, BaseException):
+                        logger.warning("补全任务 %s (%s) 失败: %s", job.id, job.kind, outcome)
+                        error = str(outcome) or type(outcome).__name__
+                        await asyncio.to_thread(enrich_queue.retry, job, self.owner, error)
+                    elif outcome or not job.remaining:
+                        await asyncio.to_thread(enrich_queue.complete, job, self.owner)
+                    elif await asyncio.to_thread(enrich_queue.advance, job, self.owner, job.remaining):
+                        active.append((job, ctx))
+                    else:
+                        logger.warning("补全任务 %s 租约已失效，交给其它 worker", job.id)
+
+    async def _run_step(self, kind: str, contexts: list[EnrichContext]) -> list[StepOutcome]:
+        handler = getattr(self, f"_step_{kind}", None)
+        try:
+            if handler is None:
+                raise RuntimeError(f"未知的补全步骤: {kind}")
+            return await handler(contexts)
+        except Exception as exc:
+            # 整批失败（如 LLM 不可用）：每条都按失败处理
+            return [exc] * len(contexts)
+
+    async def _step_classify(self, contexts: list[EnrichContext]) -> list[StepOutcome]:
+        results = await llm_client.aclassify_batch([(ctx.title, ctx.summary) for ctx in contexts])
+        outcomes: list[StepOutcome] = []
+        for ctx, result in zip(contexts, results):
+            label = result.get("relevance_label", "unknown")
+            score = float(result.get("finance_score", 0.5))
+            irrelevant = label == "irrelevant" and score < 0.5
+            await asyncio.to_thread(_save, ctx.article_id, None, {"finance_score": score, "relevance_label": label})
+            if irrelevant:
+                logger.info(f"AI 判定为无关新闻，不再补全: {ctx.title[:50]}... 分数: {score}")
+            outcomes.append(irrelevant)
+        return outcomes
+
+    async def _step_enrich(self, contexts: list[EnrichContext]) -> list[StepOutcome]:
+        """单次请求同时完成分类、标题翻译与摘要（LLMClient.aenrich_batch）。"""
+        condensed = [_condense(ctx) for ctx in contexts]
+        results = await llm_client.aenrich_batch([(ctx.title, text) for ctx, (text, _) in zip(contexts, condensed)])
+        outcomes: list[StepOutcome] = []
+        for ctx, result, (_, extra) in zip(contexts, results, condensed):
+            if ctx.needs_classify:
+                extra = {**extra, "finance_score": result["finance_score"], "relevance_label": result["relevance_label"]}
+                if result["relevance_label"] == "irrelevant" and result["finance_score"] < 0.5:
+                    logger.info(f"AI 判定为无关新闻: {ctx.title[:50]}... 分数: {result['finance_score']}")
+            try:
+                await asyncio.to_thread(
+                    _save_translation, ctx, result["title_zh"] or ctx.title, result["summary_zh"], extra
+                )
+                outcomes.append(False)
+            except Exception as exc:
+                outcomes.append(exc)
+        return outcomes
+
+    async def _step_crawl(self, contexts: list[EnrichContext]) -> list[StepOutcome]:
+        return await asyncio.gather(*(self._crawl_one(ctx) for ctx in contexts), return_exceptions=True)
+
+    async def _crawl_one(self, ctx: EnrichContext) -> bool:
+        if ctx.summary and FULL_TEXT_MARKER in ctx.summary:
+            # 上次已写入正文但没来得及记录进度
+            return False
+        async with self._crawl_sem:
+            full_text = await fetch_article_content_async(ctx.url)
+        if not full_text or len(full_text) <= 100:
+            return False
+        if ctx.summary:
+            ctx.summary = f"{ctx.summary}\n\n{FULL_TEXT_MARKER}\n{full_text}"
+        else:
+            ctx.summary = full_text
+        # 中文文章的 summary_zh 就是原文摘要（含正文）
+        enriched_values = {"summary_zh": ctx.summary} if ctx.lang == "zh" else None
+        await asyncio.to_thread(_save, ctx.article_id, {"summary_orig": ctx.summary}, enriched_values)
+        return False
+
+    async def _step_translate(self, contexts: list[EnrichContext]) -> list[StepOutcome]:
+        # 标题和摘要放进同一组批量请求
+        condensed = [_condense(ctx) for ctx in contexts]
+        texts = [ctx.title for ctx in contexts] + [text for text, _ in condensed]
+        translated = await llm_client.atranslate_batch(texts)
+        outcomes: list[StepOutcome] = []
+        for n, ctx in enumerate(contexts):
+            title_zh, summary_zh = translated[n], translated[len(contexts) + n]
+            try:
+                await asyncio.to_thread(_save_translation, ctx, title_zh or ctx.title, summary_zh, condensed[n][1])
+                outcomes.append(False)
+            except Exception as exc:
+                outcomes.append(exc)
+        return outcomes
+
+
+enrich_worker = EnrichmentWorker()
@@ -1,22 +1,33 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Iterable, Optional, Tuple
+from typing import Optional, Union
 
-from sqlmodel import Session, select, delete
+from sqlmodel import Session, or_, select, delete
 
-from ..models import Article, ArticleEnriched, ArticleTopic, FetchRun, Source, Topic
-from ..services.dedupe import build_dedupe_key, normalize_text, similarity
-from ..services.filter import rule_score, should_use_llm
-from ..services.llm import llm_client
-from ..services.rss import parse_feed
-from ..services.crawler import fetch_article_content
+from ..config import settings
+from ..database import engine, optimize_storage
+from ..models import Article, ArticleEnriched, ArticleTopic, EnrichJob, FeedState, FetchRun, Source, Topic
+from ..services.dedupe import build_dedupe_key, dedupe_index
+from ..services.filter import KeywordMatcher, matcher_for, should_use_llm
+from ..services.polling import history_rate, poll_policy, serves_core
+from ..services.rss import FeedResult, download_feed_async, parse_feed_content
+from ..services.seen import seen_urls
+from ..services.writer import ArticleBatchWriter, PendingArticle
+from .pipeline import Pipeline
 
 logger = logging.getLogger(__name__)
 
 RECENT_DAYS = 3
 SIMILARITY_THRESHOLD = 0.75
+URL_LOOKUP_CHUNK = 500
+CLEANUP_CHUNK = 500
+CLEANUP_PAUSE_SECONDS = 0.05
+VACUUM_THRESHOLD = 1000
 
 
 def _split_keywords(raw: str) -> list[str]:
@@ -30,193 +41,551 @@ def _recent_cutoff() -> datetime:
 
 
 def cleanup_old_articles(session: Session) -> int:
+    """分批删除过期文章，每批单独提交并短暂让出写锁，避免长事务阻塞抓取。"""
     cutoff = _recent_cutoff()
-    old_articles = session.exec(select(Article).where(Article.published_at < cutoff)).all()
     removed = 0
-    for article in old_articles:
-        session.exec(delete(ArticleEnriched).where(ArticleEnriched.article_id == article.id))
-        session.exec(delete(ArticleTopic).where(ArticleTopic.article_id == article.id))
-        session.delete(article)
-        removed += 1
-    session.commit()
+    while True:
+        ids = session.exec(
+            select(Article.id).where(Article.published_at < cutoff).order_by(Article.id).limit(CLEANUP_CHUNK)
+        ).all()
+        if not ids:
+            break
+        session.exec(delete(ArticleEnriched).where(ArticleEnriched.article_id.in_(ids)))
+        session.exec(delete(ArticleTopic).where(ArticleTopic.article_id.in_(ids)))
+        session.exec(delete(EnrichJob).where(EnrichJob.article_id.in_(ids)))
+        session.exec(delete(Article).where(Article.id.in_(ids)))
+        session.commit()
+        removed += len(ids)
+        time.sleep(CLEANUP_PAUSE_SECONDS)
+    if removed:
+        logger.info("已清理 %s 条过期文章", removed)
+        warm_seen_urls(session)
+        optimize_storage(vacuum=removed >= VACUUM_THRESHOLD)
+    dedupe_index.prune(cutoff)
     return removed
 
 
+def warm_seen_urls(session: Session) -> None:
+    """从 article 表重建进程内 URL 索引（启动时与清理后调用）。"""
+    seen_urls.rebuild(session.exec(select(Article.url)).all())
+
+
+def _known_urls(session: Session, urls: list[str]) -> set[str]:
+    """只对索引中可能命中的 URL 做批量 IN 查询确认。"""
+    candidates = seen_urls.maybe_seen(dict.fromkeys(urls))
+    known: set[str] = set()
+    for i in range(0, len(candidates), URL_LOOKUP_CHUNK):
+        chunk = candidates[i : i + URL_LOOKUP_CHUNK]
+        known.update(session.exec(select(Article.url).where(Article.url.in_(chunk))).all())
+    return known
+
+
 def _find_similar_enriched(
     session: Session, title_zh: str, published_at: Optional[datetime]
 ) -> Optional[ArticleEnriched]:
-    normalized = normalize_text(title_zh)
-    cutoff = _recent_cutoff()
-    statement = (
-        select(ArticleEnriched, Article)
-        .join(Article, Article.id == ArticleEnriched.article_id)
-        .where(Article.published_at >= cutoff)
+    match = dedupe_index.find_similar(
+        title_zh, published_at, SIMILARITY_THRESHOLD, not_before=_recent_cutoff()
     )
-    for enriched, article in session.exec(statement).all():
-        if published_at and article.published_at:
-            if article.published_at.date() != published_at.date():
-                continue
-        score = similarity(normalize_text(enriched.title_zh), normalized)
-        if score >= SIMILARITY_THRESHOLD:
-            return enriched
-    return None
+    if not match:
+        return None
+    enriched = session.get(ArticleEnriched, match[0])
+    if enriched is None:
+        dedupe_index.remove(match[0])
+    return enriched
 
 
-def _should_keep(title: str, summary: Optional[str], keywords: Iterable[str]) -> Tuple[bool, float, str]:
-    score = rule_score(title, summary, keywords)
-    if score < 0.3:
-        return False, score, "irrelevant"
-    if should_use_llm(score):
-        try:
-            result = llm_client.classify_finance(title, summary)
-            label = result.get("relevance_label", "unknown")
-            llm_score = float(result.get("finance_score", score))
-            if label == "irrelevant" and llm_score < 0.5:
-                return False, llm_score, label
-            return True, llm_score, label
-        except Exception as e:
-            logger.warning(f"AI 筛选暂时不可用 (Key 缺失或网络错误): {e}. 降级为规则匹配。")
-            return True, score, "relevant"
-    return True, score, "relevant"
-
-
-def _translate_if_needed(lang: str, title: str, summary: Optional[str]) -> Tuple[str, Optional[str]]:
-    if lang == "zh":
-        return title, summary
-    try:
-        title_zh = llm_client.translate_to_zh(title)
-        summary_zh = llm_client.translate_to_zh(summary or "") if summary else None
-        return title_zh, summary_zh
-    except Exception as e:
-        logger.warning(f"AI 翻译不可用: {e}. 返回原文。")
-        return title, summary
+def warm_dedupe_index(session: Session) -> None:
+    """从最近 RECENT_DAYS 的已翻译标题重建近似去重索引（尚未翻译的外文标题不参与）。"""
+    statement = (
+        select(ArticleEnriched.article_id, ArticleEnriched.title_zh, ArticleEnriched.dedupe_key, Article.published_at)
+        .join(Article, Article.id == ArticleEnriched.article_id)
+        .where(Article.published_at >= _recent_cutoff())
+        .where(or_(Article.lang_orig == "zh", ArticleEnriched.enrich_status == "done"))
+    )
+    dedupe_index.clear()
+    rows = session.exec(statement).all()
+    for article_id, title_zh, dedupe_key, published_at in rows:
+        dedupe_index.add(article_id, title_zh, published_at, dedupe_key)
+    logger.info("已载入 %s 条标题到近似去重索引", len(rows))
+
+
+def warm_indexes() -> None:
+    """进程启动时重建进程内的 URL 索引与近似去重索引（API 与独立 worker 共用）。"""
+    with Session(engine) as session:
+        warm_seen_urls(session)
+        warm_dedupe_index(session)
+
+
+def enrich_steps(lang: str, score: float) -> list[str]:
+    """
+    入库后需要后台补全的步骤。外文默认先抓正文，再用一次 LLM 请求完成
+    复核、标题翻译与摘要（enrich）；中文只在分数处于边界时让 LLM 复核。
+    LLM_SINGLE_CALL=false 时外文按 classify → crawl → translate 逐项请求。
+    """
+    needs_classify = should_use_llm(score)
+    if lang != "zh" and settings.llm.single_call:
+        return ["crawl", "enrich"]
+    steps = ["classify"] if needs_classify else []
+    steps.append("crawl")
+    if lang != "zh":
+        steps.append("translate")
+    return steps
 
 
 def _ensure_primary_lang(
-    session: Session, existing: Optional[ArticleEnriched], new_lang: str
+    writer: ArticleBatchWriter,
+    existing: Optional[Union[ArticleEnriched, PendingArticle]],
+    new_lang: str,
 ) -> bool:
     if not existing:
         return True
     if new_lang == "zh" and not existing.is_primary_lang:
         return True
     if new_lang == "zh":
-        existing.is_primary_lang = False
-        session.add(existing)
+        # 已入库的记录交给 writer 在同一事务里更新，避免提前触发 autoflush 占用写锁
+        if isinstance(existing, ArticleEnriched):
+            writer.demote(existing.article_id)
+        else:
+            existing.is_primary_lang = False
         return True
     return False
 
 
-def fetch_for_topic(session: Session, topic: Topic) -> int:
-    sources = session.exec(select(Source).where(Source.enabled == True)).all()  # noqa: E712
-    entries_added = 0
-    keywords = _split_keywords(topic.keywords)
-
-    for source in sources:
-        if source.topic_id and source.topic_id != topic.id:
-            continue
-
-        run = FetchRun(topic_id=topic.id, source_id=source.id, status="running")
-        session.add(run)
-        session.commit()
-
-        try:
-            feed_entries = parse_feed(source.url)
-            logger.info(f"源 {source.name} 找到 {len(feed_entries)} 条原始条目")
-            for entry in feed_entries:
-                url = entry.get("link") or ""
-                if not url:
-                    continue
-                exists = session.exec(select(Article).where(Article.url == url)).first()
-                if exists:
-                    # logger.debug(f"跳过已存在的新闻: {url}")
-                    continue
-
-                title = entry.get("title", "").strip()
-                summary = (entry.get("summary") or "").strip() or None
-                if not title:
-                    continue
-
-                if source.topic_id is None and keywords:
-                    text_blob = (f"{title} {summary or ''}").lower()
-                    if not any(kw.lower() in text_blob for kw in keywords):
-                        logger.info(f"跳过不相关的新闻 (无关键词): {title[:50]}...")
-                        continue
-
-                keep, finance_score, label = _should_keep(title, summary, keywords)
-                if not keep:
-                    logger.info(f"跳过被 AI 或规则过滤的新闻: {title[:50]}... 分数: {finance_score}")
-                    continue
-
-                logger.info(f"✅ 准备存入新闻: {title[:50]}... 来源: {source.name}")
-
-                published_at = entry.get("published") or datetime.utcnow()
-                
-                # Try to fetch full content
-                try:
-                    full_text = fetch_article_content(url)
-                    if full_text and len(full_text) > 100:
-                        # Append full text to summary
-                        if summary:
-                            summary = f"{summary}\n\n[Full Text Fetched]\n{full_text}"
-                        else:
-                            summary = full_text
-                except Exception as e:
-                    logger.warning(f"Failed to fetch content for {url}: {e}")
-
-                title_zh, summary_zh = _translate_if_needed(source.lang, title, summary)
-                dedupe_key = build_dedupe_key(title_zh, published_at)
-
-                existing = _find_similar_enriched(session, title_zh, published_at)
-                if existing:
-                    dedupe_key = existing.dedupe_key
-
-                is_primary = _ensure_primary_lang(session, existing, source.lang)
-
-                article = Article(
+def _match_topics(
+    source: Source, topics: list[Topic], matcher: KeywordMatcher, topic_hits: dict[int, int]
+) -> list[Topic]:
+    if source.topic_id:
+        return [topic for topic in topics if topic.id == source.topic_id]
+    return [topic for topic in topics if topic.id in topic_hits or not matcher.has_keywords(topic.id)]
+
+
+def _update_feed_state(state: FeedState, result: FeedResult) -> None:
+    now = datetime.utcnow()
+    state.checked_at = now
+    # 304 或正文哈希未变时服务器仍可能换了 ETag / Last-Modified（迁移后的首轮可能还没有
+    # content_hash），同样记下新值，下次才能直接拿到 304
+    if result.not_modified or result.content_hash:
+        state.etag = result.etag
+        state.last_modified = result.last_modified
+    if result.not_modified or not result.content_hash:
+        return
+    state.content_hash = result.content_hash
+    state.changed_at = now
+
+
+@dataclass
+class SourceJob:
+    """一个源在本轮抓取中的上下文；所有条目处理完（保留或丢弃）后整批写库。"""
+
+    source: Source
+    state: FeedState
+    run: FetchRun
+    result: Optional[FeedResult] = None
+    writer: ArticleBatchWriter = field(default_factory=ArticleBatchWriter)
+    in_flight: int = 0
+    parsed: bool = False
+    finished: bool = False
+    added: int = 0
+    # 通过过滤的新条目：被过滤掉的条目不入库，下次抓取仍是"新"URL，不能计入更新速率
+    new_entries: int = 0
+
+
+@dataclass
+class EntryItem:
+    job: SourceJob
+    url: str
+    title: str
+    summary: Optional[str]
+    published_at: datetime
+    topic_ids: list[int]
+    finance_score: float = 0.0
+
+
+@dataclass
+class FetchProgress:
+    """
+    一次抓取任务的实时进度。cancelled 置位后流水线不再抓取新的源、不再处理新条目，
+    已抓到但未落库的源直接丢弃（不更新 FeedState，下次照常抓取）。
+    """
+
+    run_id: Optional[int] = None
+    # 所有进行中的任务共享：正在被抓取的源，避免并发任务重复抓同一个源
+    busy_sources: set[int] = field(default_factory=set)
+    source_ids: list[int] = field(default_factory=list)
+    sources_total: int = 0
+    sources_done: int = 0
+    entries: int = 0
+    added: int = 0
+    skipped: int = 0
+    cancelled: bool = False
+
+    def claim(self, sources: list[Source]) -> list[Source]:
+        """认领尚未被其它任务抓取的源。"""
+        kept = [source for source in sources if source.id not in self.busy_sources]
+        self.source_ids = [source.id for source in kept]
+        self.busy_sources.update(self.source_ids)
+        self.sources_total = len(kept)
+        return kept
+
+    def release(self) -> None:
+        self.busy_sources.difference_update(self.source_ids)
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            "sources_total": self.sources_total,
+            "sources_done": self.sources_done,
+            "entries": self.entries,
+            "added": self.added,
+            "skipped": self.skipped,
+        }
+
+
+@dataclass
+class IngestResult:
+    added: int
+    sources: int
+    stats: dict[str, dict]
+
+
+class IngestRun:
+    """
+    一轮抓取的分阶段流水线：fetch → parse → filter → persist。
+
+    阶段之间用有界队列连接，各阶段并发数独立配置（settings.pipeline）。
+    网络阶段走共享的 AsyncClient，阻塞的 CPU / 数据库调用放到线程里。
+    这里只做规则过滤，文章带原文标题和摘要立即入库；抓正文、LLM 复核与
+    翻译作为 EnrichJob 与文章同一事务写入，由后台补全 worker（tasks/enrich.py）完成。
+    persist 只有一个 worker，本轮内的批量写入依次进行；其它抓取任务、补全 worker 和 API
+    仍会同时写库，并发写入靠 WAL 与 busy_timeout 排队（见 database.py），而不是靠这里串行。
+    """
+
+    def __init__(
+        self,
+        topics: list[Topic],
+        sources: list[Source],
+        states: dict[int, FeedState],
+        progress: Optional[FetchProgress] = None,
+    ):
+        self.topics = topics
+        self.progress = progress or FetchProgress()
+        # 所有主题关键词与规则权重表编译成一个自动机，主题未变时复用
+        self.matcher = matcher_for({topic.id: _split_keywords(topic.keywords) for topic in topics})
+        cfg = settings.pipeline
+        self.pipeline = Pipeline(cfg.queue_size)
+        self.fetch_q = self.pipeline.queue()
+        self.parse_q = self.pipeline.queue()
+        self.filter_q = self.pipeline.queue()
+        self.persist_q = self.pipeline.queue()
+        self.pipeline.add_stage("fetch", self._fetch, self.fetch_q, cfg.fetch_workers, self._job_failed)
+        self.pipeline.add_stage("parse", self._parse, self.parse_q, cfg.parse_workers, self._job_failed)
+        self.pipeline.add_stage("filter", self._filter, self.filter_q, cfg.filter_workers, self._item_failed)
+        self.pipeline.add_stage("persist", self._persist, self.persist_q, 1, self._persist_failed)
+
+        run_topic_id = topics[0].id if len(topics) == 1 else None
+        self.jobs = [
+            SourceJob(
+                source=source,
+                state=states.get(source.id) or FeedState(source_id=source.id),
+                run=FetchRun(
+                    topic_id=source.topic_id or run_topic_id,
                     source_id=source.id,
-                    url=url,
-                    title_orig=title,
-                    summary_orig=summary,
-                    lang_orig=source.lang,
-                    published_at=published_at,
-                )
-                session.add(article)
-                session.commit()
-                session.refresh(article)
-
-                enriched = ArticleEnriched(
-                    article_id=article.id,
-                    title_zh=title_zh,
-                    summary_zh=summary_zh,
-                    finance_score=finance_score,
-                    relevance_label=label,
-                    dedupe_key=dedupe_key,
-                    is_primary_lang=is_primary,
+                    status="running",
+                    parent_id=self.progress.run_id,
+                ),
+            )
+            for source in sources
+        ]
+        self._done = asyncio.Event()
+        self._remaining = len(self.jobs)
+
+    async def run(self) -> IngestResult:
+        if not self.jobs:
+            return IngestResult(added=0, sources=0, stats={})
+        self.pipeline.start()
+        try:
+            for job in self.jobs:
+                await self.fetch_q.put(job)
+            await self._done.wait()
+        finally:
+            await self.pipeline.close()
+        self.pipeline.log_stats()
+        return IngestResult(
+            added=sum(job.added for job in self.jobs),
+            sources=len(self.jobs),
+            stats=self.pipeline.stats(),
+        )
+
+    # --- 生命周期 -------------------------------------------------------
+
+    def _finish_job(self, job: SourceJob) -> None:
+        if job.finished:
+            return
+        job.finished = True
+        self.progress.sources_done += 1
+        self._remaining -= 1
+        if self._remaining == 0:
+            self._done.set()
+
+    def _release(self, job: SourceJob) -> bool:
+        """条目离开流水线（被丢弃或已加入批次）；返回该源的条目是否已全部处理完。"""
+        job.in_flight -= 1
+        return job.parsed and job.in_flight == 0
+
+    async def _drop(self, item: EntryItem) -> None:
+        """filter 阶段丢弃条目；整源处理完时交给 persist 落库。"""
+        if self._release(item.job):
+            await self.persist_q.put(item.job)
+
+    def _record_failure(self, job: SourceJob, exc: BaseException) -> None:
+        logger.error("抓取失败: %s %s", job.source.name, exc)
+        with Session(engine) as session:
+            session.add(
+                FetchRun(
+                    topic_id=job.run.topic_id,
+                    source_id=job.source.id,
+                    status="failed",
+                    started_at=job.run.started_at,
+                    finished_at=datetime.utcnow(),
+                    error=str(exc),
+                    parent_id=self.progress.run_id,
                 )
-                session.add(enriched)
-                session.add(ArticleTopic(article_id=article.id, topic_id=topic.id))
-                session.commit()
-                entries_added += 1
-
-            run.status = "success"
-            run.finished_at = datetime.utcnow()
-            session.add(run)
+            )
             session.commit()
-        except Exception as exc:  # pragma: no cover - 网络/解析异常
-            logger.exception("抓取失败: %s", exc)
-            run.status = "failed"
-            run.error = str(exc)
-            run.finished_at = datetime.utcnow()
-            session.add(run)
-            session.commit()
-
-    return entries_added
 
-
-def fetch_all(session: Session) -> int:
-    topics = session.exec(select(Topic).where(Topic.enabled == True)).all()  # noqa: E712
-    total = 0
-    for topic in topics:
-        total += fetch_for_topic(session, topic)
-    cleanup_old_articles(session)
-    return total
+    async def _job_failed(self, job: SourceJob, exc: BaseException) -> None:
+        await asyncio.to_thread(self._record_failure, job, exc)
+        self._finish_job(job)
+
+    async def _item_failed(self, item: EntryItem, exc: BaseException) -> None:
+        # 单条失败只丢弃该条，其余条目照常入库
+        await self._drop(item)
+
+    async def _persist_failed(self, item: EntryItem, exc: BaseException) -> None:
+        # persist 收到的源（SourceJob）由 _complete_source 自行处理失败，这里只会是单条失败
+        if self._release(item.job):
+            await self._complete_source(item.job)
+
+    # --- 各阶段 ---------------------------------------------------------
+
+    async def _fetch(self, job: SourceJob) -> None:
+        if self.progress.cancelled:
+            self._finish_job(job)
+            return
+        state = job.state
+        job.result = await download_feed_async(
+            job.source.url,
+            etag=state.etag,
+            last_modified=state.last_modified,
+            content_hash=state.content_hash,
+        )
+        await self.parse_q.put(job)
+
+    async def _parse(self, job: SourceJob) -> None:
+        result = job.result
+        if not result.not_modified:
+            result.entries = await asyncio.to_thread(parse_feed_content, job.source.url, result.content)
+            result.content = None
+        entries = result.entries
+        logger.info(f"源 {job.source.name} 找到 {len(entries)} 条原始条目")
+
+        known = await asyncio.to_thread(_known_urls_in_session, [e.get("link") for e in entries if e.get("link")])
+        items = []
+        queued: set[str] = set()
+        for entry in entries:
+            url = entry.get("link") or ""
+            if not url or url in known or url in queued:
+                continue
+            title = entry.get("title", "").strip()
+            summary = (entry.get("summary") or "").strip() or None
+            if not title:
+                continue
+            queued.add(url)
+            items.append(
+                EntryItem(
+                    job=job,
+                    url=url,
+                    title=title,
+                    summary=summary,
+                    published_at=entry.get("published") or datetime.utcnow(),
+                    topic_ids=[],
+                )
+            )
+
+        if self.progress.cancelled:
+            items = []
+        job.in_flight = len(items)
+        job.parsed = True
+        if not items:
+            await self.persist_q.put(job)
+            return
+        for item in items:
+            await self.filter_q.put(item)
+
+    async def _filter(self, item: EntryItem) -> None:
+        if self.progress.cancelled:
+            await self._drop(item)
+            return
+        match = self.matcher.scan(item.title, item.summary)
+        matched = _match_topics(item.job.source, self.topics, self.matcher, match.topic_hits)
+        if not matched:
+            logger.info(f"跳过不相关的新闻 (无关键词): {item.title[:50]}...")
+            self.progress.skipped += 1
+            await self._drop(item)
+            return
+
+        item.topic_ids = [topic.id for topic in matched]
+        item.finance_score = match.score(item.topic_ids)
+        if item.finance_score < 0.3:
+            logger.info(f"跳过被规则过滤的新闻: {item.title[:50]}... 分数: {item.finance_score}")
+            self.progress.skipped += 1
+            await self._drop(item)
+            return
+
+        logger.info(f"✅ 准备存入新闻: {item.title[:50]}... 来源: {item.job.source.name}")
+        item.job.new_entries += 1
+        self.progress.entries += 1
+        await self.persist_q.put(item)
+
+    async def _persist(self, payload) -> None:
+        if isinstance(payload, EntryItem):
+            await asyncio.to_thread(self._dedupe_and_stage, payload)
+            # persist 只有一个 worker：不能再往自己的有界队列里放，否则队列满时会等一个只有自己能取的位置
+            if self._release(payload.job):
+                await self._complete_source(payload.job)
+            return
+        await self._complete_source(payload)
+
+    async def _complete_source(self, job: SourceJob) -> None:
+        if job.finished:
+            return
+        try:
+            await self._flush_source(job)
+        except Exception as exc:
+            logger.exception("源 %s 落库失败", job.source.name)
+            await self._job_failed(job, exc)
+
+    async def _flush_source(self, job: SourceJob) -> None:
+        if self.progress.cancelled:
+            logger.info("抓取任务已取消，丢弃源 %s 未落库的 %s 条", job.source.name, len(job.writer.pending))
+            self._finish_job(job)
+            return
+        pending = dict(job.writer.pending)
+        inserted = await asyncio.to_thread(self._flush, job)
+        for url, article_id in inserted.items():
+            staged = pending[url]
+            seen_urls.add(url)
+            if staged.lang_orig == "zh":
+                # 外文标题翻译后再由补全 worker 加入去重索引
+                dedupe_index.add(article_id, staged.title_zh, staged.published_at, staged.dedupe_key)
+        job.added = len(inserted)
+        self.progress.added += job.added
+        self._finish_job(job)
+
+    def _dedupe_and_stage(self, item: EntryItem) -> None:
+        source = item.job.source
+        writer = item.job.writer
+        dedupe_key = build_dedupe_key(item.title, item.published_at)
+        is_primary = True
+        if source.lang == "zh":
+            existing = writer.find_similar(item.title, item.published_at, SIMILARITY_THRESHOLD)
+            if existing is None:
+                with Session(engine) as session:
+                    existing = _find_similar_enriched(session, item.title, item.published_at)
+            if existing:
+                dedupe_key = existing.dedupe_key
+            is_primary = _ensure_primary_lang(writer, existing, source.lang)
+        writer.add(
+            PendingArticle(
+                source_id=source.id,
+                url=item.url,
+                title_orig=item.title,
+                summary_orig=item.summary,
+                lang_orig=source.lang,
+                published_at=item.published_at,
+                # 翻译完成前先用原文占位，列表可以立即展示
+                title_zh=item.title,
+                summary_zh=item.summary,
+                finance_score=item.finance_score,
+                relevance_label="pending" if should_use_llm(item.finance_score) else "relevant",
+                dedupe_key=dedupe_key,
+                is_primary_lang=is_primary,
+                topic_ids=item.topic_ids,
+                enrich_steps=enrich_steps(source.lang, item.finance_score),
+            )
+        )
+
+    def _flush(self, job: SourceJob) -> dict[str, int]:
+        job.run.status = "success"
+        job.run.finished_at = datetime.utcnow()
+        job.run.entries = job.new_entries
+        job.run.added = len(job.writer.pending)
+        with Session(engine) as session:
+            self._update_poll_interval(session, job)
+            # 仅在条目全部处理后记录校验信息，避免中途失败导致下次误判为未更新
+            _update_feed_state(job.state, job.result)
+            state = session.merge(job.state)
+            return job.writer.flush(session, extra=[state, job.run])
+
+    def _update_poll_interval(self, session: Session, job: SourceJob) -> None:
+        """用本轮观测更新源的更新速率估计与下次抓取间隔（需在 checked_at 更新前调用）。"""
+        state = job.state
+        now = datetime.utcnow()
+        history = history_rate(session, job.source.id, now) if state.rate_per_hour is None else None
+        published = [entry.get("published") for entry in job.result.entries]
+        poll_policy.observe(state, job.new_entries, published, now, history)
+        state.poll_seconds = poll_policy.interval(state, job.source, serves_core(job.source, self.topics))
+
+
+def _known_urls_in_session(urls: list[str]) -> set[str]:
+    with Session(engine) as session:
+        return _known_urls(session, urls)
+
+
+def _load_ingest_targets(
+    topic_ids: Optional[list[int]] = None,
+    source_ids: Optional[list[int]] = None,
+) -> tuple[list[Topic], list[Source], dict[int, FeedState]]:
+    """
+    topic_ids 只缩小要抓取的源（绑定到这些主题或未绑定主题的源）；条目始终按全部启用主题分发，
+    否则按主题抓取时入库的文章只会带上这一个主题，之后 URL 已知也不会再补上其它主题。
+    """
+    with Session(engine) as session:
+        topics = list(session.exec(select(Topic).where(Topic.enabled == True)).all())  # noqa: E712
+        wanted = {topic.id for topic in topics}
+        if topic_ids is not None:
+            wanted &= set(topic_ids)
+        sources = [
+            source
+            for source in session.exec(select(Source).where(Source.enabled == True)).all()  # noqa: E712
+            if (not source.topic_id or source.topic_id in wanted)
+            and (source_ids is None or source.id in source_ids)
+        ]
+        states = {
+            state.source_id: state
+            for state in session.exec(
+                select(FeedState).where(FeedState.source_id.in_([source.id for source in sources]))
+            ).all()
+        }
+        session.expunge_all()
+    if not wanted:
+        return [], [], {}
+    return topics, sources, states
+
+
+async def ingest(
+    topic_ids: Optional[list[int]] = None,
+    source_ids: Optional[list[int]] = None,
+    progress: Optional[FetchProgress] = None,
+) -> IngestResult:
+    """
+    每个启用的源每轮只抓取一次，条目按关键词分发到全部启用主题；
+    topic_ids 只抓服务于这些主题的源，source_ids 只抓指定的源。
+    """
+    topics, sources, states = await asyncio.to_thread(_load_ingest_targets, topic_ids, source_ids)
+    if progress is not None:
+        sources = progress.claim(sources)
+    try:
+        return await IngestRun(topics, sources, states, progress).run()
+    finally:
+        if progress is not None:
+            progress.release()
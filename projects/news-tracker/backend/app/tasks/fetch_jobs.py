@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, update
+from sqlmodel import Session, select
+
+from ..database import engine
+from ..models import FetchRun
+from ..services.leader import scheduler_leader
+from .enrich import enrich_worker
+from .fetch import FetchProgress, cleanup_old_articles, ingest
+
+logger = logging.getLogger(__name__)
+
+SCOPE_ALL = "all"
+ERROR_MAX_CHARS = 500
+LIST_LIMIT = 50
+# 运行中的任务每隔这么久把进度写回数据库，并检查其它进程发来的取消请求
+PROGRESS_SYNC_SECONDS = 2
+ACTIVE_STATUSES = ("pending", "running", "cancelling")
+# 已结束的抓取记录保留时长；需长于 polling.HISTORY_WINDOW（冷启动时用明细行估计更新速率）
+RUN_RETENTION = timedelta(days=7)
+
+
+def parse_scope(scope: str) -> tuple[Optional[list[int]], Optional[list[int]]]:
+    """scope -> (topic_ids, source_ids)；格式为 all、topic:<id> 或 source:<id>。"""
+    if scope == SCOPE_ALL:
+        return None, None
+    kind, _, raw = scope.partition(":")
+    if kind not in ("topic", "source") or not raw.isdigit():
+        raise ValueError(f"无效的抓取范围: {scope}")
+    ids = [int(raw)]
+    return (ids, None) if kind == "topic" else (None, ids)
+
+
+def make_scope(topic_id: Optional[int] = None, source_id: Optional[int] = None) -> str:
+    if source_id is not None:
+        return f"source:{source_id}"
+    if topic_id is not None:
+        return f"topic:{topic_id}"
+    return SCOPE_ALL
+
+
+@dataclass
+class FetchJob:
+    run_id: int
+    scope: str
+    trigger: str
+    progress: FetchProgress
+    task: Optional[asyncio.Task] = None
+
+
+def _create_run(scope: str, trigger: str, status: str = "running") -> int:
+    with Session(engine) as session:
+        run = FetchRun(scope=scope, trigger=trigger, status=status)
+        session.add(run)
+        session.commit()
+        return run.id
+
+
+def _enqueue(scope: str, trigger: str) -> tuple[int, bool]:
+    """非调度进程：已有覆盖该范围的未结束任务时返回它，否则写入一条 pending 记录交给调度进程。"""
+    with Session(engine) as session:
+        active = session.exec(
+            select(FetchRun)
+            .where(FetchRun.scope.in_([scope, SCOPE_ALL]), FetchRun.status.in_(ACTIVE_STATUSES))
+            .order_by(FetchRun.id)
+        ).first()
+        if active is not None:
+            return active.id, True
+    return _create_run(scope, trigger, status="pending"), False
+
+
+def _pending_runs() -> list[tuple[int, str, str]]:
+    with Session(engine) as session:
+        rows = session.exec(
+            select(FetchRun.id, FetchRun.scope, FetchRun.trigger)
+            .where(FetchRun.status == "pending", FetchRun.scope != None)  # noqa: E711
+            .order_by(FetchRun.id)
+        ).all()
+    return [tuple(row) for row in rows]
+
+
+def _claim_run(run_id: int) -> bool:
+    with Session(engine) as session:
+        result = session.exec(
+            update(FetchRun)
+            .where(FetchRun.id == run_id, FetchRun.status == "pending")
+            .values(status="running", started_at=datetime.utcnow())
+        )
+        session.commit()
+        return bool(result.rowcount)
+
+
+def _sync_progress(run_id: int, progress: FetchProgress) -> Optional[str]:
+    """写回进度，返回数据库里的当前状态（其它进程请求取消时为 cancelling）。"""
+    with Session(engine) as session:
+        session.exec(update(FetchRun).where(FetchRun.id == run_id).values(**progress.snapshot()))
+        session.commit()
+        return session.exec(select(FetchRun.status).where(FetchRun.id == run_id)).first()
+
+
+def _request_cancel(run_id: int) -> bool:
+    with Session(engine) as session:
+        pending = session.exec(
+            update(FetchRun)
+            .where(FetchRun.id == run_id, FetchRun.status == "pending")
+            .values(status="cancelled", finished_at=datetime.utcnow())
+        )
+        running = session.exec(
+            update(FetchRun).where(FetchRun.id == run_id, FetchRun.status == "running").values(status="cancelling")
+        )
+        session.commit()
+        return bool(pending.rowcount or running.rowcount)
+
+
+def _finish_run(run_id: int, status: str, progress: FetchProgress, error: Optional[str] = None) -> None:
+    with Session(engine) as session:
+        session.exec(
+            update(FetchRun)
+            .where(FetchRun.id == run_id)
+            .values(
+                status=status,
+                error=error,
+                finished_at=datetime.utcnow(),
+                sources_total=progress.sources_total,
+                sources_done=progress.sources_done,
+                entries=progress.entries,
+                added=progress.added,
+                skipped=progress.skipped,
+            )
+        )
+        session.commit()
+
+
+def _cleanup() -> None:
+    with Session(engine) as session:
+        cleanup_old_articles(session)
+
+
+class FetchJobManager:
+    """
+    抓取任务管理：同一范围（全部 / 主题 / 源）同时只跑一轮，重复触发合并到进行中的那一轮；
+    进行中的全量抓取覆盖任何范围。不同范围的任务并发时，已被认领的源不会重复抓取
+    （FetchProgress.busy_sources 在所有任务间共享）。
+
+    每轮在 FetchRun 里写一行汇总（scope 非空），各源的明细行通过 parent_id 关联；
+    进行中的进度（完成源数、新条目、入库、跳过）保存在内存里，查询时覆盖数据库中的值，
+    并定期写回数据库供其它进程查询。
+    取消是协作式的：流水线不再抓取新的源、丢弃未落库的条目，已入库的保留。
+
+    抓取只在持有调度租约的进程里运行：其它进程（API-only 模式、uvicorn 的其它 worker）
+    提交的抓取写成 pending 记录，由调度进程定期领取（start_pending）；取消请求同样经数据库传递。
+    """
+
+    def __init__(self) -> None:
+        self._lock = asyncio.Lock()
+        self._active: dict[str, FetchJob] = {}
+        self._by_id: dict[int, FetchJob] = {}
+        self._busy_sources: set[int] = set()
+
+    def _covering(self, scope: str) -> Optional[FetchJob]:
+        return self._active.get(scope) or self._active.get(SCOPE_ALL)
+
+    def _start(self, run_id: int, scope: str, trigger: str) -> FetchJob:
+        job = FetchJob(run_id, scope, trigger, FetchProgress(run_id=run_id, busy_sources=self._busy_sources))
+        self._active[scope] = job
+        self._by_id[run_id] = job
+        job.task = asyncio.create_task(self._execute(job))
+        return job
+
+    async def trigger(self, scope: str, trigger: str = "manual") -> tuple[FetchJob, bool]:
+        """在本进程启动一轮抓取；返回 (任务, 是否合并到了已有任务)。"""
+        parse_scope(scope)
+        async with self._lock:
+            job = self._covering(scope)
+            if job is not None:
+                logger.info("抓取任务 %s (%s) 进行中，合并 %s 触发", job.run_id, job.scope, scope)
+                return job, True
+            run_id = await asyncio.to_thread(_create_run, scope, trigger)
+            return self._start(run_id, scope, trigger), False
+
+    async def submit(self, scope: str, trigger: str = "manual") -> tuple[int, bool, bool]:
+        """
+        提交一轮抓取；返回 (任务 ID, 是否合并, 是否排队)。
+        调度进程直接运行，其它进程写入 pending 记录，由调度进程领取。
+        """
+        parse_scope(scope)
+        if scheduler_leader.is_leader:
+            job, coalesced = await self.trigger(scope, trigger)
+            return job.run_id, coalesced, False
+        run_id, coalesced = await asyncio.to_thread(_enqueue, scope, trigger)
+        return run_id, coalesced, not coalesced
+
+    async def start_pending(self) -> int:
+        """领取其它进程提交的 pending 抓取；同范围已有任务进行中的留到下一轮。"""
+        started = 0
+        for run_id, scope, trigger in await asyncio.to_thread(_pending_runs):
+            async with self._lock:
+                if self._covering(scope) is not None:
+                    continue
+                if not await asyncio.to_thread(_claim_run, run_id):
+                    continue
+                self._start(run_id, scope, trigger or "manual")
+                started += 1
+        return started
+
+    async def run(self, scope: str, trigger: str = "scheduled") -> FetchJob:
+        """触发并等待完成（调度任务使用）；调用方被取消时不影响抓取本身。"""
+        job, _ = await self.trigger(scope, trigger)
+        await asyncio.shield(job.task)
+        return job
+
+    async def _sync(self, job: FetchJob) -> None:
+        while True:
+            await asyncio.sleep(PROGRESS_SYNC_SECONDS)
+            try:
+                status = await asyncio.to_thread(_sync_progress, job.run_id, job.progress)
+            except Exception as exc:
+                logger.warning("抓取任务 %s 进度写回失败: %s", job.run_id, exc)
+                continue
+            if status == "cancelling" and not job.progress.cancelled:
+                self.cancel(job.run_id)
+
+    async def _execute(self, job: FetchJob) -> None:
+        progress = job.progress
+        topic_ids, source_ids = parse_scope(job.scope)
+        status, error = "success", None
+        sync = asyncio.create_task(self._sync(job))
+        try:
+            await ingest(topic_ids, source_ids, progress)
+            if progress.cancelled:
+                status = "cancelled"
+            elif job.scope == SCOPE_ALL:
+                await asyncio.to_thread(_cleanup)
+        except Exception as exc:
+            logger.exception("抓取任务 %s 失败", job.run_id)
+            status, error = "failed", str(exc)[:ERROR_MAX_CHARS]
+        finally:
+            sync.cancel()
+            self._active.pop(job.scope, None)
+        if progress.added:
+            enrich_worker.kick()
+        try:
+            await asyncio.to_thread(_finish_run, job.run_id, status, progress, error)
+        finally:
+            self._by_id.pop(job.run_id, None)
+        logger.info(
+            "抓取任务 %s (%s) %s: %s/%s 个源, 新条目 %s, 入库 %s, 跳过 %s",
+            job.run_id,
+            job.scope,
+            status,
+            progress.sources_done,
+            progress.sources_total,
+            progress.entries,
+            progress.added,
+            progress.skipped,
+        )
+
+    def cancel(self, run_id: int) -> bool:
+        """请求取消；本进程没有该任务时经数据库通知运行它的进程（pending 的直接取消）。"""
+        job = self._by_id.get(run_id)
+        if job is None:
+            return _request_cancel(run_id)
+        job.progress.cancelled = True
+        logger.info("抓取任务 %s (%s) 已请求取消", run_id, job.scope)
+        return True
+
+    async def shutdown(self, timeout: float) -> None:
+        """取消本进程里所有进行中的抓取并等待其收尾（写回 cancelled 状态）。"""
+        tasks = [job.task for job in self._by_id.values() if job.task is not None]
+        for run_id in list(self._by_id):
+            self.cancel(run_id)
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+
+    def _overlay(self, session: Session, run: FetchRun) -> FetchRun:
+        job = self._by_id.get(run.id)
+        if job is not None:
+            # 只改返回给调用方的对象，不写回数据库
+            session.expunge(run)
+            for name, value in job.progress.snapshot().items():
+                setattr(run, name, value)
+            if job.progress.cancelled:
+                run.status = "cancelling"
+        return run
+
+    def get(self, session: Session, run_id: int) -> Optional[tuple[FetchRun, list[FetchRun]]]:
+        run = session.get(FetchRun, run_id)
+        if run is None or run.scope is None:
+            return None
+        children = session.exec(select(FetchRun).where(FetchRun.parent_id == run_id).order_by(FetchRun.id)).all()
+        return self._overlay(session, run), list(children)
+
+    def recent(self, session: Session, limit: int = LIST_LIMIT, status: Optional[str] = None) -> list[FetchRun]:
+        statement = select(FetchRun).where(FetchRun.scope != None)  # noqa: E711
+        if status:
+            statement = statement.where(FetchRun.status == status)
+        runs = session.exec(statement.order_by(FetchRun.id.desc()).limit(limit)).all()
+        return [self._overlay(session, run) for run in runs]
+
+
+def fail_interrupted_fetch_runs() -> int:
+    """调度进程重启或易主时，仍标记为 running 的抓取记录已经中断；pending 的留给新的调度进程。"""
+    with Session(engine) as session:
+        result = session.exec(
+            update(FetchRun)
+            .where(FetchRun.status.in_(["running", "cancelling"]))
+            .values(status="failed", error="服务重启，抓取中断", finished_at=datetime.utcnow())
+        )
+        session.commit()
+        return result.rowcount or 0
+
+
+def purge_finished_runs() -> int:
+    """删除早于 RUN_RETENTION 的已结束抓取记录：先删各源明细行，再删已没有明细的汇总行。"""
+    cutoff = datetime.utcnow() - RUN_RETENTION
+    finished = (FetchRun.started_at < cutoff, FetchRun.status.not_in(ACTIVE_STATUSES))
+    with Session(engine) as session:
+        children = session.exec(delete(FetchRun).where(FetchRun.parent_id != None, *finished))  # noqa: E711
+        parents = session.exec(
+            delete(FetchRun).where(
+                FetchRun.parent_id == None,  # noqa: E711
+                FetchRun.id.not_in(select(FetchRun.parent_id).where(FetchRun.parent_id != None)),  # noqa: E711
+                *finished,
+            )
+        )
+        session.commit()
+        return (children.rowcount or 0) + (parents.rowcount or 0)
+
+
+fetch_jobs = FetchJobManager()
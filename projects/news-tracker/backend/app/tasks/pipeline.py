@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Any], Awaitable[None]]
+ErrorHandler = Callable[[Any, BaseException], Awaitable[None]]
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    processed: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    max_seconds: float = 0.0
+    idle_seconds: float = 0.0
+
+    def record(self, elapsed: float) -> None:
+        self.processed += 1
+        self.busy_seconds += elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+
+    def as_dict(self) -> dict[str, Any]:
+        avg = self.busy_seconds / self.processed if self.processed else 0.0
+        return {
+            "workers": self.workers,
+            "processed": self.processed,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "avg_seconds": round(avg, 3),
+            "max_seconds": round(self.max_seconds, 3),
+            "idle_seconds": round(self.idle_seconds, 3),
+        }
+
+
+class Stage:
+    """一个处理阶段：固定数量的 worker 从有界队列取数据并调用 handler。"""
+
+    def __init__(
+        self,
+        name: str,
+        handler: Handler,
+        inbox: asyncio.Queue,
+        workers: int,
+        on_error: Optional[ErrorHandler] = None,
+    ):
+        self.name = name
+        self.handler = handler
+        self.inbox = inbox
+        self.workers = workers
+        self.on_error = on_error
+        self.stats = StageStats(name=name, workers=workers)
+
+    async def _worker(self) -> None:
+        while True:
+            idle_from = time.perf_counter()
+            item = await self.inbox.get()
+            started = time.perf_counter()
+            self.stats.idle_seconds += started - idle_from
+            try:
+                await self.handler(item)
+            except Exception as exc:
+                self.stats.errors += 1
+                logger.exception("流水线阶段 %s 处理失败: %s", self.name, exc)
+                if self.on_error:
+                    try:
+                        await self.on_error(item, exc)
+                    except Exception:
+                        logger.exception("流水线阶段 %s 的失败处理出错", self.name)
+            finally:
+                self.stats.record(time.perf_counter() - started)
+                self.inbox.task_done()
+
+    def start(self) -> list[asyncio.Task]:
+        return [
+            asyncio.create_task(self._worker(), name=f"{self.name}-{i}") for i in range(self.workers)
+        ]
+
+
+class Pipeline:
+    """
+    由有界队列串起来的多阶段流水线。
+
+    handler 自己决定把结果放进哪个下游队列；队列满时 put 会等待，
+    上游因此自然减速（背压），慢阶段不会让内存无限堆积。
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.stages: list[Stage] = []
+        self._tasks: list[asyncio.Task] = []
+
+    def queue(self) -> asyncio.Queue:
+        return asyncio.Queue(maxsize=self.queue_size)
+
+    def add_stage(
+        self,
+        name: str,
+        handler: Handler,
+        inbox: asyncio.Queue,
+        workers: int,
+        on_error: Optional[ErrorHandler] = None,
+    ) -> Stage:
+        stage = Stage(name, handler, inbox, workers, on_error)
+        self.stages.append(stage)
+        return stage
+
+    def start(self) -> None:
+        for stage in self.stages:
+            self._tasks.extend(stage.start())
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {stage.name: stage.stats.as_dict() for stage in self.stages}
+
+    def log_stats(self, prefix: str = "流水线") -> None:
+        for name, data in self.stats().items():
+            logger.info(
+                "%s 阶段 %-8s 处理 %s 条, 错误 %s, 总耗时 %.2fs, 平均 %.3fs, 最长 %.2fs",
+                prefix,
+                name,
+                data["processed"],
+                data["errors"],
+                data["busy_seconds"],
+                data["avg_seconds"],
+                data["max_seconds"],
+            )
@@ -0,0 +1,55 @@
+"""
+独立的抓取 / 补全进程：python -m app.worker
+
+运行调度器与抓取、补全流水线，不提供 HTTP 接口；API 进程设置 SCHEDULER_ENABLED=false
+后只处理请求，两者共用同一个数据库。与 API 进程一样参与调度租约竞选，
+同时启动多个 worker 时只有一个在运行，其余待命，持有者退出后接管。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import signal
+
+from .database import init_db
+from .services.crawler import html_pool
+from .services.llm import llm_client
+from .services.scheduler import start_scheduler, stop_scheduler
+from .services.transport import aclose_transport, sync_transport
+from .tasks.enrich import enrich_worker
+from .tasks.fetch import warm_indexes
+from .tasks.fetch_jobs import fetch_jobs
+
+logger = logging.getLogger("app.worker")
+
+# 收到 SIGTERM 后等待进行中的抓取 / 补全收尾的时间（需小于容器的 stop_grace_period）
+SHUTDOWN_TIMEOUT_SECONDS = 20
+
+
+async def main() -> None:
+    init_db()
+    warm_indexes()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    start_scheduler()
+    logger.info("抓取 worker 已启动")
+    try:
+        await stop.wait()
+    finally:
+        logger.info("抓取 worker 正在退出")
+        # 先让出调度租约，其它 worker 可以立即接管；本进程只收尾进行中的工作
+        stop_scheduler()
+        await fetch_jobs.shutdown(SHUTDOWN_TIMEOUT_SECONDS)
+        await enrich_worker.shutdown(SHUTDOWN_TIMEOUT_SECONDS)
+        await aclose_transport()
+        await llm_client.aclose()
+        sync_transport.close()
+        llm_client.close()
+        html_pool.shutdown()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""
+近似去重基准：对比 DedupeIndex 与原先逐条 SequenceMatcher 全量扫描。
+
+用法（在 backend 目录下）::
+
+    python -m benchmarks.bench_dedupe
+    python -m benchmarks.bench_dedupe --sizes 1000 10000 100000 --queries 200
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.services.dedupe import DedupeIndex, normalize_text, similarity
+
+# 常见新闻用字，用于生成合成中文标题
+CHARS = (
+    "美联储利率美元关税股市股价债券国债黄金原油通胀就业汇率央行监管银行财政特朗普"
+    "中国欧洲日本市场经济增长下跌上涨宣布表示预计计划公司投资者季度报告数据政策会议"
+)
+RECENT_DAYS = 3
+THRESHOLD = 0.75
+
+
+def _title(rng: random.Random) -> str:
+    return "".join(rng.choice(CHARS) for _ in range(rng.randint(14, 26)))
+
+
+def _near_duplicate(rng: random.Random, title: str) -> str:
+    chars = list(title)
+    for _ in range(2):
+        chars[rng.randrange(len(chars))] = rng.choice(CHARS)
+    return "".join(chars)
+
+
+def _linear_scan(corpus, title_zh, published_at):
+    normalized = normalize_text(title_zh)
+    for title, ts in corpus:
+        if ts.date() != published_at.date():
+            continue
+        if similarity(normalize_text(title), normalized) >= THRESHOLD:
+            return title
+    return None
+
+
+def run(size: int, queries: int, linear_limit: int, seed: int = 1) -> None:
+    rng = random.Random(seed)
+    now = datetime(2026, 1, 10, 12)
+    corpus = [(_title(rng), now - timedelta(hours=rng.uniform(0, RECENT_DAYS * 24))) for _ in range(size)]
+
+    index = DedupeIndex()
+    started = time.perf_counter()
+    for article_id, (title, ts) in enumerate(corpus):
+        index.add(article_id, title, ts, str(article_id))
+    build_s = time.perf_counter() - started
+
+    probes = []
+    for _ in range(queries):
+        title, ts = corpus[rng.randrange(size)]
+        # 一半近似重复，一半全新标题
+        probes.append((_near_duplicate(rng, title), ts) if rng.random() < 0.5 else (_title(rng), ts))
+
+    started = time.perf_counter()
+    hits = 0
+    for title, ts in probes:
+        if index.find_similar(title, ts, THRESHOLD):
+            hits += 1
+        index.add(size + hits, title, ts, "probe")
+    index_ms = (time.perf_counter() - started) * 1000 / queries
+
+    linear = "-"
+    if size <= linear_limit:
+        started = time.perf_counter()
+        for title, ts in probes:
+            _linear_scan(corpus, title, ts)
+        linear = f"{(time.perf_counter() - started) * 1000 / queries:.2f}"
+
+    print(f"{size:>8} {build_s:>9.2f} {index_ms:>12.3f} {linear:>12} {hits:>6}/{queries}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--linear-limit", type=int, default=10_000, help="超过该规模不再跑全量扫描")
+    args = parser.parse_args()
+
+    print(f"{'window':>8} {'build(s)':>9} {'index ms/op':>12} {'scan ms/op':>12} {'hits':>10}")
+    for size in args.sizes:
+        run(size, args.queries, args.linear_limit)
+
+
+if __name__ == "__main__":
+    main()
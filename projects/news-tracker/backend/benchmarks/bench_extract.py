@@ -0,0 +1,78 @@
+"""
+正文抽取基准：对比原 html.parser（先解码 resp.text 再建 BeautifulSoup 树）与 lxml 快速路径。
+两边都是完整建树后再剔除噪声标签，lxml 的耗时包含 strip_elements 这一步。
+
+语料是保存在目录里的原始 HTML 文件（*.html，按原始字节保存）。
+可以先用 --download 从数据库最近的文章 URL 抓一批页面::
+
+    python -m benchmarks.bench_extract pages/ --download 50
+    python -m benchmarks.bench_extract pages/ --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import time
+from pathlib import Path
+
+from app.services.extract import extract_main_text_bs4, extract_main_text_lxml
+
+
+def _download(target: Path, limit: int) -> None:
+    from sqlmodel import Session, select
+
+    from app.database import engine
+    from app.models import Article
+    from app.services.crawler import download_capped, html_pool
+
+    target.mkdir(parents=True, exist_ok=True)
+    with Session(engine) as session:
+        urls = session.exec(select(Article.url).order_by(Article.fetched_at.desc()).limit(limit)).all()
+    for url in urls:
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] + ".html"
+        try:
+            data = download_capped(url, html_pool.max_bytes).data
+        except Exception as exc:
+            print(f"skip {url}: {exc}")
+            continue
+        (target / name).write_bytes(data)
+    print(f"saved {len(list(target.glob('*.html')))} pages to {target}")
+
+
+def _baseline(data: bytes) -> str:
+    # 旧实现：先按 utf-8 解码成 str，再交给 html.parser
+    return extract_main_text_bs4(data.decode("utf-8", errors="replace"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("corpus", type=Path, help="保存 HTML 页面的目录")
+    parser.add_argument("--download", type=int, default=0, help="先从数据库抓取 N 个文章页面")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.download:
+        _download(args.corpus, args.download)
+
+    pages = [path.read_bytes() for path in sorted(args.corpus.glob("*.html"))]
+    if not pages:
+        raise SystemExit(f"{args.corpus} 下没有 *.html 页面")
+    total_mb = sum(len(p) for p in pages) / 1024 / 1024
+    print(f"{len(pages)} pages, {total_mb:.1f} MB, repeat={args.repeat}")
+
+    results = {}
+    for name, func in (("html.parser", _baseline), ("lxml", extract_main_text_lxml)):
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            outputs = [func(page) for page in pages]
+        elapsed = (time.perf_counter() - started) / args.repeat
+        results[name] = outputs
+        print(f"{name:>12}: {elapsed * 1000:8.1f} ms/corpus  {elapsed * 1000 / len(pages):6.2f} ms/page")
+
+    same = sum(1 for a, b in zip(results["html.parser"], results["lxml"]) if a == b)
+    empty = sum(1 for text in results["lxml"] if not text)
+    print(f"identical output: {same}/{len(pages)}, lxml empty: {empty}")
+
+
+if __name__ == "__main__":
+    main()
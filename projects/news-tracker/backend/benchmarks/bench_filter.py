@@ -0,0 +1,136 @@
+"""
+规则过滤基准：对比逐关键词 in 扫描（原 rule_score + _match_topics）与编译好的 KeywordMatcher。
+
+默认用数据库里最近的文章标题和摘要；库里不足时补充合成标题。
+--topics 指定主题数（超出内置 4 个的部分用合成关键词补足），观察关键词增多时的差距::
+
+    python -m benchmarks.bench_filter
+    python -m benchmarks.bench_filter --limit 5000 --repeat 5 --topics 4 20 50
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from app.services.filter import FINANCE_KEYWORDS, NEGATIVE_KEYWORDS, KeywordMatcher
+
+TOPIC_KEYWORDS = {
+    1: ["特朗普", "川普", "Trump", "Donald Trump"],
+    2: ["黄金", "金价", "Gold", "Gold price"],
+    3: ["美联储", "Fed", "Federal Reserve", "Powell", "鲍威尔"],
+    4: ["原油", "油价", "OPEC", "Oil", "Brent", "WTI"],
+}
+WORDS = (
+    "stocks rally as Fed signals rate cut gold price hits record Trump tariff China trade talks "
+    "oil slips on OPEC output bond yields jump dollar weakens earnings beat estimates 美联储 加息 "
+    "金价 上涨 特朗普 关税 原油 股市 娱乐 体育 明星 绯闻 央行 汇率 国债 通胀"
+).split()
+EXTRA_WORDS = (
+    "apple microsoft nvidia tesla amazon meta alphabet boeing intel netflix copper silver bitcoin "
+    "ethereum yen euro yuan nikkei hang seng nasdaq dow s&p treasury mortgage housing retail jobs "
+    "payrolls 比特币 白银 铜价 日元 欧元 人民币 恒指 纳指 道指 楼市 房价 消费 零售 非农 失业"
+).split()
+
+
+def _topics(count: int) -> dict[int, list[str]]:
+    topics = {tid: kws for tid, kws in TOPIC_KEYWORDS.items() if tid <= count}
+    rng = random.Random(count)
+    for tid in range(len(topics) + 1, count + 1):
+        topics[tid] = [f"{rng.choice(EXTRA_WORDS)} {rng.choice(EXTRA_WORDS)}" for _ in range(3)]
+        topics[tid].append(rng.choice(EXTRA_WORDS))
+    return topics
+
+
+def _baseline(topics: dict[int, list[str]], title: str, summary: str) -> tuple[list[int], float]:
+    # 旧实现：每个条目、每个主题、每个关键词各扫描一遍小写文本
+    text_blob = f"{title} {summary}".lower()
+    matched = [tid for tid, keywords in topics.items() if any(kw.lower() in text_blob for kw in keywords)]
+    extra = [kw for tid in matched for kw in topics[tid]]
+    text = f"{title} {summary}"
+    text_lower = text.lower()
+    score = 0.0
+    for keyword, weight in FINANCE_KEYWORDS.items():
+        if keyword in text or keyword.lower() in text_lower:
+            score += weight
+    for kw in extra:
+        if kw in text or kw.lower() in text_lower:
+            score += 0.3
+    for keyword, weight in NEGATIVE_KEYWORDS.items():
+        if keyword in text or keyword.lower() in text_lower:
+            score -= weight
+    return matched, max(0.0, min(1.0, score))
+
+
+def _compiled(matcher: KeywordMatcher, title: str, summary: str) -> tuple[list[int], float]:
+    match = matcher.scan(title, summary)
+    matched = [tid for tid in matcher.topic_keywords if tid in match.topic_hits]
+    return matched, match.score(matched)
+
+
+def _load(limit: int) -> list[tuple[str, str]]:
+    try:
+        from sqlmodel import Session, select
+
+        from app.database import engine
+        from app.models import Article
+
+        with Session(engine) as session:
+            rows = session.exec(
+                select(Article.title_orig, Article.summary_orig).order_by(Article.fetched_at.desc()).limit(limit)
+            ).all()
+    except Exception as exc:
+        print(f"读取数据库失败，只用合成标题: {exc}")
+        rows = []
+    corpus = [(title, (summary or "")[:500]) for title, summary in rows]
+    rng = random.Random(1)
+    while len(corpus) < limit:
+        corpus.append((" ".join(rng.choices(WORDS, k=12)), " ".join(rng.choices(WORDS, k=40))))
+    return corpus
+
+
+def run(corpus: list[tuple[str, str]], topic_count: int, repeat: int) -> None:
+    topics = _topics(topic_count)
+    started = time.perf_counter()
+    matcher = KeywordMatcher(topics)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    results = {}
+    timings = {}
+    for name, func in (
+        ("in-scan", lambda t, s: _baseline(topics, t, s)),
+        ("automaton", lambda t, s: _compiled(matcher, t, s)),
+    ):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            outputs = [func(title, summary) for title, summary in corpus]
+        timings[name] = (time.perf_counter() - started) / repeat * 1e6 / len(corpus)
+        results[name] = outputs
+
+    same = sum(
+        1
+        for (ta, sa), (tb, sb) in zip(results["in-scan"], results["automaton"])
+        if ta == tb and abs(sa - sb) < 1e-9
+    )
+    print(
+        f"{topic_count:>6} {len(matcher.patterns):>8} {build_ms:>9.2f} {timings['in-scan']:>12.1f} "
+        f"{timings['automaton']:>12.1f} {timings['in-scan'] / timings['automaton']:>7.2f}x {same:>6}/{len(corpus)}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--topics", type=int, nargs="+", default=[4, 20, 50])
+    args = parser.parse_args()
+
+    corpus = _load(args.limit)
+    print(f"{len(corpus)} entries, repeat={args.repeat}")
+    print(f"{'topics':>6} {'patterns':>8} {'build ms':>9} {'in-scan us':>12} {'automaton us':>12} {'speedup':>8} {'same':>10}")
+    for count in args.topics:
+        run(corpus, count, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+本地抽取式摘要基准：用数据库里已抓到正文的文章，对比原样截断送入 LLM 的文本
+（summary_orig[:10000]）与压缩到 token 预算后的文本，统计 token 数和摘要耗时。
+
+    python -m benchmarks.bench_summarize --limit 200
+    python -m benchmarks.bench_summarize --budget 400 --budget 800 --budget 1500
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models import Article
+from app.services.llm import TRANSLATE_INPUT_CHARS
+from app.services.summarize import estimate_tokens
+from app.tasks.enrich import FULL_TEXT_MARKER, EnrichContext, _condense
+
+MIN_CHARS = 2000
+
+
+def _load(limit: int) -> list[EnrichContext]:
+    with Session(engine) as session:
+        rows = session.exec(
+            select(Article)
+            .where(Article.summary_orig.is_not(None))
+            .order_by(Article.fetched_at.desc())
+            .limit(limit * 5)
+        ).all()
+    contexts = [
+        EnrichContext(
+            article_id=article.id,
+            url=article.url,
+            lang=article.lang_orig,
+            title=article.title_orig,
+            summary=article.summary_orig,
+            published_at=article.published_at,
+        )
+        for article in rows
+        if article.summary_orig and (FULL_TEXT_MARKER in article.summary_orig or len(article.summary_orig) >= MIN_CHARS)
+    ]
+    return contexts[:limit]
+
+
+def _p95(values: list[float]) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=200, help="最多取 N 篇带正文的文章")
+    parser.add_argument("--budget", type=int, action="append", help="token 预算，可多次指定")
+    args = parser.parse_args()
+
+    contexts = _load(args.limit)
+    if not contexts:
+        raise SystemExit("数据库里没有抓到正文的文章")
+    baseline = [estimate_tokens(ctx.summary[:TRANSLATE_INPUT_CHARS]) for ctx in contexts]
+    print(f"{len(contexts)} articles, truncated input: {sum(baseline)} tokens, mean {statistics.mean(baseline):.0f}")
+
+    # _condense 读取 settings.llm.input_tokens，这里逐个预算改写后再测
+    from app.config import settings
+
+    for budget in args.budget or [settings.llm.input_tokens]:
+        settings.llm.input_tokens = budget
+        tokens: list[int] = []
+        latencies: list[float] = []
+        for ctx in contexts:
+            started = time.perf_counter()
+            _, recorded = _condense(ctx)
+            latencies.append((time.perf_counter() - started) * 1000)
+            tokens.append(recorded["input_tokens"])
+        saved = 1 - sum(tokens) / sum(baseline)
+        print(
+            f"budget {budget:>5}: {sum(tokens):>8} tokens ({saved:6.1%} fewer), mean {statistics.mean(tokens):6.0f}/article, "
+            f"latency mean {statistics.mean(latencies):6.2f} ms  p95 {_p95(latencies):6.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
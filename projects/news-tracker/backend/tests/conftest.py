@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import os
+import tempfile
+
+# 配置在导入 app 时读取：测试用独立的临时库
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="news-tracker-test-"), "test.db")
+
+import pytest
+from sqlmodel import SQLModel
+
+import app.models  # noqa: F401  注册所有表
+from app.database import engine, init_db
+
+
+@pytest.fixture
+def db():
+    """每个用例一个空库。"""
+    SQLModel.metadata.drop_all(engine)
+    init_db()
+    yield engine
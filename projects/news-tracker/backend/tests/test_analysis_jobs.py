@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from sqlmodel import Session
+
+from app.models import AnalysisJob
+from app.tasks import analysis
+
+
+def _job(session: Session, **values) -> int:
+    job = AnalysisJob(status="running", **values)
+    session.add(job)
+    session.commit()
+    return job.id
+
+
+def test_only_jobs_with_expired_lease_are_failed(db):
+    now = datetime.utcnow()
+    with Session(db) as session:
+        live = _job(session, owner="api-1", lease_until=now + timedelta(seconds=60))
+        dead = _job(session, owner="api-2", lease_until=now - timedelta(seconds=1))
+        legacy = _job(session)
+    assert analysis.fail_interrupted_jobs() == 2
+    with Session(db) as session:
+        assert session.get(AnalysisJob, live).status == "running"
+        assert session.get(AnalysisJob, dead).status == "failed"
+        assert session.get(AnalysisJob, legacy).status == "failed"
+
+
+def test_interrupted_job_is_not_flipped_back_to_done(db):
+    with Session(db) as session:
+        job_id = _job(session, owner="api-1", lease_until=datetime.utcnow() - timedelta(seconds=1))
+    analysis.fail_interrupted_jobs(job_id)
+    assert not analysis._update(job_id, "api-1", status="done", result_text="late")
+    with Session(db) as session:
+        assert session.get(AnalysisJob, job_id).status == "failed"
+
+
+def test_owner_updates_its_running_job(db):
+    with Session(db) as session:
+        job_id = _job(session, owner="api-1", lease_until=analysis.lease_deadline())
+    assert not analysis._update(job_id, "api-2", status="done")
+    assert analysis._update(job_id, "api-1", status="done", result_text="ok")
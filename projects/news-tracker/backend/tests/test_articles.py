@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlmodel import Session
+
+from app.models import Article, ArticleEnriched, ArticleTopic, Source, Topic
+from app.routers.articles import get_article, list_articles
+
+
+def _seed(session: Session, count: int) -> None:
+    session.add(Topic(id=1, name_zh="黄金", keywords="gold"))
+    session.add(Topic(id=2, name_zh="美联储", keywords="fed"))
+    session.add(Source(id=1, name="s", url="https://example.com/feed"))
+    for i in range(1, count + 1):
+        session.add(
+            Article(id=i, source_id=1, url=f"https://example.com/{i}", title_orig=f"t{i}", published_at=datetime.utcnow())
+        )
+        session.add(ArticleEnriched(article_id=i, title_zh=f"t{i}", relevance_label="relevant", dedupe_key=f"k{i}"))
+        session.add(ArticleTopic(article_id=i, topic_id=1))
+        if i % 2:
+            session.add(ArticleTopic(article_id=i, topic_id=2))
+    session.commit()
+
+
+def test_multi_topic_articles_listed_once(db):
+    with Session(db) as session:
+        _seed(session, 4)
+        articles = list_articles(topic_id=None, days=3, query=None, limit=3, session=session)
+        assert len(articles) == 3
+        assert len({article.id for article in articles}) == 3
+        by_id = {article.id: article for article in list_articles(None, 3, None, 10, session)}
+        assert by_id[1].topic_ids == [1, 2]
+        assert by_id[2].topic_ids == [1]
+
+
+def test_topic_filter_and_detail(db):
+    with Session(db) as session:
+        _seed(session, 4)
+        articles = list_articles(topic_id=2, days=3, query=None, limit=10, session=session)
+        assert sorted(article.id for article in articles) == [1, 3]
+        assert all(article.topic_id == 2 for article in articles)
+        assert get_article(1, session).topic_ids == [1, 2]
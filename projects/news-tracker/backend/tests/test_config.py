@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from app.config import load_config
+
+
+def test_zero_is_kept_for_zero_meaningful_knobs(tmp_path, monkeypatch):
+    config = tmp_path / "config.toml"
+    config.write_text("[crawler]\ncache_max_mb = 0\n[llm]\ncache_ttl_hours = 0\n", encoding="utf-8")
+    monkeypatch.setenv("CRAWL_CACHE_TTL_HOURS", "0")
+    monkeypatch.setenv("ENRICH_RETRY_BASE_SECONDS", "0")
+    settings = load_config(config)
+    assert settings.crawler.cache_max_mb == 0
+    assert settings.crawler.cache_ttl_hours == 0
+    assert settings.llm.cache_ttl_hours == 0
+    assert settings.enrich.retry_base_seconds == 0
+
+
+def test_unset_knobs_fall_back_to_defaults(tmp_path, monkeypatch):
+    for name in ("CRAWL_CACHE_MAX_MB", "CRAWL_CACHE_TTL_HOURS", "HTTP2"):
+        monkeypatch.delenv(name, raising=False)
+    settings = load_config(tmp_path / "missing.toml")
+    assert settings.crawler.cache_max_mb == 200
+    assert settings.crawler.cache_ttl_hours == 72
+    assert settings.http.http2 is False
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.crawler import HtmlParserPool
+
+SMALL = b"<html><body><article><p>" + b"gold price rises today " * 20 + b"</p></article></body></html>"
+LARGE = b"<html><body>" + b"".join(b"<p>paragraph number %d with enough words to count here.</p>" % i for i in range(20000)) + b"</body></html>"
+
+
+@pytest.fixture
+def pool():
+    pool = HtmlParserPool(workers=2, timeout=30, max_bytes=10**8)
+    yield pool
+    pool.shutdown()
+
+
+def _pids(pool: HtmlParserPool) -> set[int]:
+    return {worker.process.pid for worker in pool._idle}
+
+
+def test_timeout_kills_only_the_stuck_process(pool):
+    with ThreadPoolExecutor(2) as threads:
+        assert all(threads.map(lambda _: pool.extract(LARGE), range(2)))
+    before = _pids(pool)
+    assert len(before) == 2
+
+    pool.timeout = 0.001
+    with pytest.raises(TimeoutError):
+        pool.extract(LARGE)
+    # 另一个进程保留，卡住的那个被结束
+    assert len(_pids(pool) & before) == 1
+
+    pool.timeout = 30
+    assert "gold price" in pool.extract(SMALL)
+
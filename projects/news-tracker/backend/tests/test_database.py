@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import sqlite3
+
+from sqlalchemy import create_engine, event
+
+from app import database
+
+
+def _mode(path) -> int:
+    with sqlite3.connect(path) as conn:
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+
+
+def test_new_database_starts_incremental(tmp_path):
+    path = tmp_path / "new.db"
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", database._sqlite_pragmas)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE t (x INTEGER)")
+    engine.dispose()
+    assert _mode(path) == 2
+
+
+def test_legacy_database_is_converted_once(tmp_path, monkeypatch):
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+    assert _mode(path) == 0
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", database._sqlite_pragmas)
+    monkeypatch.setattr(database, "engine", engine)
+    assert database.ensure_incremental_vacuum() is True
+    assert database.ensure_incremental_vacuum() is False
+    engine.dispose()
+    assert _mode(path) == 2
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from app.services.dedupe import DedupeIndex
+
+
+def test_find_similar_matches_near_duplicate_in_same_day():
+    index = DedupeIndex()
+    day = datetime(2024, 5, 1, 8)
+    index.add(1, "美联储宣布维持利率不变，黄金价格小幅上涨", day, "k1")
+    index.add(2, "原油库存意外下降", day, "k2")
+    match = index.find_similar("美联储宣布维持利率不变 黄金价格小幅上涨！", day, threshold=0.8)
+    assert match is not None and match[:2] == (1, "k1")
+    assert index.find_similar("美联储宣布维持利率不变，黄金价格小幅上涨", day + timedelta(days=1), 0.8) is None
+
+
+def test_empty_titles_are_not_indexed_and_prune_empties_old_days():
+    index = DedupeIndex()
+    old = datetime(2024, 5, 1)
+    index.add(1, "！！！", old, "k1")
+    index.add(2, "黄金价格创新高", old, "k2")
+    index.add(3, "黄金价格创新高", old + timedelta(days=3), "k3")
+    assert len(index) == 2
+    assert index.find_similar("……", old, threshold=0.0) is None
+    assert index.prune(old + timedelta(days=2)) == 1
+    assert len(index) == 1
+    assert not index._exact.get("2024-05-01")
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from sqlmodel import Session
+
+from app.models import Article, ArticleEnriched, EnrichJob, Source
+from app.services.enrich_queue import EnrichQueue
+
+OWNER = "worker-1"
+
+
+def _queue(**values) -> EnrichQueue:
+    options = dict(lease_seconds=60, max_attempts=3, retry_base_seconds=30, retry_max_seconds=600)
+    options.update(values)
+    return EnrichQueue(**options)
+
+
+def _enqueue(session: Session, count: int = 1) -> list[int]:
+    session.add(Source(id=1, name="s", url="https://example.com/feed"))
+    ids = []
+    for i in range(1, count + 1):
+        session.add(Article(id=i, source_id=1, url=f"https://example.com/{i}", title_orig=f"t{i}"))
+        session.add(ArticleEnriched(article_id=i, title_zh=f"t{i}", dedupe_key=f"k{i}", enrich_status="pending"))
+        job = EnrichJob(article_id=i, kind="classify", remaining="crawl,translate")
+        session.add(job)
+        session.flush()
+        ids.append(job.id)
+    session.commit()
+    return ids
+
+
+def _expire_leases(session: Session) -> None:
+    session.exec(update(EnrichJob).values(lease_until=datetime.utcnow() - timedelta(seconds=1)))
+    session.commit()
+
+
+def test_lease_is_exclusive_and_advances_steps(db):
+    queue = _queue()
+    with Session(db) as session:
+        _enqueue(session, 3)
+    leased = queue.lease(OWNER, 2)
+    assert [job.steps for job in leased] == [["classify", "crawl", "translate"]] * 2
+    assert len(queue.lease("worker-2", 10)) == 1
+    assert queue.lease("worker-3", 10) == []
+
+    job = leased[0]
+    assert queue.advance(job, OWNER, ["crawl", "translate"])
+    assert job.kind == "crawl" and job.remaining == ["translate"]
+    # 别的 worker 不能改动不属于它的任务
+    assert not queue.advance(job, "worker-2", ["translate"])
+    assert queue.complete(job, OWNER)
+    with Session(db) as session:
+        assert session.get(EnrichJob, job.id).status == "done"
+        assert session.get(ArticleEnriched, job.article_id).enrich_status == "done"
+
+
+def test_retry_backs_off_then_dead_letters(db):
+    queue = _queue(max_attempts=2)
+    with Session(db) as session:
+        [job_id] = _enqueue(session)
+    [job] = queue.lease(OWNER, 1)
+    assert queue.retry(job, OWNER, "timeout") is False
+    with Session(db) as session:
+        row = session.get(EnrichJob, job_id)
+        assert row.status == "pending" and row.attempts == 1
+        assert row.available_at > datetime.utcnow() + timedelta(seconds=20)
+    # 退避期内不会被租用
+    assert queue.lease(OWNER, 1) == []
+
+    with Session(db) as session:
+        session.exec(update(EnrichJob).values(available_at=datetime.utcnow()))
+        session.commit()
+    [job] = queue.lease(OWNER, 1)
+    assert job.attempts == 1
+    assert queue.retry(job, OWNER, "timeout again") is True
+    with Session(db) as session:
+        assert session.get(EnrichJob, job_id).status == "dead"
+        assert session.get(ArticleEnriched, job.article_id).enrich_status == "failed"
+
+    assert queue.requeue_dead() == 1
+    [job] = queue.lease(OWNER, 1)
+    assert job.attempts == 0 and job.kind == "classify"
+
+
+def test_expired_lease_counts_as_attempt_and_is_reaped(db):
+    queue = _queue(max_attempts=2)
+    with Session(db) as session:
+        [job_id] = _enqueue(session)
+    queue.lease(OWNER, 1)
+    with Session(db) as session:
+        _expire_leases(session)
+    [job] = queue.lease("worker-2", 1)
+    assert job.attempts == 1
+    # 原持有者的租约已被抢走
+    assert not queue.complete(job, OWNER)
+
+    with Session(db) as session:
+        _expire_leases(session)
+    assert queue.reap_expired() == 1
+    with Session(db) as session:
+        assert session.get(EnrichJob, job_id).status == "dead"
+        assert session.get(ArticleEnriched, job.article_id).enrich_status == "failed"
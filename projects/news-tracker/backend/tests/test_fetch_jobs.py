@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, select
+
+from app.models import FetchRun
+from app.tasks import fetch_jobs
+
+
+def _run(session: Session, age: timedelta, status: str = "success", **values) -> int:
+    run = FetchRun(status=status, started_at=datetime.utcnow() - age, **values)
+    session.add(run)
+    session.commit()
+    return run.id
+
+
+def test_purge_finished_runs_keeps_recent_and_active(db):
+    old = fetch_jobs.RUN_RETENTION + timedelta(hours=1)
+    with Session(db) as session:
+        old_parent = _run(session, old, scope="all")
+        _run(session, old, parent_id=old_parent)
+        _run(session, old, status="failed")
+        active = _run(session, old, status="running", scope="all")
+        recent_parent = _run(session, timedelta(hours=1), scope="all")
+        recent_child = _run(session, timedelta(hours=1), parent_id=recent_parent)
+    assert fetch_jobs.purge_finished_runs() == 3
+    with Session(db) as session:
+        left = {run.id for run in session.exec(select(FetchRun)).all()}
+    assert left == {active, recent_parent, recent_child}
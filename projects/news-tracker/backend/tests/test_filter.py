@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from app.services.filter import KeywordMatcher, matcher_for, rule_score
+from benchmarks.bench_filter import EXTRA_WORDS, WORDS, _baseline, _compiled, _topics
+
+
+def _corpus(count: int) -> list[tuple[str, str]]:
+    rng = random.Random(3)
+    words = WORDS + EXTRA_WORDS
+    return [(" ".join(rng.choices(words, k=12)), " ".join(rng.choices(words, k=40))) for _ in range(count)]
+
+
+@pytest.mark.parametrize("topic_count", [4, 30])
+def test_matcher_agrees_with_per_keyword_scan(topic_count):
+    topics = _topics(topic_count)
+    matcher = KeywordMatcher(topics)
+    for title, summary in _corpus(300):
+        expected_topics, expected_score = _baseline(topics, title, summary)
+        got_topics, got_score = _compiled(matcher, title, summary)
+        assert got_topics == expected_topics
+        assert got_score == pytest.approx(expected_score)
+
+
+def test_rule_score_compat_wrapper():
+    assert rule_score("美联储维持利率不变，金价上涨", None, ["金价"]) == pytest.approx(0.3 + 0.25 + 0.3)
+    # 负面关键词减分，结果截断到 [0, 1]
+    assert rule_score("娱乐八卦：明星绯闻", "体育", None) == 0.0
+    # 每个关键词只按“是否出现”计一次，大小写不敏感
+    assert rule_score("GOLD gold Gold", None, ["gold"]) == pytest.approx(0.3)
+
+
+def test_overlapping_keywords_all_match():
+    matcher = KeywordMatcher({1: ["Donald Trump", "Trump"], 2: ["rump"]})
+    match = matcher.scan("donald trump speaks")
+    assert match.topic_hits == {1: 2, 2: 1}
+    assert not matcher.has_keywords(3)
+
+
+def test_matcher_for_caches_by_keywords():
+    first = matcher_for({1: ("gold",)})
+    assert matcher_for({1: ("gold",)}) is first
+    assert matcher_for({1: ("gold", "silver")}) is not first
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+from sqlmodel import Session, func, select
+
+from app.config import settings
+from app.models import Article, ArticleTopic, FeedState, FetchRun, Source, Topic
+from app.services.rss import FeedResult
+from app.tasks import fetch
+
+ENTRIES_PER_SOURCE = 30
+
+
+def _feed(name: str, count: int) -> bytes:
+    now = datetime.now(timezone.utc)
+    items = "".join(
+        f"<item><title>Gold price {name} move {i}</title><link>https://example.com/{name}/{i}</link>"
+        f"<description>gold fed rate</description><pubDate>{format_datetime(now - timedelta(minutes=i))}</pubDate></item>"
+        for i in range(count)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>t</title>{items}</channel></rss>'.encode()
+
+
+@pytest.fixture
+def feeds(db, monkeypatch):
+    with Session(db) as session:
+        session.add(Topic(name_zh="黄金", keywords="gold", is_core=True))
+        for n in range(4):
+            session.add(Source(name=f"feed{n}", url=f"https://example.com/feed{n}", lang="en"))
+        session.commit()
+    fetch.seen_urls.rebuild([])
+    fetch.dedupe_index.clear()
+
+    async def download(url, etag=None, last_modified=None, content_hash=None):
+        name = url.rsplit("/", 1)[-1]
+        return FeedResult(content=_feed(name, ENTRIES_PER_SOURCE), content_hash=f"hash-{name}")
+
+    monkeypatch.setattr(fetch, "download_feed_async", download)
+
+
+def _ingest(timeout: float = 30):
+    return asyncio.run(asyncio.wait_for(fetch.ingest(), timeout))
+
+
+def test_ingest_finishes_when_entries_exceed_queue_size(feeds, monkeypatch):
+    # persist 只有一个 worker：条目数远超队列容量时也不能阻塞在自己的队列上
+    monkeypatch.setattr(settings.pipeline, "queue_size", 5)
+    result = _ingest()
+    assert result.sources == 4
+    assert result.added == 4 * ENTRIES_PER_SOURCE
+    with Session(fetch.engine) as session:
+        assert session.exec(select(func.count()).select_from(Article)).one() == 4 * ENTRIES_PER_SOURCE
+        runs = session.exec(select(FetchRun)).all()
+        assert [run.status for run in runs] == ["success"] * 4
+
+
+def test_ingest_default_queue_size(feeds):
+    assert _ingest().added == 4 * ENTRIES_PER_SOURCE
+
+
+def test_persist_failure_still_flushes_source(feeds, monkeypatch):
+    original = fetch.IngestRun._dedupe_and_stage
+
+    def flaky(self, item):
+        if item.url.endswith("/0"):
+            raise RuntimeError("boom")
+        original(self, item)
+
+    monkeypatch.setattr(settings.pipeline, "queue_size", 5)
+    monkeypatch.setattr(fetch.IngestRun, "_dedupe_and_stage", flaky)
+    result = _ingest()
+    assert result.added == 4 * (ENTRIES_PER_SOURCE - 1)
+    with Session(fetch.engine) as session:
+        assert all(state.content_hash for state in session.exec(select(FeedState)).all())
+
+
+def test_topic_scoped_ingest_routes_to_every_matching_topic(feeds):
+    with Session(fetch.engine) as session:
+        fed = Topic(name_zh="美联储", keywords="fed")
+        session.add(fed)
+        session.commit()
+        gold_id, fed_id = 1, fed.id
+    result = asyncio.run(asyncio.wait_for(fetch.ingest(topic_ids=[gold_id]), 30))
+    assert result.added == 4 * ENTRIES_PER_SOURCE
+    with Session(fetch.engine) as session:
+        tagged = session.exec(select(ArticleTopic.topic_id, func.count()).group_by(ArticleTopic.topic_id)).all()
+    assert dict(tagged) == {gold_id: result.added, fed_id: result.added}
+
+
+def test_filtered_entries_do_not_count_as_new(db, monkeypatch):
+    with Session(db) as session:
+        session.add(Topic(name_zh="黄金", keywords="gold", is_core=True))
+        session.add(Source(name="feed0", url="https://example.com/feed0", lang="en"))
+        session.commit()
+    fetch.seen_urls.rebuild([])
+    fetch.dedupe_index.clear()
+    noise = "".join(
+        f"<item><title>celebrity gossip {i}</title><link>https://example.com/noise/{i}</link></item>" for i in range(20)
+    )
+    content = _feed("feed0", 3).replace(b"</channel>", noise.encode() + b"</channel>")
+
+    async def download(url, etag=None, last_modified=None, content_hash=None):
+        return FeedResult(content=content, content_hash="hash")
+
+    monkeypatch.setattr(fetch, "download_feed_async", download)
+    for _ in range(2):
+        _ingest()
+    with Session(db) as session:
+        runs = session.exec(select(FetchRun).order_by(FetchRun.id)).all()
+    # 第二轮只剩被过滤的噪声条目，不应再被当作新条目
+    assert [run.entries for run in runs] == [3, 0]
+    assert [run.added for run in runs] == [3, 0]
+
+
+def test_hash_short_circuit_keeps_new_validators(feeds, monkeypatch):
+    _ingest()
+
+    async def unchanged(url, etag=None, last_modified=None, content_hash=None):
+        # 服务器换了 ETag / Last-Modified，但正文哈希没变
+        return FeedResult(not_modified=True, etag="v2", last_modified="Mon, 01 Jan 2024 00:00:00 GMT", content_hash=content_hash)
+
+    monkeypatch.setattr(fetch, "download_feed_async", unchanged)
+    _ingest()
+    with Session(fetch.engine) as session:
+        states = session.exec(select(FeedState)).all()
+    assert len(states) == 4
+    assert {(state.etag, state.last_modified) for state in states} == {("v2", "Mon, 01 Jan 2024 00:00:00 GMT")}
+    assert all(state.content_hash.startswith("hash-") for state in states)
+
+
+def test_not_modified_without_stored_hash_keeps_new_validators(feeds, monkeypatch):
+    # 迁移后的首轮：库里有旧的 ETag，但还没有 content_hash
+    with Session(fetch.engine) as session:
+        for source in session.exec(select(Source)).all():
+            session.add(FeedState(source_id=source.id, etag="v1"))
+        session.commit()
+
+    async def not_modified(url, etag=None, last_modified=None, content_hash=None):
+        assert etag == "v1" and content_hash is None
+        return FeedResult(not_modified=True, etag="v2", last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+
+    monkeypatch.setattr(fetch, "download_feed_async", not_modified)
+    _ingest()
+    with Session(fetch.engine) as session:
+        states = session.exec(select(FeedState)).all()
+    assert {(state.etag, state.last_modified, state.content_hash) for state in states} == {
+        ("v2", "Mon, 01 Jan 2024 00:00:00 GMT", None)
+    }
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+
+from apscheduler.schedulers.base import STATE_PAUSED, STATE_RUNNING
+from sqlalchemy import update
+from sqlmodel import Session
+
+from app.models import LeaderLease
+from app.services import scheduler as scheduler_module
+from app.services.leader import LeaderElection
+
+
+def _election(**callbacks) -> LeaderElection:
+    election = LeaderElection("test", lease_seconds=30, renew_seconds=10)
+    election._on_elected = callbacks.get("on_elected")
+    election._on_renewed = callbacks.get("on_renewed")
+    election._on_lost = callbacks.get("on_lost")
+    return election
+
+
+def _expire(engine) -> None:
+    with Session(engine) as session:
+        session.exec(update(LeaderLease).values(lease_until=datetime.utcnow() - timedelta(seconds=1)))
+        session.commit()
+
+
+class _Calls:
+    def __init__(self, fail_first: int = 0):
+        self.count = 0
+        self.fail_first = fail_first
+
+    async def __call__(self) -> None:
+        self.count += 1
+        if self.count <= self.fail_first:
+            raise RuntimeError("database is locked")
+
+
+def test_only_one_holder_until_lease_expires(db):
+    first, second = _election(), _election()
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    # 持有者续约
+    assert first.try_acquire()
+    assert first.holder()["owner"] == first.owner
+
+    _expire(db)
+    assert second.try_acquire()
+    assert not first.try_acquire()
+    assert second.holder()["is_self"]
+
+
+def test_step_runs_callbacks_on_election_renewal_and_loss(db):
+    elected, renewed, lost = _Calls(), _Calls(), _Calls()
+    first = _election(on_elected=elected, on_renewed=renewed, on_lost=lost)
+    second = _election()
+
+    async def scenario():
+        await first._step()
+        assert first.is_leader and elected.count == 1
+        await first._step()
+        assert renewed.count == 1
+        _expire(db)
+        assert second.try_acquire()
+        await first._step()
+
+    asyncio.run(scenario())
+    assert not first.is_leader
+    assert lost.count == 1
+
+
+def test_release_lets_another_process_take_over(db):
+    first, second = _election(), _election()
+    asyncio.run(first._step())
+    assert first.is_leader
+    first.release()
+    assert not first.is_leader
+    assert second.try_acquire()
+
+
+def test_failed_election_callback_releases_lease_and_retries(db):
+    elected, lost = _Calls(fail_first=1), _Calls()
+    election = _election(on_elected=elected, on_lost=lost)
+    other = _election()
+
+    async def scenario():
+        await election._step()
+        # 初始化失败：不算主节点，撤销并释放租约，其它进程可以接管
+        assert not election.is_leader
+        assert lost.count == 1
+        assert election.holder()["owner"] is None
+        assert other.try_acquire()
+        _expire(db)
+        await election._step()
+
+    asyncio.run(scenario())
+    assert election.is_leader
+    assert elected.count == 2
+
+
+def test_scheduler_resumes_after_elected_callback_fails_once(db, monkeypatch):
+    election = LeaderElection("scheduler-test", lease_seconds=30, renew_seconds=10)
+    monkeypatch.setattr(scheduler_module, "scheduler_leader", election)
+    calls = []
+
+    def fail_interrupted():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        return 0
+
+    monkeypatch.setattr(scheduler_module, "fail_interrupted_fetch_runs", fail_interrupted)
+    monkeypatch.setattr(scheduler_module, "_desired_jobs", lambda: [])
+    scheduler = scheduler_module.scheduler
+
+    async def scenario():
+        scheduler.start(paused=True)
+        election._on_elected = scheduler_module._on_elected
+        election._on_renewed = scheduler_module._on_renewed
+        election._on_lost = scheduler_module._on_lost
+        try:
+            await election._step()
+            assert not election.is_leader
+            assert scheduler.state == STATE_PAUSED
+            await election._step()
+            assert election.is_leader
+            return scheduler.state
+        finally:
+            scheduler.shutdown(wait=False)
+
+    assert asyncio.run(scenario()) == STATE_RUNNING
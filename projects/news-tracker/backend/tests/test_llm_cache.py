@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from sqlmodel import Session
+
+from app.models import LlmCache
+from app.services.llm_cache import Completion, LlmResponseCache, cache_key
+
+MESSAGES = [{"role": "user", "content": "翻译：Gold hits record"}]
+
+
+def _cache(**values) -> LlmResponseCache:
+    options = dict(max_bytes=1024 * 1024, ttl=timedelta(hours=1))
+    options.update(values)
+    return LlmResponseCache(**options)
+
+
+def test_cache_key_is_content_addressed():
+    key = cache_key("m", MESSAGES, temperature=0.2, max_tokens=100)
+    assert key == cache_key("m", [dict(MESSAGES[0])], max_tokens=100, temperature=0.2)
+    assert key != cache_key("other", MESSAGES, temperature=0.2, max_tokens=100)
+    assert key != cache_key("m", [{"role": "user", "content": "翻译：Gold hits records"}], temperature=0.2, max_tokens=100)
+    assert key != cache_key("m", MESSAGES, temperature=0.3, max_tokens=100)
+
+
+def test_entries_expire_after_ttl(db):
+    cache = _cache()
+    cache.put("k", "m", Completion("黄金创新高", 10, 5))
+    assert cache.get("k") == Completion("黄金创新高", 10, 5)
+    with Session(db) as session:
+        session.exec(update(LlmCache).values(created_at=datetime.utcnow() - timedelta(hours=2)))
+        session.commit()
+    assert cache.get("k") is None
+    assert cache.purge_expired() == 1
+
+
+def test_concurrent_identical_awaits_make_one_upstream_call(db):
+    cache = _cache()
+    calls = []
+
+    async def upstream() -> Completion:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return Completion("黄金创新高", 10, 5)
+
+    async def scenario(n: int):
+        return await asyncio.gather(*(cache.aget_or_call("k", "m", upstream) for _ in range(n)))
+
+    results = asyncio.run(scenario(8))
+    assert len(calls) == 1
+    assert [result.content for result in results] == ["黄金创新高"] * 8
+    assert cache.coalesced == 7
+
+    # 之后的调用直接命中缓存
+    assert asyncio.run(scenario(3))[0].content == "黄金创新高"
+    assert len(calls) == 1
+    assert cache.hits == 3
+
+
+def test_sync_callers_coalesce_and_share_failures(db):
+    cache = _cache()
+    calls = []
+    started = threading.Event()
+
+    def failing() -> Completion:
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("upstream 500")
+
+    def call(_):
+        try:
+            return cache.get_or_call("k", "m", failing)
+        except RuntimeError as exc:
+            return str(exc)
+
+    with ThreadPoolExecutor(4) as threads:
+        first = threads.submit(call, 0)
+        started.wait()
+        rest = list(threads.map(call, range(3)))
+    assert len(calls) == 1
+    assert [first.result(), *rest] == ["upstream 500"] * 4
+    # 失败的结果不写入缓存，下次重新请求
+    assert cache.get_or_call("k", "m", lambda: Completion("ok")) == Completion("ok")
+
+
+def test_disabled_cache_always_calls_upstream(db):
+    cache = _cache(max_bytes=0)
+    calls = []
+
+    def upstream() -> Completion:
+        calls.append(1)
+        return Completion("x")
+
+    cache.get_or_call("k", "m", upstream)
+    cache.get_or_call("k", "m", upstream)
+    assert len(calls) == 2
+    assert cache.get("k") is None
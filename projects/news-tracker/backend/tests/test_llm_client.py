@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.services import llm
+from app.services.ratelimit import TokenBucket
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+OK = {"choices": [{"message": {"content": "你好"}}], "usage": {"prompt_tokens": 3, "completion_tokens": 2}}
+
+
+class Upstream:
+    """按顺序返回预设响应的 MockTransport 处理函数。"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        # 最后一个响应一直重复
+        status, headers = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if status == 200:
+            return httpx.Response(200, json=OK)
+        return httpx.Response(status, headers=headers, json={"error": "busy"})
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded: list[float] = []
+
+    async def fake_async_sleep(delay):
+        recorded.append(delay)
+
+    monkeypatch.setattr(llm.time, "sleep", recorded.append)
+    monkeypatch.setattr(llm.asyncio, "sleep", fake_async_sleep)
+    # 抖动取上限，便于检查指数退避
+    monkeypatch.setattr(llm.random, "uniform", lambda low, high: high)
+    monkeypatch.setattr(settings.llm, "max_retries", 3)
+    return recorded
+
+
+def _client(upstream: Upstream) -> llm.LLMClient:
+    client = llm.LLMClient()
+    client.api_key, client.base_url = "key", "https://llm.example.com/v1"
+    client.requests_bucket = TokenBucket(0)
+    client.tokens_bucket = TokenBucket(0)
+    client._client = httpx.Client(transport=httpx.MockTransport(upstream))
+    return client
+
+
+def _acomplete(client: llm.LLMClient, upstream: Upstream, deadline=None):
+    async def run():
+        loop = asyncio.get_running_loop()
+        client._async_clients[loop] = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+        client._async_sems[loop] = asyncio.Semaphore(2)
+        try:
+            return await client._acomplete(MESSAGES, 0.2, 100, deadline)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def test_429_waits_for_retry_after(sleeps):
+    upstream = Upstream((429, {"Retry-After": "3"}), (200, {}))
+    completion = _client(upstream)._complete(MESSAGES, 0.2, 100)
+    assert completion.content == "你好" and completion.total_tokens == 5
+    assert upstream.requests == 2
+    assert sleeps == [3.0]
+
+
+def test_retry_after_http_date(sleeps):
+    when = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    upstream = Upstream((503, {"Retry-After": when}), (200, {}))
+    _client(upstream)._complete(MESSAGES, 0.2, 100)
+    assert len(sleeps) == 1 and 25 < sleeps[0] <= 30
+
+
+def test_5xx_backs_off_exponentially(sleeps):
+    upstream = Upstream((503, {}), (502, {}), (500, {}), (200, {}))
+    assert _client(upstream)._complete(MESSAGES, 0.2, 100).content == "你好"
+    assert sleeps == [1.0, 2.0, 4.0]
+
+
+def test_gives_up_after_max_retries(sleeps):
+    upstream = Upstream((500, {}))
+    with pytest.raises(RuntimeError, match="已重试 3 次"):
+        _client(upstream)._complete(MESSAGES, 0.2, 100)
+    assert upstream.requests == 4
+
+
+def test_retry_after_beyond_deadline_fails_fast(sleeps):
+    upstream = Upstream((429, {"Retry-After": "120"}), (200, {}))
+    with pytest.raises(TimeoutError):
+        _client(upstream)._complete(MESSAGES, 0.2, 100, deadline=10)
+    assert upstream.requests == 1 and sleeps == []
+
+
+def test_client_errors_are_not_retried(sleeps):
+    upstream = Upstream((400, {}))
+    with pytest.raises(httpx.HTTPStatusError):
+        _client(upstream)._complete(MESSAGES, 0.2, 100)
+    assert upstream.requests == 1
+
+
+def test_async_path_retries_and_gives_up(sleeps):
+    upstream = Upstream((429, {"Retry-After": "2"}), (504, {}), (200, {}))
+    client = _client(upstream)
+    assert _acomplete(client, upstream).content == "你好"
+    assert sleeps == [2.0, 2.0]
+
+    upstream = Upstream((502, {}))
+    with pytest.raises(RuntimeError):
+        _acomplete(client, upstream)
+    assert upstream.requests == 4
+
+
+def test_token_bucket_smooths_bursts():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.reserve(60) == 0.0
+    # 桶已空：下一个令牌按 1 个/秒补充，后来者排在已预约的额度之后
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+    assert bucket.reserve(1) == pytest.approx(2.0, abs=0.05)
+    # 超过容量的请求按容量计
+    assert TokenBucket(per_minute=10).reserve(100) == 0.0
+    assert TokenBucket(per_minute=0).reserve(1000) == 0.0
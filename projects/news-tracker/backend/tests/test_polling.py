@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import PollingConfig
+from app.models import FeedState, Source
+from app.services.polling import ALPHA_DOWN, ALPHA_UP, PollPolicy, timestamp_rate
+
+NOW = datetime(2024, 5, 1, 12)
+CFG = PollingConfig(min_minutes=5, max_minutes=180, core_minutes=15, default_minutes=60, target_entries=3)
+
+
+def _source(priority: int = 5) -> Source:
+    return Source(id=1, name="s", url="https://example.com/feed", priority=priority)
+
+
+def test_interval_without_observations_uses_fixed_defaults():
+    policy = PollPolicy(CFG)
+    assert policy.interval(None, _source(), core=True) == 15 * 60
+    assert policy.interval(FeedState(source_id=1), _source(), core=False) == 60 * 60
+
+
+def test_interval_follows_rate_and_is_clamped():
+    policy = PollPolicy(CFG)
+    assert policy.interval(FeedState(source_id=1, rate_per_hour=6.0), _source(), core=False) == 30 * 60
+    assert policy.interval(FeedState(source_id=1, rate_per_hour=1000.0), _source(), core=False) == 5 * 60
+    assert policy.interval(FeedState(source_id=1, rate_per_hour=0.0), _source(), core=False) == 180 * 60
+    # priority 每高 5 级间隔减半
+    assert policy.interval(FeedState(source_id=1, rate_per_hour=6.0), _source(10), core=False) == 15 * 60
+
+
+def test_observe_rises_fast_and_decays_slowly():
+    policy = PollPolicy(CFG)
+    state = FeedState(source_id=1, checked_at=NOW - timedelta(hours=1), rate_per_hour=2.0)
+    policy.observe(state, 10, [], NOW)
+    assert state.rate_per_hour == pytest.approx(ALPHA_UP * 10 + (1 - ALPHA_UP) * 2)
+
+    state = FeedState(source_id=1, checked_at=NOW - timedelta(hours=1), rate_per_hour=10.0)
+    policy.observe(state, 0, [], NOW)
+    assert state.rate_per_hour == pytest.approx((1 - ALPHA_DOWN) * 10)
+
+
+def test_observe_cold_start_uses_history_then_timestamps():
+    policy = PollPolicy(CFG)
+    state = FeedState(source_id=1)
+    published = [NOW - timedelta(hours=h) for h in range(1, 5)]
+    policy.observe(state, 4, published, NOW, history=None)
+    # 第一次检查：只有条目时间戳可用，四条分布在 4 小时里
+    assert state.rate_per_hour == pytest.approx(0.75)
+
+    # 有历史速率时以它为起点做平滑
+    state = FeedState(source_id=1)
+    policy.observe(state, 4, published, NOW, history=1.0)
+    assert state.rate_per_hour == pytest.approx(ALPHA_DOWN * 0.75 + (1 - ALPHA_DOWN) * 1.0)
+
+    # 没有任何观测时不更新
+    state = FeedState(source_id=1)
+    policy.observe(state, 4, [], NOW, history=1.0)
+    assert state.rate_per_hour is None
+
+
+def test_timestamp_rate_ignores_missing_and_clustered_dates():
+    assert timestamp_rate([NOW, NOW - timedelta(seconds=30)], NOW) is None
+    assert timestamp_rate([NOW - timedelta(minutes=m) for m in (2, 5, 8)], NOW) is None
+    assert timestamp_rate([NOW - timedelta(days=5), NOW - timedelta(days=4)], NOW) is None
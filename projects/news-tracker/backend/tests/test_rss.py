@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import httpx
+
+from app.services.rss import _check_response, _hash_body
+
+URL = "https://example.com/feed"
+
+
+def _response(status: int, content: bytes = b"", **headers) -> httpx.Response:
+    return httpx.Response(status, content=content, headers=headers, request=httpx.Request("GET", URL))
+
+
+def test_304_keeps_old_validators_unless_server_sends_new_ones():
+    result = _check_response(URL, _response(304), "v1", "old", None)
+    assert result.not_modified and (result.etag, result.last_modified) == ("v1", "old")
+    result = _check_response(URL, _response(304, ETag="v2"), "v1", "old", None)
+    assert (result.etag, result.last_modified) == ("v2", "old")
+
+
+def test_unchanged_body_short_circuits_with_new_validators():
+    body = b"<rss></rss>"
+    result = _check_response(URL, _response(200, body, ETag="v2"), "v1", None, _hash_body(body))
+    assert result.not_modified and result.content is None
+    assert result.etag == "v2"
+    result = _check_response(URL, _response(200, b"<rss>new</rss>", ETag="v3"), "v2", None, _hash_body(body))
+    assert not result.not_modified and result.content == b"<rss>new</rss>"
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from app.services import scheduler as scheduler_module
+from app.services.scheduler import JobSpec
+
+
+async def _noop(*args) -> None:
+    pass
+
+
+def _specs(**seconds) -> list[JobSpec]:
+    return [JobSpec(job_id, _noop, value, first_delay=timedelta(seconds=5)) for job_id, value in seconds.items()]
+
+
+def test_reconcile_keeps_timing_of_unchanged_jobs(monkeypatch):
+    monkeypatch.setattr(scheduler_module.scheduler_leader, "is_leader", True)
+    desired = {"specs": _specs(a=600, b=1200)}
+    monkeypatch.setattr(scheduler_module, "_desired_jobs", lambda: desired["specs"])
+
+    async def scenario():
+        scheduler = AsyncIOScheduler()
+        monkeypatch.setattr(scheduler_module, "scheduler", scheduler)
+        scheduler.start(paused=True)
+        try:
+            reconcile = scheduler_module.reconcile_jobs
+            assert reconcile() == {"added": ["a", "b"], "removed": [], "rescheduled": []}
+            before = {job.id: job.next_run_time for job in scheduler.get_jobs()}
+
+            # 期望集合不变：什么都不动，下次运行时间保持原样
+            assert reconcile() == {"added": [], "removed": [], "rescheduled": []}
+            assert {job.id: job.next_run_time for job in scheduler.get_jobs()} == before
+
+            # 只新增 c、调整 b 的间隔；a 的下次运行时间不变
+            desired["specs"] = _specs(a=600, b=60, c=300)
+            assert reconcile() == {"added": ["c"], "removed": [], "rescheduled": ["b"]}
+            assert scheduler.get_job("a").next_run_time == before["a"]
+            b = scheduler.get_job("b")
+            assert b.trigger.interval == timedelta(seconds=60)
+            assert b.next_run_time <= before["b"]
+
+            desired["specs"] = _specs(a=600)
+            assert reconcile() == {"added": [], "removed": ["b", "c"], "rescheduled": []}
+            assert scheduler.get_job("a").next_run_time == before["a"]
+        finally:
+            scheduler.shutdown(wait=False)
+
+    asyncio.run(scenario())
+
+
+def test_reconcile_is_noop_without_lease(monkeypatch):
+    monkeypatch.setattr(scheduler_module.scheduler_leader, "is_leader", False)
+
+    def fail():
+        raise AssertionError("非主节点不应读取期望任务")
+
+    monkeypatch.setattr(scheduler_module, "_desired_jobs", fail)
+    assert scheduler_module.reconcile_jobs() == {"added": [], "removed": [], "rescheduled": []}